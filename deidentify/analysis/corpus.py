@@ -36,9 +36,10 @@ def analyze_documents(documents, tokenizer):
     term_frequency = Counter()
     document_frequency = Counter()
 
-    for doc in tqdm(documents):
+    parsed_docs = tokenizer.parse_texts(doc.text for doc in documents)
+
+    for doc, parsed in tqdm(zip(documents, parsed_docs), total=len(documents)):
         doc_annotations.append(len(doc.annotations))
-        parsed = tokenizer.parse_text(doc.text)
 
         num_sents = len(list(filter(lambda sent: not sent[0].text.startswith('==='), parsed.sents)))
         doc_length_sents.append(num_sents)
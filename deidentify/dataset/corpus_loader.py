@@ -1,5 +1,8 @@
 import glob
+from collections import OrderedDict, namedtuple
+from collections.abc import Sequence
 from os.path import basename, dirname, join, normpath, splitext
+from typing import List
 
 from deidentify.base import Corpus, Document
 from deidentify.dataset import brat
@@ -15,13 +18,99 @@ def get_basename(full_path):
     return splitext(basename(full_path))[0]
 
 
+class BratDocumentRef(namedtuple('BratDocumentRef', ['name', 'txt_file', 'ann_file'])):
+    """Reference to a document stored as a pair of brat .txt/.ann files."""
+
+    __slots__ = ()
+
+    def load(self) -> Document:
+        return Document(name=self.name,
+                        text=brat.load_brat_text(self.txt_file),
+                        annotations=brat.load_brat_annotations(self.ann_file))
+
+
+class LazyDocuments(Sequence):
+    """Read-only list of documents that are loaded on access.
+
+    Only document references are held in memory. A reference has a `name` and a `load()` method
+    that returns the `Document` (e.g., `BratDocumentRef`). Loaded documents are optionally kept in a
+    least-recently-used cache, so repeated passes over a small corpus don't hit the disk again.
+
+    Parameters
+    ----------
+    refs : List
+        The document references.
+    cache_size : int
+        Maximum number of loaded documents to keep. Set to 0 to disable caching.
+    """
+
+    def __init__(self, refs: List, cache_size: int = 0):
+        if cache_size < 0:
+            raise ValueError('cache_size has to be non-negative, got {}'.format(cache_size))
+
+        self.refs = list(refs)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    @property
+    def names(self) -> List[str]:
+        return [ref.name for ref in self.refs]
+
+    def _load(self, ref) -> Document:
+        if not self.cache_size:
+            return ref.load()
+
+        doc = self._cache.get(ref)
+        if doc is not None:
+            self._cache.move_to_end(ref)
+            return doc
+
+        doc = ref.load()
+        self._cache[ref] = doc
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return doc
+
+    def __len__(self):
+        return len(self.refs)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return LazyDocuments(self.refs[i], cache_size=self.cache_size)
+        return self._load(self.refs[i])
+
+    def __iter__(self):
+        for ref in self.refs:
+            yield self._load(ref)
+
+    def __add__(self, other):
+        if isinstance(other, LazyDocuments):
+            return LazyDocuments(self.refs + other.refs, cache_size=self.cache_size)
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return 'LazyDocuments(n_docs={}, cache_size={})'.format(len(self), self.cache_size)
+
+
 class CorpusLoader:
 
     @staticmethod
-    def _load_folder(path):
+    def _load_folder(path, lazy=False, cache_size=0):
         files = glob.glob(join(path, '*.ann'))
         files = sorted(files)
 
+        if lazy:
+            refs = []
+            for file in files:
+                doc_name = get_basename(file)
+                refs.append(BratDocumentRef(name=doc_name,
+                                            txt_file=join(path, '{}.txt'.format(doc_name)),
+                                            ann_file=file))
+            return LazyDocuments(refs, cache_size=cache_size)
+
         documents = []
         for file in files:
             doc_name = get_basename(file)
@@ -31,11 +120,27 @@ class CorpusLoader:
 
         return documents
 
-    def load_corpus(self, path) -> Corpus:
+    def load_corpus(self, path, lazy=False, cache_size=0) -> Corpus:
+        """Load the train, dev and test split of a corpus in brat or packed format.
+
+        Parameters
+        ----------
+        path : str
+            The corpus directory with `train/`, `dev/` and `test/` subdirectories, or a packed
+            corpus file (see `deidentify.dataset.packed`).
+        lazy : bool
+            Only glob the directories and load documents on access (see `LazyDocuments`).
+        cache_size : int
+            Number of loaded documents to keep in memory per split if `lazy=True`.
+        """
+        from deidentify.dataset import packed
+        if packed.is_packed(path):
+            return packed.load_packed_corpus(path, lazy=lazy, cache_size=cache_size)
+
         corpus_name = basename(normpath(path))
 
-        train = self._load_folder(join(path, 'train'))
-        test = self._load_folder(join(path, 'test'))
-        dev = self._load_folder(join(path, 'dev'))
+        train = self._load_folder(join(path, 'train'), lazy=lazy, cache_size=cache_size)
+        test = self._load_folder(join(path, 'test'), lazy=lazy, cache_size=cache_size)
+        dev = self._load_folder(join(path, 'dev'), lazy=lazy, cache_size=cache_size)
 
         return Corpus(train=train, test=test, dev=dev, name=corpus_name)
@@ -0,0 +1,292 @@
+"""Packed corpus format: all documents of a corpus in a single indexed binary file.
+
+Loading a brat corpus opens two small files per document, which is slow on network filesystems. A
+packed corpus stores the texts and annotations of all documents in one file:
+
+```
+header   magic (8 bytes), format version (uint32), index offset (uint64), index length (uint64)
+body     per document: UTF-8 text, followed by the annotations as JSON rows
+         [ann_id, tag, start, end, text]
+index    JSON list of rows [split, name, text offset, text length, ann offset, ann length]
+```
+
+The file is memory-mapped on read. Documents are decoded on access, so any document can be read by
+name without loading the rest of the corpus.
+
+Convert between the formats with:
+
+```sh
+python -m deidentify.dataset.packed to-pack data/corpus/ons/ ons.pack
+python -m deidentify.dataset.packed to-brat ons.pack data/corpus/ons_unpacked/
+```
+"""
+import argparse
+import glob
+import json
+import mmap
+import os
+import struct
+from collections import OrderedDict, namedtuple
+from os.path import isdir, isfile, join
+from typing import Iterable, List, Optional
+
+from loguru import logger
+
+from deidentify.base import Annotation, Corpus, Document
+from deidentify.dataset import brat
+from deidentify.dataset.corpus_loader import LazyDocuments, get_basename
+
+MAGIC = b'DEIDPACK'
+FORMAT_VERSION = 1
+PACKED_SUFFIX = '.pack'
+SPLITS = ('train', 'dev', 'test')
+
+_HEADER = struct.Struct('<8sIQQ')
+
+_IndexEntry = namedtuple('_IndexEntry', ['split', 'name', 'text_offset', 'text_length',
+                                         'ann_offset', 'ann_length'])
+
+
+def is_packed(path) -> bool:
+    """True if `path` is a packed corpus file."""
+    if not isfile(path):
+        return False
+
+    with open(path, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class PackedDocumentRef(namedtuple('PackedDocumentRef', ['name', 'split', 'corpus'])):
+    """Reference to a document within a `PackedCorpus`. Used by `LazyDocuments`."""
+
+    __slots__ = ()
+
+    def load(self) -> Document:
+        return self.corpus.document(self.name, split=self.split)
+
+
+class PackedWriter:
+    """Write documents to a packed corpus file.
+
+    ```py
+    with PackedWriter('corpus.pack') as writer:
+        writer.add_documents(corpus.train, split='train')
+    ```
+
+    The index is written on `close`. Document names have to be unique per split.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0))
+        self._entries = []
+        self._keys = set()
+
+    def add(self, doc: Document, split: str = ''):
+        key = (split, doc.name)
+        if key in self._keys:
+            raise ValueError('Duplicate document {} in split "{}"'.format(doc.name, split))
+        self._keys.add(key)
+
+        text = doc.text.encode('utf-8')
+        annotations = json.dumps(
+            [[ann.ann_id, ann.tag, int(ann.start), int(ann.end), ann.text]
+             for ann in doc.annotations],
+            ensure_ascii=False
+        ).encode('utf-8')
+
+        text_offset = self._file.tell()
+        self._file.write(text)
+        self._file.write(annotations)
+        self._entries.append([split, doc.name, text_offset, len(text),
+                              text_offset + len(text), len(annotations)])
+
+    def add_documents(self, docs: Iterable[Document], split: str = ''):
+        for doc in docs:
+            self.add(doc, split=split)
+
+    def close(self):
+        if self._file is None:
+            return
+
+        index = json.dumps(self._entries, ensure_ascii=False).encode('utf-8')
+        index_offset = self._file.tell()
+        self._file.write(index)
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, index_offset, len(index)))
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class PackedCorpus:
+    """Read-only random access to a packed corpus file.
+
+    Parameters
+    ----------
+    path : str
+        Path to a file written by `PackedWriter`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._mapped = None
+
+        mapped = self._map()
+        magic, version, index_offset, index_length = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise ValueError('{} is not a packed corpus file'.format(path))
+        if version != FORMAT_VERSION:
+            raise ValueError('Unsupported packed corpus version {} in {}'.format(version, path))
+
+        rows = json.loads(str(mapped[index_offset:index_offset + index_length], 'utf-8'))
+        self._index = OrderedDict()
+        for row in rows:
+            entry = _IndexEntry(*row)
+            self._index[(entry.split, entry.name)] = entry
+
+    def _map(self):
+        if self._mapped is None:
+            self._file = open(self.path, 'rb')
+            self._mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mapped
+
+    @property
+    def splits(self) -> List[str]:
+        return list(OrderedDict.fromkeys(split for split, _ in self._index))
+
+    def names(self, split: str = '') -> List[str]:
+        """Names of all documents in `split`, in the order they were written."""
+        return [name for entry_split, name in self._index if entry_split == split]
+
+    def _entry(self, name, split):
+        try:
+            return self._index[(split, name)]
+        except KeyError:
+            raise KeyError('Unknown document {} in split "{}" of {}'.format(
+                name, split, self.path)) from None
+
+    def text(self, name: str, split: str = '') -> str:
+        entry = self._entry(name, split)
+        offset = entry.text_offset
+        return str(self._map()[offset:offset + entry.text_length], 'utf-8')
+
+    def annotations(self, name: str, split: str = '') -> List[Annotation]:
+        entry = self._entry(name, split)
+        offset = entry.ann_offset
+        rows = json.loads(str(self._map()[offset:offset + entry.ann_length], 'utf-8'))
+        return [Annotation(text=text, start=start, end=end, tag=tag, doc_id=name, ann_id=ann_id)
+                for ann_id, tag, start, end, text in rows]
+
+    def document(self, name: str, split: str = '') -> Document:
+        return Document(name=name, text=self.text(name, split),
+                        annotations=self.annotations(name, split))
+
+    def documents(self, split: str = '', lazy=False, cache_size=0) -> List[Document]:
+        """All documents of `split`. If `lazy=True`, they are loaded on access."""
+        refs = [PackedDocumentRef(name=name, split=split, corpus=self)
+                for name in self.names(split)]
+        docs = LazyDocuments(refs, cache_size=cache_size)
+        return docs if lazy else list(docs)
+
+    def __len__(self):
+        return len(self._index)
+
+    def close(self):
+        if self._mapped is not None:
+            self._mapped.close()
+            self._file.close()
+            self._mapped = None
+            self._file = None
+
+    def __getstate__(self):
+        # Memory maps can't be pickled. Each process maps the file again on first access.
+        state = self.__dict__.copy()
+        state['_file'] = None
+        state['_mapped'] = None
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return 'PackedCorpus(path={}, n_docs={})'.format(self.path, len(self))
+
+
+def write_packed_documents(path, docs: Iterable[Document], split: str = ''):
+    with PackedWriter(path) as writer:
+        writer.add_documents(docs, split=split)
+
+
+def load_packed_corpus(path, lazy=False, cache_size=0, name: Optional[str] = None) -> Corpus:
+    """Load the train, dev and test split of a packed corpus file."""
+    packed = PackedCorpus(path)
+    if name is None:
+        name = get_basename(path)
+
+    train, dev, test = [packed.documents(split, lazy=lazy, cache_size=cache_size)
+                        for split in SPLITS]
+    return Corpus(train=train, test=test, dev=dev, name=name)
+
+
+def _brat_documents(path):
+    for ann_file in sorted(glob.glob(join(path, '*.ann'))):
+        doc_name = get_basename(ann_file)
+        annotations, text = brat.load_brat_document(path, doc_name)
+        yield Document(name=doc_name, text=text, annotations=annotations)
+
+
+def brat_to_packed(brat_path, out_file):
+    """Pack a brat corpus directory.
+
+    If `brat_path` has `train/`, `dev/` and `test/` subdirectories, all splits are packed.
+    Otherwise, the *.txt/*.ann pairs in `brat_path` are packed without a split.
+    """
+    with PackedWriter(out_file) as writer:
+        if any(isdir(join(brat_path, split)) for split in SPLITS):
+            for split in SPLITS:
+                writer.add_documents(_brat_documents(join(brat_path, split)), split=split)
+        else:
+            writer.add_documents(_brat_documents(brat_path))
+
+
+def packed_to_brat(packed_file, out_path):
+    """Unpack a packed corpus file into brat format. Splits are written to subdirectories."""
+    with PackedCorpus(packed_file) as packed:
+        for split in packed.splits:
+            split_path = join(out_path, split)
+            os.makedirs(split_path, exist_ok=True)
+
+            for doc in packed.documents(split, lazy=True):
+                brat.write_brat_document(split_path, doc.name, doc.text, doc.annotations)
+
+
+def main(args):
+    if args.command == 'to-pack':
+        logger.info('Pack {} into {}'.format(args.source, args.target))
+        brat_to_packed(args.source, args.target)
+    else:
+        logger.info('Unpack {} into {}'.format(args.source, args.target))
+        packed_to_brat(args.source, args.target)
+
+
+def arg_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=['to-pack', 'to-brat'])
+    parser.add_argument("source", help="Brat directory (to-pack) or packed file (to-brat)")
+    parser.add_argument("target", help="Packed file (to-pack) or brat directory (to-brat)")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main(arg_parser())
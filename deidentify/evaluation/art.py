@@ -5,6 +5,42 @@ from joblib import Parallel, delayed
 
 from tqdm import tqdm
 
+# Number of trials that are evaluated at once by the vectorized test.
+TRIAL_BATCH_SIZE = 1000
+
+
+class CountMetric:
+    """A corpus-level metric that only depends on the sum of per-document counts.
+
+    Micro-averaged precision, recall and F1 are computed from the TP/FP/FN counts of the whole
+    corpus, which are the sum of the counts of the individual documents. For such metrics,
+    `ApproximateRandomizationTest` counts each system once and evaluates all trials vectorized.
+
+    Instances are callable like any other metric: `metric(gold, predicted) -> float`.
+
+    Parameters
+    ----------
+    name : str
+        Name of the metric (available as `__name__`).
+    document_counts : Callable
+        `document_counts(gold, predicted)` returns an array of shape (n_documents, n_counts).
+    score : Callable
+        `score(counts)` maps an array of summed counts with shape (..., n_counts) to the scores
+        with shape (...).
+    """
+
+    def __init__(self, name, document_counts, score):
+        self.__name__ = name
+        self.document_counts = document_counts
+        self.score = score
+
+    def __call__(self, ground_truth, predicted):
+        counts = np.asarray(self.document_counts(ground_truth, predicted))
+        return float(self.score(counts.sum(axis=0)))
+
+    def __repr__(self):
+        return 'CountMetric({})'.format(self.__name__)
+
 
 class ApproximateRandomizationTest(object):
     """A paired two-sided approximate randomization test.
@@ -13,6 +49,9 @@ class ApproximateRandomizationTest(object):
     performance between two systems which are run and measured on the same
     corpus.
     Adjusted original version (https://github.com/smartschat/art) to support paralellism.
+    If the metric is a `CountMetric`, the per-document counts of both systems are computed once,
+    and each trial swaps the counts of a random subset of documents (vectorized over batches of
+    trials). Any other metric is re-computed on the swapped documents of every trial.
     Attributes:
         system1_scores: A Scores object, which represents the scores of the
                         first system under consideration.
@@ -30,7 +69,8 @@ class ApproximateRandomizationTest(object):
                  system2_scores,
                  metric,
                  trials=10000,
-                 n_jobs=1):
+                 n_jobs=1,
+                 vectorized=None):
         """Inits a paired two-sided approximate randomization test.
         Args:
             system1_scores: A Scores object, which represents the scores of the
@@ -42,6 +82,10 @@ class ApproximateRandomizationTest(object):
                             whole corpus.
             trials: The number of iterations during the test. Defaults to
                             10000.
+            n_jobs: Number of parallel jobs of the generic (non-vectorized)
+                            test.
+            vectorized: Use the vectorized test. Defaults to True if the
+                            metric is a `CountMetric`.
         """
         self.ground_truth = ground_truth
         self.system1_scores = system1_scores
@@ -50,6 +94,12 @@ class ApproximateRandomizationTest(object):
         self.trials = trials
         self.n_jobs = n_jobs
 
+        if vectorized is None:
+            vectorized = isinstance(metric, CountMetric)
+        elif vectorized and not isinstance(metric, CountMetric):
+            raise ValueError('The vectorized test requires a CountMetric, got {}'.format(metric))
+        self.vectorized = vectorized
+
     def _trial(self, absolute_difference):
         pseudo_system1_scores = []
         pseudo_system2_scores = []
@@ -80,6 +130,9 @@ class ApproximateRandomizationTest(object):
             differences in scores at least as extreme as observed here, when
             there is no difference between the systems.
         """
+        if self.vectorized:
+            shuffled_was_at_least_as_high = self._run_vectorized()
+            return (shuffled_was_at_least_as_high + 1) / (self.trials + 1)
 
         absolute_difference = math.fabs(
             self.metric(self.ground_truth, self.system1_scores) -
@@ -94,3 +147,25 @@ class ApproximateRandomizationTest(object):
 
         p_value = (shuffled_was_at_least_as_high + 1) / (self.trials + 1)
         return p_value
+
+    def _run_vectorized(self):
+        counts1 = np.asarray(self.metric.document_counts(self.ground_truth, self.system1_scores))
+        counts2 = np.asarray(self.metric.document_counts(self.ground_truth, self.system2_scores))
+        total1, total2 = counts1.sum(axis=0), counts2.sum(axis=0)
+
+        absolute_difference = np.abs(self.metric.score(total1) - self.metric.score(total2))
+
+        # Swapping document i moves delta[i] from the total of system 1 to system 2 and vice versa.
+        delta = counts2 - counts1
+        shuffled_was_at_least_as_high = 0
+
+        for start in range(0, self.trials, TRIAL_BATCH_SIZE):
+            n_trials = min(TRIAL_BATCH_SIZE, self.trials - start)
+            swap = np.random.randint(2, size=(n_trials, len(delta)))
+            shift = swap @ delta
+
+            pseudo_difference = np.abs(self.metric.score(total1 + shift) -
+                                       self.metric.score(total2 - shift))
+            shuffled_was_at_least_as_high += int(np.sum(pseudo_difference >= absolute_difference))
+
+        return shuffled_was_at_least_as_high
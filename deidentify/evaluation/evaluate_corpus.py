@@ -3,6 +3,8 @@ Evaluate all runs for a specific corpus and save output to a CSV file.
 
 Only aggregate metrics over all classes are computed and saved as a summary. For a detailed
 evaluation of a single run, use `deidentify.evaluation.evaluate_run`.
+
+All runs share the token cache of the `Evaluator`, so each document is only tokenized once.
 """
 import argparse
 import glob
@@ -40,7 +42,8 @@ def main(args):
             evaluator = evaluate(documents_path=corpus_path,
                                  gold_path=corpus_path,
                                  pred_path=join(run, part),
-                                 language=args.language)
+                                 language=args.language,
+                                 n_process=args.n_process)
 
             entity = evaluator.entity_level()
             token = evaluator.token_level()
@@ -95,6 +98,8 @@ def arg_parser():
     parser.add_argument("corpus", help="Name of corpus (e.g., 'dummy', 'ons')", type=str)
     parser.add_argument("language", help="Language to use for tokenizer",
                         choices=Evaluator.supported_languages())
+    parser.add_argument("--n_process", help="Number of processes used for tokenization",
+                        type=int, default=1)
     return parser.parse_args()
 
 
@@ -1,10 +1,12 @@
 import argparse
 import glob
+from collections import namedtuple
 from os.path import basename, isdir, join, splitext
 from typing import List
 
 from deidentify.base import Document
-from deidentify.dataset import brat
+from deidentify.dataset import brat, packed
+from deidentify.dataset.corpus_loader import BratDocumentRef, LazyDocuments
 from deidentify.evaluation.evaluator import Evaluator
 
 
@@ -12,7 +14,20 @@ def _basenames(files):
     return list(map(lambda f: splitext(basename(f))[0], files))
 
 
-def get_documents(docs_path, anns_path) -> List[Document]:
+def get_documents(docs_path, anns_path, lazy=False, cache_size=0, split=None) -> List[Document]:
+    """Load documents from a directory of texts and a directory of brat annotations.
+
+    If `lazy=True`, a `LazyDocuments` list is returned that loads the documents on access.
+
+    `anns_path` can also be a packed corpus file (e.g., predictions written with
+    `save_predictions(..., packed=True)`). Texts are then read from `docs_path` if it is a packed
+    file as well, and from the packed annotation file otherwise. If a packed file has several
+    splits (e.g., a packed gold corpus), `split` selects the one to load.
+    """
+    if packed.is_packed(anns_path):
+        return _get_packed_documents(docs_path, anns_path, lazy=lazy, cache_size=cache_size,
+                                     split=split)
+
     if not isdir(docs_path):
         raise ValueError('docs_path = {} does not exist.'.format(docs_path))
     if not isdir(anns_path):
@@ -23,6 +38,12 @@ def get_documents(docs_path, anns_path) -> List[Document]:
 
     assert ann_files and txt_files and _basenames(txt_files) == _basenames(ann_files)
 
+    if lazy:
+        refs = [BratDocumentRef(name=splitext(basename(txt_file))[0], txt_file=txt_file,
+                                ann_file=ann_file)
+                for txt_file, ann_file in zip(txt_files, ann_files)]
+        return LazyDocuments(refs, cache_size=cache_size)
+
     docs = []
     for txt_file, ann_file in zip(txt_files, ann_files):
         doc_name = splitext(basename(txt_file))[0]
@@ -34,18 +55,81 @@ def get_documents(docs_path, anns_path) -> List[Document]:
     return docs
 
 
-def evaluate_documents(gold_docs, pred_docs, language='nl'):
-    return Evaluator(gold_docs, pred_docs, language=language)
+def _select_split(corpus, split):
+    splits = corpus.splits
+    if split in splits:
+        return split
+    if len(splits) == 1:
+        return splits[0]
+    raise ValueError('{} has the splits {}. Select one of them with split.'.format(
+        corpus.path, splits))
+
+
+def _name_mismatch(names, other_names, max_names=10):
+    missing = sorted(set(names) - set(other_names))
+    if len(missing) > max_names:
+        return ', '.join(missing[:max_names]) + ', ... ({} in total)'.format(len(missing))
+    return ', '.join(missing) or '-'
+
+
+def _get_packed_documents(docs_path, anns_path, lazy, cache_size, split=None):
+    annotations = packed.PackedCorpus(anns_path)
+    texts = None
+    try:
+        ann_split = _select_split(annotations, split)
+        names = annotations.names(ann_split)
+        if not names:
+            raise ValueError('{} contains no documents.'.format(anns_path))
+
+        if not packed.is_packed(docs_path):
+            docs = annotations.documents(ann_split, lazy=lazy, cache_size=cache_size)
+        else:
+            texts = packed.PackedCorpus(docs_path)
+            text_split = _select_split(texts, split)
+            text_names = texts.names(text_split)
+            if set(names) != set(text_names):
+                raise ValueError(
+                    'Documents of {} and {} do not match. Missing texts: {}. Missing annotations: '
+                    '{}.'.format(docs_path, anns_path, _name_mismatch(names, text_names),
+                                 _name_mismatch(text_names, names)))
+
+            refs = [_PackedPairRef(name=name, texts=texts, text_split=text_split,
+                                   annotations=annotations, ann_split=ann_split)
+                    for name in names]
+            docs = LazyDocuments(refs, cache_size=cache_size)
+            docs = docs if lazy else list(docs)
+    finally:
+        # Lazy documents map the files again on access.
+        annotations.close()
+        if texts is not None:
+            texts.close()
+
+    return docs
+
+
+class _PackedPairRef(namedtuple('_PackedPairRef', ['name', 'texts', 'text_split', 'annotations',
+                                                   'ann_split'])):
+    __slots__ = ()
+
+    def load(self) -> Document:
+        return Document(name=self.name, text=self.texts.text(self.name, split=self.text_split),
+                        annotations=self.annotations.annotations(self.name, split=self.ann_split))
+
+
+def evaluate_documents(gold_docs, pred_docs, language='nl', n_process=1):
+    return Evaluator(gold_docs, pred_docs, language=language, n_process=n_process)
 
 
-def evaluate(documents_path, gold_path, pred_path, language='nl'):
-    gold_docs = get_documents(documents_path, gold_path)
-    pred_docs = get_documents(documents_path, pred_path)
-    return evaluate_documents(gold_docs, pred_docs, language=language)
+def evaluate(documents_path, gold_path, pred_path, language='nl', lazy=False, n_process=1,
+             split=None):
+    gold_docs = get_documents(documents_path, gold_path, lazy=lazy, split=split)
+    pred_docs = get_documents(documents_path, pred_path, lazy=lazy, split=split)
+    return evaluate_documents(gold_docs, pred_docs, language=language, n_process=n_process)
 
 
 def main(args):
-    evaluator = evaluate(args.documents_path, args.gold_path, args.pred_path, args.language)
+    evaluator = evaluate(args.documents_path, args.gold_path, args.pred_path, args.language,
+                         lazy=args.lazy, n_process=args.n_process, split=args.split)
 
     print()
     print(evaluator.entity_level())
@@ -59,9 +143,15 @@ def arg_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument("language", help="Language to use for tokenizer",
                         choices=Evaluator.supported_languages())
-    parser.add_argument("documents_path", help="Path to *.txt files")
-    parser.add_argument("gold_path", help="Path to gold *.ann files")
-    parser.add_argument("pred_path", help="Path to predicted *.ann files")
+    parser.add_argument("documents_path", help="Path to *.txt files or a packed corpus file")
+    parser.add_argument("gold_path", help="Path to gold *.ann files or a packed corpus file")
+    parser.add_argument("pred_path", help="Path to predicted *.ann files or a packed corpus file")
+    parser.add_argument("--lazy", help="Load documents on access instead of keeping all in memory",
+                        action='store_true')
+    parser.add_argument("--n_process", help="Number of processes used for tokenization",
+                        type=int, default=1)
+    parser.add_argument("--split", help="Split to evaluate if a packed corpus file has several "
+                        "splits", choices=packed.SPLITS)
     return parser.parse_args()
 
 
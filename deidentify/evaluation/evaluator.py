@@ -1,16 +1,13 @@
+import hashlib
 import warnings
-from collections import namedtuple
-from typing import List
+from array import array
+from bisect import bisect_right
+from collections import Counter, OrderedDict, namedtuple
+from itertools import islice
+from typing import Iterable, List, Tuple
 
 import numpy as np
 from loguru import logger
-from sklearn.metrics import confusion_matrix
-
-try:
-    from spacy.gold import biluo_tags_from_offsets
-except ModuleNotFoundError:
-    # spacy>=3
-    from spacy.training.iob_utils import biluo_tags_from_offsets
 
 from deidentify.base import Document
 from deidentify.evaluation.metric import Metric
@@ -18,82 +15,239 @@ from deidentify.evaluation.metric import Metric
 Entity = namedtuple('Entity', ['doc_name', 'start', 'end', 'tag'])
 ENTITY_TAG = 'ENT'
 
+# Token boundaries (start and end character offsets) per language and text digest. The cache is
+# shared by all evaluators of a process: gold and predicted documents share their texts, and
+# evaluating many runs of the same corpus only tokenizes each text once.
+TOKEN_CACHE_SIZE = 100000
+_TOKEN_CACHE = OrderedDict()
+
+# Tokenizers are loaded once per language and process.
+_TOKENIZERS = {}
+
 # Silence spaCy warning regarding misaligned entity boundaries. It will show up multiple times
 # because the message changes with the input text.
 # More info on the warning: https://github.com/explosion/spaCy/issues/5727
 warnings.filterwarnings('ignore', message=r'.*W030.*')
 
 
-def flatten(lists):
-    return [e for l in lists for e in l]
+def clear_token_cache():
+    _TOKEN_CACHE.clear()
+
+
+def _text_digest(text: str) -> bytes:
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).digest()
+
+
+def _load_tokenizer(language):
+    if language not in _TOKENIZERS:
+        disable = ('tagger', 'parser', 'ner')
+        if language == 'nl':
+            from deidentify.tokenizer.tokenizer_ons import TokenizerOns
+            _TOKENIZERS[language] = TokenizerOns(disable=disable)
+        elif language == 'fr':
+            from deidentify.tokenizer.tokenizer_fr import TokenizerFR
+            _TOKENIZERS[language] = TokenizerFR(disable=disable)
+        elif language == 'de':
+            from deidentify.tokenizer.tokenizer_de import TokenizerDE
+            _TOKENIZERS[language] = TokenizerDE(disable=disable)
+        else:
+            from deidentify.tokenizer.tokenizer_en import TokenizerEN
+            _TOKENIZERS[language] = TokenizerEN(disable=disable)
+    return _TOKENIZERS[language]
 
 
 class Evaluator:
 
-    def __init__(self, gold: List[Document], predicted: List[Document], language='nl'):
+    """Entity-level and token-level evaluation of predicted annotations.
+
+    Token-level metrics require tokenization. Each distinct text is parsed with spaCy once per
+    process, after which only its token boundaries are kept (see `TOKEN_CACHE_SIZE`). The tokenizer
+    is loaded on first use, so entity-level evaluation does not load a spaCy model.
+
+    Token tags are integer-encoded and accumulated per document in a single count matrix of
+    (gold tag, predicted tag) pairs. Tag-specific and tag-blind token metrics are both derived from
+    it. Further documents can be streamed into the evaluation with `add_document(s)`.
+
+    Parameters
+    ----------
+    gold : List[Document]
+        The gold standard documents.
+    predicted : List[Document]
+        The predicted documents in the same order as `gold`.
+    language : str
+        Language of the tokenizer. One of `Evaluator.supported_languages()`.
+    n_process : int
+        Number of processes used to parse texts that are not cached yet.
+    """
+
+    def __init__(self, gold: List[Document], predicted: List[Document], language='nl',
+                 n_process=1):
         self.gold = gold
         self.predicted = predicted
+        self.n_process = n_process
 
-        self.tags = sorted(
-            list(set(ann.tag for doc in gold for ann in doc.annotations)))
+        self._gold_tags = set(ann.tag for doc in gold for ann in doc.annotations)
 
         if language not in self.supported_languages():
             logger.warning(
                 'Unknown language {} for evaluation. Fallback to "en"'.format(language))
             language = 'en'
 
-        if language == 'nl':
-            from deidentify.tokenizer.tokenizer_ons import TokenizerOns
-            self.tokenizer = TokenizerOns(disable=('tagger', 'parser', 'ner'))
-        elif language == 'fr':
-            from deidentify.tokenizer.tokenizer_fr import TokenizerFR
-            self.tokenizer = TokenizerFR(disable=('tagger', 'parser', 'ner'))
-        elif language == 'de':
-            from deidentify.tokenizer.tokenizer_de import TokenizerDE
-            self.tokenizer = TokenizerDE(disable=('tagger', 'parser', 'ner'))
-        else:
-            from deidentify.tokenizer.tokenizer_en import TokenizerEN
-            self.tokenizer = TokenizerEN(disable=('tagger', 'parser', 'ner'))
+        self.language = language
+
+        # Counts of documents added with `add_document(s)`. The documents passed to the constructor
+        # are counted on demand, so that entity-level evaluation does not require tokenization.
+        self._entity_counts = {'tp': Counter(), 'fp': Counter(), 'fn': Counter()}
+        self._tag_ids = {'O': 0}
+        self._token_counts = np.zeros((1, 1), dtype=np.int64)
+        self._pending_entities = True
+        self._pending_tokens = True
+
+    @property
+    def tags(self) -> List[str]:
+        """Sorted tags of all gold annotations."""
+        return sorted(self._gold_tags)
+
+    @property
+    def tokenizer(self):
+        return _load_tokenizer(self.language)
 
     @staticmethod
     def supported_languages():
         return ('nl', 'en', 'fr', 'de')
 
-    def entity_level(self):
-        metric = Metric('entity level')
+    def add_document(self, gold: Document, predicted: Document):
+        """Add a pair of gold and predicted document to the evaluation.
+
+        The documents are counted immediately and not retained, so a corpus can be evaluated in a
+        streaming fashion with constant memory:
+
+        ```py
+        evaluator = Evaluator(gold=[], predicted=[])
+        for gold, predicted in zip(gold_docs, pred_docs):
+            evaluator.add_document(gold, predicted)
+        evaluator.token_level()
+        ```
 
+        Both documents have to have the same text. Use `add_documents` to tokenize several texts at
+        once.
+        """
+        self.add_documents([gold], [predicted])
+
+    def add_documents(self, gold: Iterable[Document], predicted: Iterable[Document],
+                      batch_size=128):
+        """Add pairs of gold and predicted documents. See `add_document`."""
+        for gold_batch, pred_batch in self._batches(gold, predicted, batch_size):
+            self._gold_tags.update(ann.tag for doc in gold_batch for ann in doc.annotations)
+            self._count_entities(gold_batch, pred_batch)
+            self._count_tokens(gold_batch, pred_batch)
+
+    @staticmethod
+    def _batches(gold: Iterable[Document], predicted: Iterable[Document], batch_size):
+        """Iterate over pairs of gold and predicted batches without materializing the documents."""
+        gold, predicted = iter(gold), iter(predicted)
+        while True:
+            gold_batch = list(islice(gold, batch_size))
+            pred_batch = list(islice(predicted, batch_size))
+            if not gold_batch and not pred_batch:
+                return
+            if len(gold_batch) != len(pred_batch):
+                raise ValueError('Expected the same number of gold and predicted documents.')
+            yield gold_batch, pred_batch
+
+    def _count_entities(self, gold, predicted):
         entities_gold = set(Entity(doc.name, ann.start, ann.end, ann.tag)
-                            for doc in self.gold for ann in doc.annotations)
+                            for doc in gold for ann in doc.annotations)
         entities_pred = set(Entity(doc.name, ann.start, ann.end, ann.tag)
-                            for doc in self.predicted for ann in doc.annotations)
+                            for doc in predicted for ann in doc.annotations)
+
+        self._entity_counts['tp'].update(entity.tag for entity in entities_pred & entities_gold)
+        self._entity_counts['fp'].update(entity.tag for entity in entities_pred - entities_gold)
+        self._entity_counts['fn'].update(entity.tag for entity in entities_gold - entities_pred)
+
+    def _count_tokens(self, gold, predicted):
+        texts = [doc.text for doc in gold] + [doc.text for doc in predicted]
+        boundaries = self.token_boundaries(texts)
+        gold_boundaries, pred_boundaries = boundaries[:len(gold)], boundaries[len(gold):]
+
+        for gold_doc, pred_doc, gold_bounds, pred_bounds in zip(
+                gold, predicted, gold_boundaries, pred_boundaries):
+            tags_gold = self._token_tags(gold_bounds, gold_doc, tag_blind=False,
+                                         entity_tag=ENTITY_TAG)
+            tags_pred = self._token_tags(pred_bounds, pred_doc, tag_blind=False,
+                                         entity_tag=ENTITY_TAG)
+            if len(tags_gold) != len(tags_pred):
+                raise ValueError('Gold and predicted document {} have a different number of tokens.'
+                                 .format(gold_doc.name))
+            self._add_token_counts(tags_gold, tags_pred)
+
+    def _encode_tags(self, tags: List[str]) -> np.ndarray:
+        tag_ids = self._tag_ids
+        return np.fromiter((tag_ids.setdefault(tag, len(tag_ids)) for tag in tags),
+                           dtype=np.int64, count=len(tags))
+
+    def _add_token_counts(self, tags_gold: List[str], tags_pred: List[str]):
+        ids_gold = self._encode_tags(tags_gold)
+        ids_pred = self._encode_tags(tags_pred)
+
+        n_tags = len(self._tag_ids)
+        if n_tags > len(self._token_counts):
+            padding = n_tags - len(self._token_counts)
+            self._token_counts = np.pad(self._token_counts, ((0, padding), (0, padding)),
+                                        mode='constant')
+
+        counts = np.bincount(ids_gold * n_tags + ids_pred, minlength=n_tags * n_tags)
+        self._token_counts += counts.reshape(n_tags, n_tags)
+
+    def _count_pending_entities(self):
+        if self._pending_entities:
+            self._pending_entities = False
+            self._count_entities(self.gold, self.predicted)
+
+    def _count_pending_tokens(self):
+        if not self._pending_tokens:
+            return
+        self._pending_tokens = False
+
+        for gold_batch, pred_batch in self._batches(self.gold, self.predicted, batch_size=128):
+            self._count_tokens(gold_batch, pred_batch)
 
-        for pred in entities_pred:
-            if pred in entities_gold:
-                metric.add_tp(class_name=pred.tag)
-            else:
-                metric.add_fp(class_name=pred.tag)
+    def entity_level(self):
+        self._count_pending_entities()
 
-        for gold in entities_gold:
-            if gold not in entities_pred:
-                metric.add_fn(class_name=gold.tag)
-            else:
-                # true negatives are not defined in an entity-level evaluation
-                pass
+        metric = Metric('entity level')
+        for tag, count in self._entity_counts['tp'].items():
+            metric.add_tp(class_name=tag, N=count)
+        for tag, count in self._entity_counts['fp'].items():
+            metric.add_fp(class_name=tag, N=count)
+        for tag, count in self._entity_counts['fn'].items():
+            metric.add_fn(class_name=tag, N=count)
+        # true negatives are not defined in an entity-level evaluation
 
         return metric
 
+    def _confusion_matrix(self, labels: List[str]) -> np.ndarray:
+        """Token confusion matrix (gold x predicted) restricted to `labels`. Tokens where the gold
+        or predicted tag is not in `labels` are ignored, like in `sklearn.metrics.confusion_matrix`.
+        """
+        cm = np.zeros((len(labels), len(labels)), dtype=np.int64)
+        known = [(i, self._tag_ids[label]) for i, label in enumerate(labels)
+                 if label in self._tag_ids]
+        if known:
+            rows, ids = zip(*known)
+            cm[np.ix_(rows, rows)] = self._token_counts[np.ix_(ids, ids)]
+        return cm
+
     def token_level(self):
+        self._count_pending_tokens()
         metric = Metric('token level')
 
-        tags_gold = flatten(self.token_annotations(doc) for doc in self.gold)
-        tags_pred = flatten(self.token_annotations(doc)
-                            for doc in self.predicted)
-
-        cm = confusion_matrix(tags_gold, tags_pred, labels=self.tags + ['O'])
+        tags = self.tags
+        cm = self._confusion_matrix(tags + ['O'])
 
         row_sum, col_sum, cm_sum = np.sum(
             cm, axis=0), np.sum(cm, axis=1), np.sum(cm)
-        for i, tag in enumerate(self.tags):
+        for i, tag in enumerate(tags):
             tp = cm[i, i]
             fp = row_sum[i] - cm[i, i]
             fn = col_sum[i] - cm[i, i]
@@ -107,17 +261,18 @@ class Evaluator:
         return metric
 
     def token_level_blind(self):
+        self._count_pending_tokens()
         metric = Metric('token (blind)')
 
-        tags_gold = flatten(self.token_annotations(
-            doc, tag_blind=True) for doc in self.gold)
-        tags_pred = flatten(self.token_annotations(
-            doc, tag_blind=True) for doc in self.predicted)
-        # convert labels: ENT => 1, else => 0
-        tags_gold = list(map(lambda tag: int(tag == ENTITY_TAG), tags_gold))
-        tags_pred = list(map(lambda tag: int(tag == ENTITY_TAG), tags_pred))
+        # Any tag except 'O' is an entity.
+        is_entity = np.ones(len(self._tag_ids), dtype=bool)
+        is_entity[self._tag_ids['O']] = False
 
-        tn, fp, fn, tp = confusion_matrix(tags_gold, tags_pred).ravel()
+        counts = self._token_counts
+        tp = counts[is_entity][:, is_entity].sum()
+        fp = counts[~is_entity][:, is_entity].sum()
+        fn = counts[is_entity][:, ~is_entity].sum()
+        tn = counts[~is_entity][:, ~is_entity].sum()
 
         metric.add_tp(class_name=ENTITY_TAG, N=tp)
         metric.add_fp(class_name=ENTITY_TAG, N=fp)
@@ -126,29 +281,96 @@ class Evaluator:
 
         return metric
 
+    def token_boundaries(self, texts: Iterable[str]) -> List[Tuple[array, array]]:
+        """Start and end character offsets of the tokens of each text.
+
+        Texts are parsed only if they are not in the token cache. Duplicate texts are parsed once.
+        """
+        texts = list(texts)
+        keys = [(self.language, _text_digest(text)) for text in texts]
+
+        missing = OrderedDict()
+        boundaries = []
+        for key, text in zip(keys, texts):
+            cached = _TOKEN_CACHE.get(key)
+            if cached is None:
+                missing.setdefault(key, text)
+            else:
+                _TOKEN_CACHE.move_to_end(key)
+            boundaries.append(cached)
+
+        parsed = {}
+        if missing:
+            parsed_docs = self.tokenizer.parse_texts(missing.values(), n_process=self.n_process)
+            for key, parsed_doc in zip(missing.keys(), parsed_docs):
+                parsed[key] = (array('l', (token.idx for token in parsed_doc)),
+                               array('l', (token.idx + len(token) for token in parsed_doc)))
+                _TOKEN_CACHE[key] = parsed[key]
+                if len(_TOKEN_CACHE) > TOKEN_CACHE_SIZE:
+                    _TOKEN_CACHE.popitem(last=False)
+
+        return [cached if cached is not None else parsed[key]
+                for key, cached in zip(keys, boundaries)]
+
+    def documents_token_annotations(self, docs, tag_blind=False, entity_tag=ENTITY_TAG):
+        """Batched version of `token_annotations`."""
+        docs = list(docs)
+        boundaries = self.token_boundaries([doc.text for doc in docs])
+        return [self._token_tags(doc_boundaries, doc, tag_blind=tag_blind, entity_tag=entity_tag)
+                for doc, doc_boundaries in zip(docs, boundaries)]
+
     def token_annotations(self, doc, tag_blind=False, entity_tag=ENTITY_TAG):
-        parsed = self.tokenizer.parse_text(doc.text)
-        entities = [(int(ann.start), int(ann.end), ann.tag)
-                    for ann in doc.annotations]
-        biluo_tags = biluo_tags_from_offsets(parsed, entities)
-
-        tags = []
-        for tag in biluo_tags:
-            if tag == "O":
-                tags.append('O')
-            elif tag == '-':
-                # Returned by spacy if token boundaries mismatch entity boundaries.
-                # These errors are ignored.
-                #
-                # https://spacy.io/api/goldparse#biluo_tags_from_offsets
-                tags.append('O')
+        boundaries = self.token_boundaries([doc.text])[0]
+        return self._token_tags(boundaries, doc, tag_blind=tag_blind, entity_tag=entity_tag)
+
+    @staticmethod
+    def _token_tags(boundaries, doc, tag_blind, entity_tag):
+        """Tag of each token. Tokens that are part of an entity, but do not align with the entity
+        boundaries, are tagged 'O'.
+
+        This is equivalent to the BILUO tags of `spacy.gold.biluo_tags_from_offsets` without the
+        prefixes, and raises a `ValueError` for overlapping entities as well.
+        """
+        token_starts, token_ends = boundaries
+        entities = sorted((int(ann.start), int(ann.end), ann.tag)
+                          for ann in doc.annotations)
+
+        start_index = {start: i for i, start in enumerate(token_starts)}
+        end_index = {end: i for i, end in enumerate(token_ends)}
+
+        tags = ['-'] * len(token_starts)
+        entity_starts, entity_ends = [], []
+        for start, end, tag in entities:
+            if start >= end:
+                continue
+
+            if entity_ends and start < entity_ends[-1]:
+                raise ValueError('Overlapping entities ({}, {}) and ({}, {}, {}) in document {}'
+                                 .format(entity_starts[-1], entity_ends[-1], start, end, tag,
+                                         doc.name))
+            entity_starts.append(start)
+            entity_ends.append(end)
+
+            first, last = start_index.get(start), end_index.get(end)
+            if first is not None and last is not None:
+                tag = entity_tag if tag_blind else tag
+                for i in range(first, last + 1):
+                    tags[i] = tag
+
+        for i, (token_start, token_end) in enumerate(zip(token_starts, token_ends)):
+            if tags[i] != '-':
+                continue
+
+            # Last entity starting before the end of the token
+            j = bisect_right(entity_starts, token_end - 1) - 1
+            if j < 0 or entity_ends[j] <= token_start:
+                tags[i] = 'O'
+            else:
+                # Token boundaries mismatch entity boundaries. These errors are ignored.
+                tags[i] = 'O'
                 warnings.warn(
                     'Some entities could not be aligned in the text. Use `spacy.training.iob_utils.biluo_tags_from_offsets(nlp.make_doc(text), entities)` to check the alignment.',
                     UserWarning
                 )
-            elif tag_blind:
-                tags.append(entity_tag)
-            else:
-                tags.append(tag[2:])
 
         return tags
@@ -1,15 +1,17 @@
 import argparse
 import csv
+import multiprocessing
 import os
 from os.path import dirname, join
-from typing import List
+from typing import List, Optional
 
+import numpy as np
 import yaml
 from loguru import logger
 
 from deidentify.base import Document
-from deidentify.evaluation import evaluate_run, evaluator
-from deidentify.evaluation.art import ApproximateRandomizationTest
+from deidentify.evaluation import evaluate_run
+from deidentify.evaluation.art import ApproximateRandomizationTest, CountMetric
 
 
 def _load_yaml(yaml_file):
@@ -18,28 +20,95 @@ def _load_yaml(yaml_file):
     return config
 
 
-def micro_f1(gold: List[Document], predicted: List[Document]):
-    return evaluator.Evaluator(gold, predicted).entity_level().f_score()
+def entity_counts(gold: List[Document], predicted: List[Document]) -> np.ndarray:
+    """Entity-level TP, FP and FN counts per document pair. Returns an array of shape (n_docs, 3).
 
+    Entities match if their start, end and tag are identical. The column sums equal the micro counts
+    of `Evaluator.entity_level()` for documents with unique names.
+    """
+    counts = np.zeros((len(gold), 3), dtype=np.int64)
+    for i, (gold_doc, pred_doc) in enumerate(zip(gold, predicted)):
+        entities_gold = set((ann.start, ann.end, ann.tag) for ann in gold_doc.annotations)
+        entities_pred = set((ann.start, ann.end, ann.tag) for ann in pred_doc.annotations)
+        tp = len(entities_gold & entities_pred)
+        counts[i] = tp, len(entities_pred) - tp, len(entities_gold) - tp
+    return counts
 
-def micro_precision(gold: List[Document], predicted: List[Document]):
-    return evaluator.Evaluator(gold, predicted).entity_level().precision()
 
+# Python's round() is correctly rounded, np.round() is not. Use the former to match `Metric`
+# exactly.
+_round = np.vectorize(lambda value: round(value, 4), otypes=[float])
 
-def micro_recall(gold: List[Document], predicted: List[Document]):
-    return evaluator.Evaluator(gold, predicted).entity_level().recall()
+
+def _ratio(numerator, denominator):
+    # Rounded like `Metric`, 0.0 if the denominator is 0.
+    numerator, denominator = np.asarray(numerator, dtype=float), np.asarray(denominator)
+    ratio = np.divide(numerator, denominator, out=np.zeros_like(numerator),
+                      where=denominator > 0)
+    return _round(ratio)
+
+
+def _precision(counts):
+    return _ratio(counts[..., 0], counts[..., 0] + counts[..., 1])
+
+
+def _recall(counts):
+    return _ratio(counts[..., 0], counts[..., 0] + counts[..., 2])
+
+
+def _f1(counts):
+    precision, recall = _precision(counts), _recall(counts)
+    return _ratio(2 * precision * recall, precision + recall)
+
+
+micro_f1 = CountMetric('micro_f1', entity_counts, _f1)
+micro_precision = CountMetric('micro_precision', entity_counts, _precision)
+micro_recall = CountMetric('micro_recall', entity_counts, _recall)
+
+# Documents and metrics of a report. Set once per worker process by `_init_worker` (or in the main
+# process if the report runs sequentially), so that jobs only carry run ids and indices.
+_WORKER_STATE = None
+
+
+def _init_worker(gold, predictions, metrics, trials):
+    global _WORKER_STATE  # pylint: disable=global-statement
+    _WORKER_STATE = dict(gold=gold, predictions=predictions, metrics=metrics, trials=trials)
+
+
+def _run_job(job):
+    run_a, run_b, metric_index, seed = job
+    metric = _WORKER_STATE['metrics'][metric_index]
+
+    np.random.seed(seed)
+    art = ApproximateRandomizationTest(_WORKER_STATE['gold'],
+                                       _WORKER_STATE['predictions'][run_a],
+                                       _WORKER_STATE['predictions'][run_b],
+                                       metric,
+                                       trials=_WORKER_STATE['trials'])
+    return run_a, run_b, metric.__name__, art.run()
 
 
 class SignificanceReport:
+    """Approximate randomization tests of all (run pair, metric) combinations of a corpus part.
 
-    def __init__(self, title, corpus, part, runs, metrics, trials=10000):
+    The predictions of each run are loaded once. The tests are distributed over a pool of `n_jobs`
+    worker processes and written to `significance.csv` as they finish, so the order of the rows may
+    vary. Each test is seeded from `seed` and its position in the job list, so the p-values do not
+    depend on `n_jobs` or on scheduling.
+    """
+
+    def __init__(self, title, corpus, part, runs, metrics, trials=10000, n_jobs=1,
+                 seed: Optional[int] = 42, out_dir: Optional[str] = None):
         self.title = title
         self.corpus = corpus
         self.part = part
         self.runs = runs
         self.trials = trials
         self.metrics = metrics
-        out_dir = join(dirname(__file__), '../../output/evaluation', corpus)
+        self.n_jobs = n_jobs
+        self.seed = seed
+        if out_dir is None:
+            out_dir = join(dirname(__file__), '../../output/evaluation', corpus)
         self.out_file = join(out_dir, 'significance.csv')
         os.makedirs(out_dir, exist_ok=True)
 
@@ -49,10 +118,15 @@ class SignificanceReport:
     def _predictions_path(self, run_id):
         return join(dirname(__file__), '../../output/predictions', self.corpus, run_id, self.part)
 
-    def art_test(self, gold, run_a, run_b, metric):
-        art = ApproximateRandomizationTest(gold, run_a, run_b, metric,
-                                           trials=self.trials)
-        return art.run()
+    def _jobs(self):
+        pairs = [(pair['run_a'], pair['run_b']) for pair in self.runs]
+        seeds = np.random.SeedSequence(self.seed).generate_state(len(pairs) * len(self.metrics))
+
+        jobs = []
+        for run_a, run_b in pairs:
+            for metric_index in range(len(self.metrics)):
+                jobs.append((run_a, run_b, metric_index, int(seeds[len(jobs)])))
+        return jobs
 
     def make_report(self):
         logger.info('Generate significance report {}'.format(self.title))
@@ -61,27 +135,44 @@ class SignificanceReport:
         docs_path = self._corpus_path()
         gold_documents = evaluate_run.get_documents(docs_path=docs_path, anns_path=docs_path)
 
+        run_ids = list(dict.fromkeys(run_id for pair in self.runs
+                                     for run_id in (pair['run_a'], pair['run_b'])))
+        predictions = {}
+        for run_id in run_ids:
+            predictions[run_id] = evaluate_run.get_documents(
+                docs_path=docs_path, anns_path=self._predictions_path(run_id))
+
+        jobs = self._jobs()
+        initargs = (gold_documents, predictions, self.metrics, self.trials)
+
         with open(self.out_file, 'w') as file:
             writer = csv.writer(file)
             writer.writerow(['run_a', 'run_b', 'metric', 'p_value'])
 
-            for pair in self.runs:
-                pred_docs_run_a = evaluate_run.get_documents(
-                    docs_path=docs_path, anns_path=self._predictions_path(pair['run_a']))
-                pred_docs_run_b = evaluate_run.get_documents(
-                    docs_path=docs_path, anns_path=self._predictions_path(pair['run_b']))
+            def write_result(result):
+                writer.writerow(result)
+                file.flush()
+                logger.info('{} - {} - {} - {}'.format(*result))
+
+            if self.n_jobs == 1:
+                _init_worker(*initargs)
+                for job in jobs:
+                    write_result(_run_job(job))
+                return
 
-                for metric in self.metrics:
-                    p_value = self.art_test(gold_documents, pred_docs_run_a, pred_docs_run_b,
-                                            metric)
-                    writer.writerow([pair['run_a'], pair['run_b'], metric.__name__, p_value])
-                    logger.info('{} - {} - {}'.format(pair, metric.__name__, p_value))
+            logger.info('Run {} tests with {} workers'.format(len(jobs), self.n_jobs))
+            with multiprocessing.Pool(processes=self.n_jobs, initializer=_init_worker,
+                                      initargs=initargs) as pool:
+                for result in pool.imap_unordered(_run_job, jobs):
+                    write_result(result)
 
 
 def arg_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument("config_file", help="Significance test config file (.yaml)")
     parser.add_argument("--trials", help="Run identifier", default=10000, type=int)
+    parser.add_argument("--n_jobs", help="Number of worker processes", default=1, type=int)
+    parser.add_argument("--seed", help="Random seed of the tests", default=42, type=int)
     return parser.parse_args()
 
 
@@ -99,7 +190,9 @@ if __name__ == '__main__':
             micro_precision,
             micro_recall
         ],
-        trials=ARGS.trials
+        trials=ARGS.trials,
+        n_jobs=ARGS.n_jobs,
+        seed=ARGS.seed
     )
 
     report.make_report()
@@ -3,13 +3,14 @@ the flair Corpus format. Methods operate on the sentence level and integrate wit
 """
 import sys
 from functools import reduce
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from flair.data import Corpus, Sentence, Token
 from torch.nn.modules.module import _addindent
 
 from deidentify.base import Document
-from deidentify.methods.tagging_utils import ParsedDoc, sents_to_standoff, standoff_to_sents
+from deidentify.methods.tagging_utils import SentenceDocs, sents_to_standoff, standoff_to_sents
+from deidentify.profiling import NULL_PROFILER, Profiler
 from deidentify.tokenizer import Tokenizer
 
 
@@ -53,29 +54,34 @@ class FilteredCorpus(Corpus):
 
 def standoff_to_flair_sents(docs: List[Document],
                             tokenizer: Tokenizer,
-                            verbose=False) -> Tuple[List[Sentence], List[ParsedDoc]]:
-    sents, parsed_docs = standoff_to_sents(docs=docs, tokenizer=tokenizer, verbose=verbose)
-
-    flair_sents = []
-    for sent in sents:
-        flair_sent = Sentence()
-        for token in sent:
-            if token.text.isspace():
-                # spaCy preserves consecutive whitespaces, while flair ignores them.
-                # This would make a round-trip standoff -> token -> standoff impossible.
-                # To accommodate whitespace tokens with flair, we add a special token.
-                tok = Token('<SPACE>')
-            else:
-                tok = Token(token.text)
-            tok.add_tag(tag_type='ner', tag_value=token.label)
-            flair_sent.add_token(tok)
-        flair_sents.append(flair_sent)
+                            verbose=False,
+                            profiler: Profiler = NULL_PROFILER
+                            ) -> Tuple[List[Sentence], SentenceDocs]:
+    sents, parsed_docs = standoff_to_sents(docs=docs, tokenizer=tokenizer, verbose=verbose,
+                                           profiler=profiler)
+
+    with profiler.stage('flair_sentences'):
+        flair_sents = []
+        for sent in sents:
+            flair_sent = Sentence()
+            for text, label in zip(sent.column('text'), sent.column('label')):
+                if text.isspace():
+                    # spaCy preserves consecutive whitespaces, while flair ignores them.
+                    # This would make a round-trip standoff -> token -> standoff impossible.
+                    # To accommodate whitespace tokens with flair, we add a special token.
+                    tok = Token('<SPACE>')
+                else:
+                    tok = Token(text)
+                tok.add_tag(tag_type='ner', tag_value=label)
+                flair_sent.add_token(tok)
+            flair_sents.append(flair_sent)
 
     return flair_sents, parsed_docs
 
 
 def flair_sents_to_standoff(tagged_flair_sentences: List[Sentence],
-                            docs: List[ParsedDoc]) -> List[Document]:
+                            docs: SentenceDocs,
+                            profiler: Profiler = NULL_PROFILER) -> List[Document]:
 
     sentence_tags = []
     for sent in tagged_flair_sentences:
@@ -85,7 +91,58 @@ def flair_sents_to_standoff(tagged_flair_sentences: List[Sentence],
             token.get_tag('ner').value if token.text != '<SPACE>' else 'O' for token in sent
         ])
 
-    return sents_to_standoff(sentence_tags, docs)
+    return sents_to_standoff(sentence_tags, docs, profiler=profiler)
+
+
+def length_bucketed_batches(sents: List[Sentence],
+                            mini_batch_size: Optional[int] = 256,
+                            max_tokens_per_batch: Optional[int] = None) -> List[List[Sentence]]:
+    """Group sentences of similar length into prediction batches.
+
+    Sentences are sorted by length (longest first) and then cut into batches. A batch is closed
+    once it holds `mini_batch_size` sentences or once its padded size (number of sentences times
+    the length of its longest sentence) would exceed `max_tokens_per_batch`. A sentence that is
+    longer than the budget forms a batch of its own.
+
+    The sentences are not copied, so tags that a model assigns to the sentences of a batch are
+    visible through the original `sents` list in the original order.
+
+    Parameters
+    ----------
+    sents : List[Sentence]
+        The sentences to batch.
+    mini_batch_size : int, optional
+        Maximum number of sentences per batch. `None` means no limit.
+    max_tokens_per_batch : int, optional
+        Maximum number of padded tokens per batch. `None` means no limit.
+
+    Returns
+    -------
+    List[List[Sentence]]
+        The batches.
+    """
+    if mini_batch_size is None and max_tokens_per_batch is None:
+        raise ValueError('Set at least one of mini_batch_size or max_tokens_per_batch.')
+
+    sorted_sents = sorted(sents, key=len, reverse=True)
+
+    batches = []
+    batch = []
+    for sent in sorted_sents:
+        # The first sentence in a batch is the longest one and determines the padded length.
+        padded_len = len(batch[0]) if batch else len(sent)
+        full = mini_batch_size is not None and len(batch) >= mini_batch_size
+        over_budget = max_tokens_per_batch is not None \
+            and (len(batch) + 1) * padded_len > max_tokens_per_batch
+
+        if batch and (full or over_budget):
+            batches.append(batch)
+            batch = []
+        batch.append(sent)
+
+    if batch:
+        batches.append(batch)
+    return batches
 
 
 def model_summary(model, file=sys.stderr):
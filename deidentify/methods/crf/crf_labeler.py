@@ -11,13 +11,16 @@ https://python-crfsuite.readthedocs.io/en/latest/pycrfsuite.html#pycrfsuite.Item
 
 import re
 import string
-from typing import Callable, Dict, List, Tuple
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
 
+import pycrfsuite
 import sklearn_crfsuite
 from tqdm import tqdm
 from unidecode import unidecode
 
-from deidentify.methods.tagging_utils import Token
+from deidentify.methods.tagging_utils import Token, sentence_column
+from deidentify.profiling import NULL_PROFILER, Profiler
 
 NEWLINE_REGEX = re.compile(r'\n')
 SPACE_REGEX = re.compile(r'\s')
@@ -47,6 +50,10 @@ def sent2features(sent: List[Token],
         List of feature dicts per token. `len(sent_features) == len(sent)`
 
     """
+    if feature_extractor in SENTENCE_FEATURE_EXTRACTOR:
+        # Fast path that produces identical, already escaped features for the whole sentence.
+        return SENTENCE_FEATURE_EXTRACTOR[feature_extractor](sent)
+
     sent_features = []
 
     for i in range(len(sent)):
@@ -66,7 +73,7 @@ def sent2features(sent: List[Token],
 
 
 def sent2labels(sent):
-    return [token.label for token in sent]
+    return sentence_column(sent, 'label')
 
 
 def sents_to_features_and_labels(sents, feature_extractor):
@@ -75,6 +82,60 @@ def sents_to_features_and_labels(sents, feature_extractor):
     return X, y
 
 
+def predict_sents(crf: sklearn_crfsuite.CRF,
+                  sents: List[List[Token]],
+                  feature_extractor: Callable[[List[Token], int], Dict],
+                  ignore_sentence: Optional[Callable[[List[Token]], bool]] = None,
+                  verbose=False,
+                  profiler: Profiler = NULL_PROFILER) -> List[List[str]]:
+    """Tag sentences with the `pycrfsuite.Tagger` of a trained CRF.
+
+    Features of each sentence are passed to the tagger as `pycrfsuite.ItemSequence`, bypassing the
+    per-sentence conversion of sklearn_crfsuite. The tagger is opened once by `crf.tagger_` and
+    reused for all sentences.
+
+    Parameters
+    ----------
+    crf : sklearn_crfsuite.CRF
+        A trained CRF model.
+    sents : List[List[Token]]
+        The sentences to tag.
+    feature_extractor : Callable[[List[Token], int], Dict]
+        The feature extractor the model was trained with.
+    ignore_sentence : Callable[[List[Token]], bool], optional
+        Token-level sentence filter. Ignored sentences are not featurized and all their tokens are
+        labeled with `crf.ignored_label` (or 'O' if the model does not define it).
+    profiler : Profiler
+        Records the stages 'feature_extraction' and 'inference'.
+
+    Returns
+    -------
+    y_pred : List[List[str]]
+        Predicted label sequence for each sentence.
+    """
+    tagger = crf.tagger_
+    ignored_label = getattr(crf, 'ignored_label', 'O')
+
+    with profiler.stage('feature_extraction'):
+        xseqs = []
+        for sent in sents:
+            if ignore_sentence is not None and ignore_sentence(sent):
+                xseqs.append(None)
+            else:
+                xseqs.append(pycrfsuite.ItemSequence(sent2features(sent, feature_extractor)))
+
+    with profiler.stage('inference'):
+        y_pred = []
+        for sent, xseq in tqdm(zip(sents, xseqs), total=len(sents), disable=not verbose,
+                               desc='Tag sentences'):
+            if xseq is None:
+                y_pred.append([ignored_label] * len(sent))
+            else:
+                y_pred.append(tagger.tag(xseq))
+
+    return y_pred
+
+
 class SentenceFilterCRF(sklearn_crfsuite.CRF):
     """Custom CRF implementation that allows to ignore entire sentences during training/prediction
     time. A default label will be assigned to all tokens within that sentence.
@@ -291,6 +352,127 @@ def liu_feature_extractor(sent, i):
     return features
 
 
+@lru_cache(maxsize=2 ** 17)
+def _escape(value: str) -> str:
+    """Replace whitespace in a feature value in the same way as `sent2features`."""
+    value = NEWLINE_REGEX.sub('#NEWLINE', value)
+    return SPACE_REGEX.sub('#SPACE', value)
+
+
+@lru_cache(maxsize=2 ** 17)
+def _liu_token_features(text: str) -> Tuple[Tuple[str, object], ...]:
+    """Features of `liu_feature_extractor` that only depend on the token text.
+
+    The result is memoized per unique token string. Values are escaped already.
+    """
+    text_lower = text.lower()
+
+    features = []
+    for j in range(1, 6):
+        features.append(('suffix[-{}:]'.format(j), _escape(text_lower[-j:])))
+        features.append(('prefix[:{}]'.format(j), _escape(text_lower[:j])))
+
+    features.append(('word.isupper()', text.isupper()))
+    features.append(('word.istitle()', text.istitle()))
+    features.append(('word.isdigit()', text.isdigit()))
+    features.append(('word.contains_digit', any(c.isdigit() for c in text)))
+    features.append(('word.has_upper_inside', any(c.isupper() for c in text[1:])))
+    features.append(('word.has_punct_inside', any(c in string.punctuation for c in text[1:])))
+    features.append(('word.has_digit_inside', any(c.isdigit() for c in text[1:])))
+    features.append(('word.is_ascii', all(ord(c) < 128 for c in text)))
+    return tuple(features)
+
+
+@lru_cache(maxsize=2 ** 17)
+def _shape_features(text: str) -> Tuple[str, str]:
+    shape = word_shape(text)
+    return _escape(shape), _escape(collapse_word_shape(shape))
+
+
+_BOW_NAMES = [
+    ['bow[-2:2].uni.{}'.format(j) for j in range(5)],
+    ['bow[-2:2].bi.{}'.format(j) for j in range(4)],
+    ['bow[-2:2].tri.{}'.format(j) for j in range(3)],
+]
+_POS_NAMES = [
+    ['pos[-2:2].uni.{}'.format(j) for j in range(5)],
+    ['pos[-2:2].bi.{}'.format(j) for j in range(4)],
+    ['pos[-2:2].tri.{}'.format(j) for j in range(3)],
+]
+
+
+def _padded_ngrams(values: List[str], pad: str) -> Tuple[List[str], List[str], List[str]]:
+    """Uni-, bi- and trigrams of `values` padded with two `pad` items on both sides."""
+    uni = [pad, pad] + values + [pad, pad]
+    bi = [a + '|' + b for a, b in zip(uni, uni[1:])]
+    tri = [a + '|' + b for a, b in zip(bi, uni[2:])]
+    return uni, bi, tri
+
+
+def _add_window_features(features, names, grams, i):
+    for group_names, group_grams in zip(names, grams):
+        for j, name in enumerate(group_names):
+            features[name] = group_grams[i + j]
+
+
+def liu_sent_features(sent: List[Token]) -> List[Dict]:
+    """Sentence-level implementation of `liu_feature_extractor`.
+
+    Produces the same features (including the whitespace escaping of `sent2features`) as calling
+    `liu_feature_extractor` for every token, but token-intrinsic features are memoized per unique
+    token string and n-gram features are built once per sentence. Token attributes are read
+    column-wise, so a `SentenceView` is featurized without creating `Token` objects.
+    """
+    texts = sentence_column(sent, 'text')
+    ner_tags = sentence_column(sent, 'ner_tag')
+    words = [_escape(text.lower()) for text in texts]
+    pos_tags = [_escape(pos_tag) for pos_tag in sentence_column(sent, 'pos_tag')]
+
+    bow_grams = _padded_ngrams(words, pad='<pad>')
+    pos_grams = _padded_ngrams(pos_tags, pad='<PAD>')
+    pos_padded = pos_grams[0]
+
+    sent_len = len(texts)
+    end_mark = texts[-1].strip() in ['!', '?', '.'] if texts else False
+    unmatched_bracket = _has_unmatched_bracket(texts)
+
+    sent_features = []
+    for i, text in enumerate(texts):
+        features = {}
+        _add_window_features(features, _BOW_NAMES, bow_grams, i)
+        _add_window_features(features, _POS_NAMES, pos_grams, i)
+
+        word = words[i]
+        p_prev, p_cur, p_next = pos_padded[i + 1], pos_padded[i + 2], pos_padded[i + 3]
+        features['bowpos.w0p-1'] = word + '|' + p_prev
+        features['bowpos.w0p0'] = word + '|' + p_cur
+        features['bowpos.w0p1'] = word + '|' + p_next
+        features['bowpos.w0p-1p0'] = word + '|' + p_prev + '|' + p_cur
+        features['bowpos.w0p0p1'] = word + '|' + p_cur + '|' + p_next
+        features['bowpos.w0p-1p1'] = word + '|' + p_prev + '|' + p_next
+        features['bowpos.w0p-1p0p1'] = word + '|' + p_prev + '|' + p_cur + '|' + p_next
+
+        features['sent.len(sent)'] = sent_len
+        features['sent.end_mark'] = end_mark
+        features['sent.has_unmatched_bracket'] = unmatched_bracket
+
+        features.update(_liu_token_features(text))
+        ner_tag = ner_tags[i]
+        features['word.ner_tag'] = _escape(ner_tag) if isinstance(ner_tag, str) else ner_tag
+        features['word.pos_tag'] = p_cur
+        features['shape.long'], features['shape.short'] = _shape_features(text)
+
+        sent_features.append(features)
+
+    return sent_features
+
+
+# Feature extractors with a faster sentence-level implementation. Used by `sent2features`.
+SENTENCE_FEATURE_EXTRACTOR = {
+    liu_feature_extractor: liu_sent_features
+}
+
+
 def join_features(feature_list):
     return '|'.join(feature_list)
 
@@ -340,12 +522,16 @@ def _ngram_feature_group(tokens, N, group_name, sep=join_features):
 
 
 def has_unmatched_bracket(sent):
+    return _has_unmatched_bracket(token.text for token in sent)
+
+
+def _has_unmatched_bracket(texts):
     n_open = 0
 
-    for token in sent:
-        if token.text == '(':
+    for text in texts:
+        if text == '(':
             n_open += 1
-        elif token.text == ')':
+        elif text == ')':
             n_open -= 1
 
     return n_open > 0
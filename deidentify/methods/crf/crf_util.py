@@ -19,6 +19,12 @@ def meta_sentence_filter_liu(sent):
     return sent[0]['prefix[:3]'].startswith('===')
 
 
+def meta_sentence_filter_tokens(sent):
+    """Token-level equivalent of the feature-based meta sentence filters. It allows to skip meta
+    sentences before they are featurized."""
+    return bool(sent) and sent[0].text.startswith('===')
+
+
 FEATURE_EXTRACTOR = {
     'sklearn_crfsuite': (crf_labeler.sklearn_crfsuite_feature_extractor,
                          meta_sentence_filter_sklearn_crfsuite),
@@ -28,12 +28,14 @@ def main(args, model_dir):
     dev_sents, _ = tagging_utils.standoff_to_sents(corpus.dev, tokenizer, verbose=True)
     test_sents, test_docs = tagging_utils.standoff_to_sents(corpus.test, tokenizer, verbose=True)
 
-    train_sents = train_sents + dev_sents
+    train_sents = list(train_sents) + list(dev_sents)
     train_sents_filtered = list(filter(_is_not_meta_sentence, train_sents))
 
     sample_size = int(len(train_sents_filtered) * args.train_sample_frac)
     rs = RandomState(seed=args.random_seed)
-    train_sents_sample = rs.choice(train_sents_filtered, replace=False, size=sample_size).tolist()
+    # Sample indices, so numpy does not try to convert the sentences into an array.
+    sample = rs.choice(len(train_sents_filtered), replace=False, size=sample_size)
+    train_sents_sample = [train_sents_filtered[i] for i in sample]
     logger.info('Train with fraction of training data: {} sents out of {} sentences ({}%)',
                 sample_size, len(train_sents_filtered), args.train_sample_frac)
 
@@ -7,11 +7,30 @@ from deidentify.base import Annotation
 ANNOTATION_REGEX = re.compile(r'<([A-Z]+) (.*)>')
 
 
+def lower_preserving_offsets(text):
+    """Lower-case `text` without changing its length.
+
+    Characters whose lower-case form has a different length (e.g., 'İ') are kept as is, so that
+    offsets in the lowered text are valid offsets in the original text.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+
 class DeduceAnnotator:
 
     def __init__(self, text):
         self.text = text
         self.annotated_text = deduce.annotate_text(self.text)
+        self._lowered_text = None
+
+    @property
+    def lowered_text(self):
+        if self._lowered_text is None:
+            self._lowered_text = lower_preserving_offsets(self.text)
+        return self._lowered_text
 
     @staticmethod
     def annotation_content(annotation):
@@ -59,6 +78,7 @@ class DeduceAnnotator:
         # into account when computing the character positions in the original text.
         original_text_pointer = 0
         ann_id = 0
+        lowered_text = self.lowered_text
 
         for part in text_parts:
             if self.is_annotation(part):
@@ -74,7 +94,11 @@ class DeduceAnnotator:
                     #
                     # Casing is ignored as deduce sometimes changes the original text.
                     # Example: deduce.annotate_text('UMCU') -> "<INSTELLING umcu>"
-                    idx_match = self.text[original_text_pointer:].lower().index(ann_text.lower())
+                    #
+                    # The text is lowered once and searched from the pointer onwards, so the
+                    # remaining text is not copied for every annotation.
+                    start_idx = lowered_text.index(lower_preserving_offsets(ann_text),
+                                                   original_text_pointer)
                 except ValueError:
                     # Sometimes, Deduce changes the original annotation text. Example:
                     # gemeld door <PERSOON Jan van Jansen>
@@ -84,7 +108,6 @@ class DeduceAnnotator:
                     original_text_pointer += len(ann_text)
                     continue
 
-                start_idx = idx_match + original_text_pointer
                 end_idx = start_idx + len(ann_text)
                 original_text_pointer = end_idx
 
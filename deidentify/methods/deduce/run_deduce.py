@@ -1,6 +1,9 @@
 import argparse
+import multiprocessing
+import multiprocessing.pool
 import re
-from typing import List
+from functools import partial
+from typing import List, Optional
 
 import deduce
 from loguru import logger
@@ -60,29 +63,63 @@ def rewrite_annotations(text, annotations):
     return rewritten
 
 
-def predict(documents: List[Document], corpus_name='ons', verbose=False) -> List[Document]:
-    predictions = []
+def predict_document(doc: Document, corpus_name='ons') -> Document:
+    annotator = DeduceAnnotator(doc.text)
+    annotations = annotator.annotations()
+    if corpus_name.startswith('ons'):
+        annotations = rewrite_annotations(doc.text, annotations)
 
-    for doc in tqdm(documents, disable=not verbose, desc='Tag documents'):
-        annotator = DeduceAnnotator(doc.text)
-        annotations = annotator.annotations()
-        if corpus_name.startswith('ons'):
-            annotations = rewrite_annotations(doc.text, annotations)
+    return Document(name=doc.name, text=doc.text, annotations=annotations)
 
-        new_doc = Document(name=doc.name, text=doc.text, annotations=annotations)
-        predictions.append(new_doc)
 
-    return predictions
+def predict(documents: List[Document], corpus_name='ons', verbose=False, n_jobs=1,
+            chunk_size=16, pool: Optional[multiprocessing.pool.Pool] = None) -> List[Document]:
+    """Annotate documents with Deduce.
+
+    Parameters
+    ----------
+    documents : List[Document]
+        The documents to annotate.
+    corpus_name : str
+        If the name starts with 'ons', the annotations are rewritten to the 'ons' guidelines (see
+        `rewrite_annotations`).
+    verbose : bool
+        Show a progress bar.
+    n_jobs : int
+        Number of worker processes. Deduce's lookup lists are loaded once per worker.
+    chunk_size : int
+        Number of documents that are sent to a worker at once.
+    pool : multiprocessing.pool.Pool, optional
+        Worker pool to reuse across calls. If given, `n_jobs` is ignored. Otherwise, a pool with
+        `n_jobs` workers is started and shut down within this call.
+
+    Returns
+    -------
+    List[Document]
+        The annotated documents in input order.
+    """
+    predict_doc = partial(predict_document, corpus_name=corpus_name)
+    progress = partial(tqdm, total=len(documents), disable=not verbose, desc='Tag documents')
+
+    if (pool is None and n_jobs == 1) or len(documents) <= chunk_size:
+        return list(progress(map(predict_doc, documents)))
+
+    if pool is not None:
+        return list(progress(pool.imap(predict_doc, documents, chunksize=chunk_size)))
+
+    with multiprocessing.Pool(processes=n_jobs) as own_pool:
+        return list(progress(own_pool.imap(predict_doc, documents, chunksize=chunk_size)))
 
 
 def main(args):
     corpus = CorpusLoader().load_corpus(CORPUS_PATH[args.corpus])
     logger.info('Loaded corpus: {}'.format(corpus))
     logger.info('Make predictions...')
+    predict_part = partial(predict, corpus_name=corpus.name, verbose=True, n_jobs=args.n_jobs)
     train_utils.save_predictions(corpus_name=corpus.name, run_id='deduce_' + args.run_id,
-                                train=predict(corpus.train, corpus_name=corpus.name, verbose=True),
-                                dev=predict(corpus.dev, corpus_name=corpus.name, verbose=True),
-                                test=predict(corpus.test, corpus_name=corpus.name, verbose=True))
+                                train=predict_part(corpus.train),
+                                dev=predict_part(corpus.dev),
+                                test=predict_part(corpus.test))
     logger.info('Done.')
 
 
@@ -90,6 +127,7 @@ def arg_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument("corpus", choices=CORPUS_PATH.keys(), help="Corpus identifier.")
     parser.add_argument("run_id", help="Run Identifier")
+    parser.add_argument("--n_jobs", help="Number of worker processes", default=1, type=int)
     return parser.parse_args()
 
 
@@ -1,25 +1,200 @@
 """Utility methods to convert between standoff and BIO format.
 """
+import sys
 import warnings
-from collections import defaultdict, namedtuple
-from typing import List, Tuple
+from array import array
+from collections import namedtuple
+from collections.abc import Sequence
+from itertools import chain
+from typing import Dict, List, Tuple
 
 import spacy
 from loguru import logger
 
 try:
-    from spacy.gold import biluo_tags_from_offsets, offsets_from_biluo_tags
+    from spacy.gold import biluo_tags_from_offsets
 except ModuleNotFoundError:
     # spacy>=3
-    from spacy.training.iob_utils import biluo_tags_from_offsets, offsets_from_biluo_tags
+    from spacy.training.iob_utils import biluo_tags_from_offsets
 
 from tqdm import tqdm
 
 from deidentify.base import Annotation, Document
+from deidentify.profiling import NULL_PROFILER, Profiler
 from deidentify.tokenizer import Tokenizer
 
 Token = namedtuple('Token', ['text', 'pos_tag', 'label', 'ner_tag'])
-ParsedDoc = namedtuple('ParsedDoc', ['spacy_doc', 'name', 'text'])
+# Character offsets of all tokens are kept as compact int arrays, so the spaCy doc can be released
+# directly after tokenization.
+ParsedDoc = namedtuple('ParsedDoc', ['name', 'text', 'token_starts', 'token_ends'])
+
+
+class SentenceView(Sequence):
+    """A sentence of a `SentenceBatch`.
+
+    Tokens are materialized as `Token` tuples on access only. Use `column` to read a single token
+    attribute of the whole sentence without creating `Token` objects.
+    """
+
+    __slots__ = ('batch', 'start', 'end')
+
+    def __init__(self, batch: 'SentenceBatch', start: int, end: int):
+        self.batch = batch
+        self.start = start
+        self.end = end
+
+    def column(self, name: str) -> List:
+        """Values of the token attribute `name` (one of `Token._fields`) in this sentence."""
+        return self.batch.column(name, self.start, self.end)
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.batch.token(k) for k in range(self.start, self.end)[i]]
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('token index out of range')
+        return self.batch.token(self.start + i)
+
+    def __repr__(self):
+        return 'SentenceView({})'.format(' '.join(self.column('text')))
+
+
+class SentenceBatch(Sequence):
+    """Columnar storage of BIO tagged sentences.
+
+    Token texts are kept in a flat list of interned strings, while POS tags, NER tags and labels
+    are interned and stored as ids in int arrays. Sentences are contiguous ranges of tokens given
+    by `sent_starts`. Indexing returns a `SentenceView`, which behaves like a list of `Token`.
+    """
+
+    _ID_COLUMNS = {'pos_tag': 'pos_ids', 'label': 'label_ids', 'ner_tag': 'ner_ids'}
+
+    def __init__(self):
+        self.strings = []
+        self._string_ids = {}  # type: Dict[str, int]
+
+        self.texts = []
+        self.pos_ids = array('l')
+        self.label_ids = array('l')
+        self.ner_ids = array('l')
+        self.sent_starts = array('l')
+
+    def intern(self, value: str) -> int:
+        """Id of `value` in `strings`. Unknown values are added."""
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self._string_ids[value] = string_id
+            self.strings.append(value)
+        return string_id
+
+    def add_tokens(self, texts: List[str], pos_tags: List[str], labels: List[str],
+                   ner_tags: List[str]):
+        """Append tokens to the last sentence. Use `start_sentence` to begin a new sentence."""
+        intern = self.intern
+        self.texts.extend(sys.intern(text) for text in texts)
+        self.pos_ids.extend(intern(tag) for tag in pos_tags)
+        self.label_ids.extend(intern(label) for label in labels)
+        self.ner_ids.extend(intern(tag) for tag in ner_tags)
+
+    def start_sentence(self, token_index: int):
+        """Begin a new sentence at flat token position `token_index`."""
+        self.sent_starts.append(token_index)
+
+    @property
+    def n_tokens(self) -> int:
+        return len(self.texts)
+
+    def sentence_end(self, i: int) -> int:
+        return self.sent_starts[i + 1] if i + 1 < len(self.sent_starts) else len(self.texts)
+
+    def column(self, name: str, start: int = 0, end: int = None) -> List:
+        """Values of the token attribute `name` for the flat token range `[start, end)`."""
+        if name == 'text':
+            return self.texts[start:end]
+
+        strings = self.strings
+        ids = getattr(self, self._ID_COLUMNS[name])
+        return [strings[string_id] for string_id in ids[start:end]]
+
+    def token(self, k: int) -> Token:
+        """The token at flat position `k`."""
+        strings = self.strings
+        return Token(text=self.texts[k],
+                     pos_tag=strings[self.pos_ids[k]],
+                     label=strings[self.label_ids[k]],
+                     ner_tag=strings[self.ner_ids[k]])
+
+    def __len__(self):
+        return len(self.sent_starts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(len(self))[i]]
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('sentence index out of range')
+        return SentenceView(self, self.sent_starts[i], self.sentence_end(i))
+
+    def __repr__(self):
+        return 'SentenceBatch(n_sents={}, n_tokens={})'.format(len(self), self.n_tokens)
+
+
+def sentence_column(sent, name: str) -> List:
+    """Values of the token attribute `name` for a `SentenceView` or a list of `Token`."""
+    if isinstance(sent, SentenceView):
+        return sent.column(name)
+    return [getattr(token, name) for token in sent]
+
+
+class SentenceDocs(Sequence):
+    """Maps BIO tagged sentences to the documents they originate from.
+
+    Each input document is stored once in `docs`. Per sentence, only the index of its document and
+    the index of its first token within that document are kept. Indexing returns the `ParsedDoc` of
+    a sentence, so `sents_docs[i]` behaves like a list with one document per sentence.
+
+    Parameters
+    ----------
+    docs : List[ParsedDoc]
+        One parsed document per input document (including documents without sentences).
+    doc_indices : Sequence[int]
+        Index into `docs` for each sentence.
+    token_offsets : Sequence[int]
+        Index of the first token of each sentence within its spaCy document.
+    """
+
+    def __init__(self, docs: List[ParsedDoc], doc_indices=(), token_offsets=()):
+        if len(doc_indices) != len(token_offsets):
+            raise ValueError('Expected one token offset per sentence, got {} and {}'.format(
+                len(doc_indices), len(token_offsets)))
+
+        self.docs = docs
+        self.doc_indices = array('l', doc_indices)
+        self.token_offsets = array('l', token_offsets)
+
+    def append(self, doc_index: int, token_offset: int):
+        """Register a new sentence of document `docs[doc_index]`."""
+        self.doc_indices.append(doc_index)
+        self.token_offsets.append(token_offset)
+
+    def __len__(self):
+        return len(self.doc_indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.docs[doc_index] for doc_index in self.doc_indices[i]]
+        return self.docs[self.doc_indices[i]]
+
+    def __repr__(self):
+        return 'SentenceDocs(n_docs={}, n_sents={})'.format(len(self.docs), len(self))
 
 # Silence spaCy warning regarding misaligned entity boundaries. It will show up multiple times
 # because the message changes with the input text.
@@ -29,7 +204,11 @@ warnings.filterwarnings('ignore', message=r'.*W030.*')
 
 def standoff_to_sents(docs: List[Document],
                       tokenizer: Tokenizer,
-                      verbose=False) -> Tuple[List[List[Token]], List[ParsedDoc]]:
+                      verbose=False,
+                      batch_size=128,
+                      n_process=1,
+                      profiler: Profiler = NULL_PROFILER
+                      ) -> Tuple[SentenceBatch, SentenceDocs]:
     """Convert corpus into list of BIO tagged sentences.
 
     Each document is parsed using the spaCy tokenizer and segmented into sentences. Afterwards, each
@@ -41,49 +220,78 @@ def standoff_to_sents(docs: List[Document],
         The corpus documents.
     tokenizer : Tokenizer
         A tokenizer instance that parsed the documents using spaCy.
+    batch_size : int
+        Number of documents that are passed to the spaCy pipeline at once.
+    n_process : int
+        Number of processes used by the spaCy pipeline.
+    profiler : Profiler
+        Records the stages 'spacy_parsing', 'doc_to_bio' and 'bio_sentences'.
 
     Returns
     -------
-    sents : List[List[Token]]
-        List of sentences, where each sentence is a list of BIO tagged tokens.
-    sents_docs : List[ParsedDoc]
-        The parsed documents where the sentence originates from.
+    sents : SentenceBatch
+        The sentences, where each sentence behaves like a list of BIO tagged tokens.
+    sents_docs : SentenceDocs
+        The parsed documents where the sentences originate from.
     """
-    sents = []
-    sents_docs = []
-
-    for doc in tqdm(docs, disable=not verbose, desc='Tokenize documents'):
-        parsed_doc = tokenizer.parse_text(doc.text)
-
-        bio_tags = _doc_to_bio(parsed_doc, doc.annotations)
-
-        for sent in parsed_doc.sents:
-            sent_tokens = [Token(text=token.text,
-                                 pos_tag=token.pos_,
-                                 label=bio_tags[token.i],
-                                 ner_tag=token.ent_type_)
-                           for token in sent]
-
-            # merge sentences where entities cross sentence boundaries
-            if sent_tokens[0].label.startswith('I-') or sent_tokens[0].label.startswith('L-'):
-                sents[-1].extend(sent_tokens)
-            else:
-                sents.append(sent_tokens)
-                sents_docs.append(ParsedDoc(spacy_doc=parsed_doc, name=doc.name, text=doc.text))
+    sents = SentenceBatch()
+    sents_docs = SentenceDocs(docs=[])
+
+    parsed_docs = tokenizer.parse_texts((doc.text for doc in docs),
+                                        batch_size=batch_size,
+                                        n_process=n_process)
+    parsed_docs = zip(docs, profiler.timed_iter('spacy_parsing', parsed_docs))
+
+    for doc_index, (doc, parsed_doc) in enumerate(tqdm(parsed_docs, total=len(docs),
+                                                       disable=not verbose,
+                                                       desc='Tokenize documents')):
+        sents_docs.docs.append(ParsedDoc(
+            name=doc.name,
+            text=doc.text,
+            token_starts=array('l', (token.idx for token in parsed_doc)),
+            token_ends=array('l', (token.idx + len(token) for token in parsed_doc))
+        ))
 
+        with profiler.stage('doc_to_bio'):
+            bio_tags = _doc_to_bio(parsed_doc, doc.annotations)
+
+        with profiler.stage('bio_sentences'):
+            offset = sents.n_tokens
+            sents.add_tokens(texts=[token.text for token in parsed_doc],
+                             pos_tags=[token.pos_ for token in parsed_doc],
+                             labels=bio_tags,
+                             ner_tags=[token.ent_type_ for token in parsed_doc])
+
+            for sent in parsed_doc.sents:
+                # merge sentences where entities cross sentence boundaries
+                first_label = bio_tags[sent.start]
+                if sents and sents_docs.doc_indices[-1] == doc_index \
+                        and (first_label.startswith('I-') or first_label.startswith('L-')):
+                    continue
+
+                sents.start_sentence(offset + sent.start)
+                sents_docs.append(doc_index, sent.start)
+        profiler.count('tokens', len(parsed_doc))
+
+    profiler.count('documents', len(docs))
+    profiler.count('sentences', len(sents))
     _validate_labels(sents_docs, sents)
     return sents, sents_docs
 
 
-def sents_to_standoff(sentence_tags: List[List[str]], docs: List[ParsedDoc]) -> List[Document]:
+def sents_to_standoff(sentence_tags: List[List[str]], docs: SentenceDocs,
+                      profiler: Profiler = NULL_PROFILER) -> List[Document]:
     """Convert a BIO tagged documents to standoff annotated documents.
 
     Parameters
     ----------
     sentence_tags : List[List[str]]
         List of sentences of BIO tagged tokens.
-    docs : List[ParsedDoc]
-        The documents corresponding to each sentence.
+    docs : SentenceDocs
+        The documents corresponding to each sentence as returned by `standoff_to_sents`. One
+        document is returned per input document, in input order.
+    profiler : Profiler
+        Records the stages 'group_sentences' and 'bio_to_standoff'.
 
     Returns
     -------
@@ -91,15 +299,18 @@ def sents_to_standoff(sentence_tags: List[List[str]], docs: List[ParsedDoc]) ->
         The documents with annotated entities in standoff format.
 
     """
-    tags_by_doc = _group_sentences(sentence_tags, docs)
+    with profiler.stage('group_sentences'):
+        tags_by_doc = _group_sentences(sentence_tags, docs)
 
     annotated_docs = []
     for doc, tags in tags_by_doc:
         try:
+            with profiler.stage('bio_to_standoff'):
+                annotations = _bio_to_standoff(tags, doc)
             annotated_docs.append(Document(
                 name=doc.name,
                 text=doc.text,
-                annotations=_bio_to_standoff(tags, doc.spacy_doc)
+                annotations=annotations
             ))
         except Exception as e:
             logger.warning('Could not convert document to standoff {}\n tags = {}\n{}'
@@ -115,16 +326,18 @@ def sents_to_standoff(sentence_tags: List[List[str]], docs: List[ParsedDoc]) ->
 
 
 def _group_sentences(sentence_tags: List[List[str]],
-                     docs: List[ParsedDoc]) -> List[Tuple[ParsedDoc, List[str]]]:
+                     docs: SentenceDocs) -> List[Tuple[ParsedDoc, List[str]]]:
     """Group BIO tagged sentences by document (i.e., merge list of sentences to a single list per
     document).
 
-    This function is used to convert sentence level BIO annotations to standoff format.
+    This function is used to convert sentence level BIO annotations to standoff format. Sentences
+    are assigned to documents by their document index, so runtime is linear in the number of tags
+    and documents with identical name and text are kept apart.
 
     Example:
     ```
     sentence_tags = [['B', 'I', 'O'], ['O', 'O'], ['O', 'O']]
-    docs = [d1, d1, d2]
+    docs = SentenceDocs(docs=[d1, d2], doc_indices=[0, 0, 1], token_offsets=[0, 3, 0])
 
     _group_sentences(sentence_tags, docs)
     -> [['B', 'I', 'O', 'O', 'O'], ['O', 'O']]
@@ -135,20 +348,20 @@ def _group_sentences(sentence_tags: List[List[str]],
     ----------
     sentence_tags : List[List[str]]
         List of sentences. Each sentence contains a list of BIO tags.
-    docs : List[ParsedDoc]
-        List of documents corresponding to the sentences.
+    docs : SentenceDocs
+        The documents corresponding to the sentences.
 
     Returns
     -------
     grouped_sentences : List[Tuple(ParsedDoc, List[str])]
-        The sentences grouped by document.
+        The sentences grouped by document. Documents without sentences have an empty tag list.
 
     """
-    grouped = defaultdict(list)
-    for doc, sentence in zip(docs, sentence_tags):
-        grouped[doc].extend(sentence)
+    grouped = [[] for _ in docs.docs]
+    for doc_index, sentence in zip(docs.doc_indices, sentence_tags):
+        grouped[doc_index].extend(sentence)
 
-    return list(zip(grouped.keys(), grouped.values()))
+    return list(zip(docs.docs, grouped))
 
 
 def _end_of_chunk(next_tag: str) -> bool:
@@ -177,17 +390,19 @@ def _bio_to_biluo(bio_tags: List[str]) -> List[str]:
     return biluo_tags
 
 
-def _bio_to_standoff(bio_tags: List[str], spacy_doc: spacy.tokens.Doc) -> List[Annotation]:
+def _bio_to_standoff(bio_tags: List[str], doc: ParsedDoc) -> List[Annotation]:
     """Convert BIO tagged document to annotations in standoff format.
 
-    The original spaCy document is used to recreate correct entity offsets.
+    Entities are decoded in a single pass over the tags. The token offsets of the parsed document
+    are used to recreate correct entity offsets. Dangling 'I' tags (i.e., without a preceding 'B' or
+    'I' tag of the same type) start a new entity, equivalent to `fix_dangling_entities`.
 
     Parameters
     ----------
     bio_tags : List[str]
-        A BIO tagged sentence. `len(bio_tags) == len(spacy_doc)` has to hold.
-    spacy_doc : spacy.tokens.Doc
-        The spaCy doc corresponding to the BIO tags.
+        A BIO tagged document. `len(bio_tags) == len(doc.token_starts)` has to hold.
+    doc : ParsedDoc
+        The parsed document corresponding to the BIO tags.
 
     Returns
     -------
@@ -195,19 +410,31 @@ def _bio_to_standoff(bio_tags: List[str], spacy_doc: spacy.tokens.Doc) -> List[A
         The standoff annotations.
 
     """
-    bio_tags = fix_dangling_entities(bio_tags)
-    biluo_tags = _bio_to_biluo(bio_tags)
-    offsets = offsets_from_biluo_tags(spacy_doc, biluo_tags)
+    if len(bio_tags) != len(doc.token_starts):
+        raise ValueError('Expected {} tags, got {}'.format(len(doc.token_starts), len(bio_tags)))
 
     annotations = []
-    for i, offset in enumerate(offsets):
-        annotations.append(Annotation(
-            text=spacy_doc.char_span(offset[0], offset[1]).text,
-            start=offset[0],
-            end=offset[1],
-            tag=offset[2],
-            ann_id='T{}'.format(i),
-        ))
+    starts, ends, text = doc.token_starts, doc.token_ends, doc.text
+    entity_tag, entity_start, entity_end = None, 0, 0
+
+    # A trailing 'O' closes an entity that ends with the last token.
+    for i, tag in enumerate(chain(bio_tags, ['O'])):
+        if entity_tag is not None and tag.startswith('I-') and tag[2:] == entity_tag:
+            entity_end = ends[i]
+            continue
+
+        if entity_tag is not None:
+            annotations.append(Annotation(
+                text=text[entity_start:entity_end],
+                start=entity_start,
+                end=entity_end,
+                tag=entity_tag,
+                ann_id='T{}'.format(len(annotations)),
+            ))
+            entity_tag = None
+
+        if tag.startswith('B-') or tag.startswith('I-'):
+            entity_tag, entity_start, entity_end = tag[2:], starts[i], ends[i]
 
     return annotations
 
@@ -241,7 +468,7 @@ def _doc_to_bio(parsed_doc: spacy.tokens.Doc, annotations: List[Annotation]):
     return tags
 
 
-def _validate_labels(docs: List[ParsedDoc], sents: List[List[Token]]):
+def _validate_labels(docs: SentenceDocs, sents: SentenceBatch):
     """Perform sanity checks on BIO tagged sentences.
 
     * A sentence has to start with either a 'B' or 'O' token.
@@ -250,11 +477,12 @@ def _validate_labels(docs: List[ParsedDoc], sents: List[List[Token]]):
 
     """
     for doc, sent in zip(docs, sents):
+        labels = sentence_column(sent, 'label')
         try:
-            assert sent[0].label == 'O' or sent[0].label.startswith('B-')
-            for i, token in enumerate(sent[1:]):
-                if token.label.startswith('I-'):
-                    assert sent[i].label.startswith('B-') or sent[i].label.startswith('I-')
+            assert labels[0] == 'O' or labels[0].startswith('B-')
+            for i, label in enumerate(labels[1:]):
+                if label.startswith('I-'):
+                    assert labels[i].startswith('B-') or labels[i].startswith('I-')
         except:
             logger.warning('Invalid tagging {}, sent={}'.format(doc.name, sent))
 
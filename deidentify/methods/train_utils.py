@@ -8,6 +8,7 @@ from loguru import logger
 
 from deidentify.base import Document
 from deidentify.dataset import brat
+from deidentify.dataset import packed as packed_format
 
 PREDICTIONS_PATH = join(dirname(__file__), '../../output/predictions')
 
@@ -41,7 +42,11 @@ def _save_predictions(path, documents: List[Document]):
 def save_predictions(corpus_name, run_id,
                      train: List[Document] = None,
                      test: List[Document] = None,
-                     dev: List[Document] = None):
+                     dev: List[Document] = None,
+                     packed: bool = False):
+    """Write predicted annotations of each part as brat .ann files to `{part}/`, or, if
+    `packed=True`, the predicted documents to a single packed corpus file `{part}.pack`.
+    """
 
     for part_name, part_docs in zip(['train', 'test', 'dev'], [train, test, dev]):
         if not part_docs:
@@ -50,4 +55,9 @@ def save_predictions(corpus_name, run_id,
         logger.info('Write {}.{}.{} predictions (N = {})'.format(corpus_name, run_id, part_name,
                                                                  len(part_docs)))
         base_path = model_dir(corpus_name, run_id)
-        _save_predictions(join(base_path, part_name), part_docs)
+        if packed:
+            os.makedirs(base_path, exist_ok=True)
+            packed_format.write_packed_documents(
+                join(base_path, part_name + packed_format.PACKED_SUFFIX), part_docs)
+        else:
+            _save_predictions(join(base_path, part_name), part_docs)
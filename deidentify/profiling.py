@@ -0,0 +1,161 @@
+"""Lightweight instrumentation of pipeline stages.
+
+A `Profiler` records the wall-clock time spent in named stages (e.g., spaCy parsing, feature
+extraction, inference) together with counters (documents, sentences, tokens). Optionally, the stages
+are captured with `cProfile`.
+
+Taggers use the disabled `NULL_PROFILER` by default, whose stages are shared no-op context managers,
+so instrumentation has negligible overhead unless it is enabled:
+
+```py
+profiler = tagger.enable_profiling()
+tagger.annotate(documents)
+profiler.log()
+```
+"""
+import cProfile
+import io
+import pstats
+from collections import OrderedDict, namedtuple
+from time import perf_counter
+from typing import Iterable, Iterator
+
+from loguru import logger
+
+StageStats = namedtuple('StageStats', ['name', 'calls', 'total_seconds'])
+ProfilerStats = namedtuple('ProfilerStats', ['stages', 'counts'])
+
+
+class _NullStage:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.profiler._enter()  # pylint: disable=protected-access
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.add_time(self.name, perf_counter() - self.start)
+        self.profiler._exit()  # pylint: disable=protected-access
+        return False
+
+
+class Profiler:
+    """Records durations per stage and arbitrary counters.
+
+    Parameters
+    ----------
+    enabled : bool
+        If False, all methods are no-ops.
+    cprofile : bool
+        Capture all stages with `cProfile`. See `cprofile_stats`.
+    """
+
+    def __init__(self, enabled: bool = True, cprofile: bool = False):
+        self.enabled = enabled
+        self.cprofile = cprofile
+        self._profile = cProfile.Profile() if enabled and cprofile else None
+        self._depth = 0
+        self.reset()
+
+    def reset(self):
+        """Remove all recorded measurements."""
+        self._calls = OrderedDict()
+        self._seconds = OrderedDict()
+        self._counts = OrderedDict()
+
+    def stage(self, name: str):
+        """Context manager that times the enclosed block as stage `name`."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def timed_iter(self, name: str, iterable: Iterable) -> Iterator:
+        """Wrap an iterable so that the time spent producing each item is attributed to `name`.
+
+        This is useful for lazy producers such as `nlp.pipe`.
+        """
+        if not self.enabled:
+            return iter(iterable)
+        return self._timed_iter(name, iterable)
+
+    def _timed_iter(self, name, iterable):
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def add_time(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        self._calls[name] = self._calls.get(name, 0) + 1
+        self._seconds[name] = self._seconds.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1):
+        """Increase counter `name` (e.g., 'documents', 'sentences' or 'tokens') by `n`."""
+        if not self.enabled:
+            return
+        self._counts[name] = self._counts.get(name, 0) + n
+
+    def _enter(self):
+        if self._profile is not None and self._depth == 0:
+            self._profile.enable()
+        self._depth += 1
+
+    def _exit(self):
+        self._depth -= 1
+        if self._profile is not None and self._depth == 0:
+            self._profile.disable()
+
+    @property
+    def stats(self) -> ProfilerStats:
+        """Snapshot of the recorded stages (in order of first occurrence) and counters."""
+        stages = [StageStats(name=name, calls=calls, total_seconds=self._seconds[name])
+                  for name, calls in self._calls.items()]
+        return ProfilerStats(stages=stages, counts=dict(self._counts))
+
+    def cprofile_stats(self) -> pstats.Stats:
+        """The `cProfile` capture of all stages. Only available if `cprofile=True`."""
+        if self._profile is None:
+            raise ValueError('cProfile capture is not enabled. Use Profiler(cprofile=True).')
+        return pstats.Stats(self._profile, stream=io.StringIO())
+
+    def summary(self) -> str:
+        stats = self.stats
+        total = sum(stage.total_seconds for stage in stats.stages) or 1.0
+
+        lines = ['{:<24} {:>8} {:>12} {:>7}'.format('stage', 'calls', 'seconds', '%')]
+        for stage in stats.stages:
+            lines.append('{:<24} {:>8} {:>12.4f} {:>6.1f}%'.format(
+                stage.name, stage.calls, stage.total_seconds, 100 * stage.total_seconds / total))
+        for name, value in stats.counts.items():
+            lines.append('{:<24} {:>8}'.format(name, value))
+        return '\n'.join(lines)
+
+    def log(self, level: str = 'INFO'):
+        """Log a summary table of all stages and counters."""
+        if self.enabled:
+            logger.log(level, 'Profile:\n{}', self.summary())
+
+
+NULL_PROFILER = Profiler(enabled=False)
@@ -2,7 +2,8 @@ from collections import defaultdict
 
 from loguru import logger
 
-from deidentify.surrogates.generators import GeneratorFactory, IdentityGenerator, RandomData
+from deidentify.surrogates.generators import (DateFormatCache, GeneratorFactory,
+                                              IdentityGenerator, RandomData)
 
 
 class Document:
@@ -60,11 +61,35 @@ class Document:
 
 
 class DatasetDeidentifier:
-
-    def __init__(self, random_data=None):
+    """Generate surrogates for all annotations of a dataset.
+
+    Parameters
+    ----------
+    random_data : RandomData
+        Source of randomness. Defaults to `RandomData(seed=45)`.
+    date_format_cache : DateFormatCache
+        Cache of inferred date formats that is shared by all documents. A new cache is created by
+        default. Pass a preloaded cache (see `DateFormatCache.load`) to reuse formats across runs.
+    corpus_level : bool
+        If False (default), each document gets its own `GeneratorFactory` (with new character
+        mappings for names and initials) and surrogates are only consistent within a document. If
+        True, one factory with shared lookup tables is used for the whole dataset, so equal
+        annotations get equal surrogates in all documents.
+    """
+
+    def __init__(self, random_data=None, date_format_cache=None, corpus_level=False):
         if not random_data:
             random_data = RandomData(seed=45)
         self.random_data = random_data
+        self.corpus_level = corpus_level
+
+        if date_format_cache is None:
+            date_format_cache = DateFormatCache()
+        self.date_format_cache = date_format_cache
+
+    def _generator_factory(self):
+        return GeneratorFactory(self.random_data, date_format_cache=self.date_format_cache,
+                                shared_caches=self.corpus_level)
 
     def generate_surrogates(self, documents):
         tag_choices = defaultdict(set)
@@ -72,8 +97,10 @@ class DatasetDeidentifier:
             for tag in doc.tags:
                 tag_choices[tag].update(doc.annotations_text(tag))
 
+        generator_factory = None
         for doc in documents:
-            generator_factory = GeneratorFactory(self.random_data)
+            if generator_factory is None or not self.corpus_level:
+                generator_factory = self._generator_factory()
 
             for tag in doc.tags:
                 annotations_text = doc.annotations_text(tag)
@@ -10,6 +10,7 @@ from loguru import logger
 from deidentify.dataset.brat import load_brat_document
 from deidentify.surrogates.dataset_deidentifier import (DatasetDeidentifier,
                                                         Document)
+from deidentify.surrogates.generators import DateFormatCache
 
 
 def _load_docs(dataset_path):
@@ -28,10 +29,24 @@ def main(args):
     docs = _load_docs(args.dataset_path)
     logger.info('Found {} documents.', len(docs))
 
+    date_format_cache_file = getattr(args, 'date_format_cache', None)
+    date_format_cache = None
+    if date_format_cache_file and exists(date_format_cache_file):
+        date_format_cache = DateFormatCache.load(date_format_cache_file)
+        logger.info('Loaded {} date formats from {}', len(date_format_cache),
+                    date_format_cache_file)
+
     logger.info('Start surrogate generation...')
-    dataset_deidentifier = DatasetDeidentifier()
+    dataset_deidentifier = DatasetDeidentifier(date_format_cache=date_format_cache,
+                                               corpus_level=getattr(args, 'corpus_level', False))
     docs = dataset_deidentifier.generate_surrogates(docs)
 
+    date_format_cache = dataset_deidentifier.date_format_cache
+    logger.info('Date format cache: {} hits, {} misses', date_format_cache.hits,
+                date_format_cache.misses)
+    if date_format_cache_file:
+        date_format_cache.save(date_format_cache_file)
+
     logger.info('Export results...')
     with open(args.output_file, mode='w') as result_file:
         csv_writer = csv.writer(result_file,
@@ -65,6 +80,12 @@ def arg_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument("dataset_path", help="Path to brat dataset.")
     parser.add_argument("output_file", help="Full path to output CSV file.")
+    parser.add_argument("--date_format_cache",
+                        help="JSON file with inferred date formats. Loaded at startup if it exists "
+                        "and updated at the end.")
+    parser.add_argument("--corpus_level", action='store_true',
+                        help="Keep surrogates consistent across the whole dataset instead of only "
+                        "within a document.")
     return parser.parse_args()
 
 
@@ -1,9 +1,10 @@
+from collections import defaultdict
 from functools import partial
 
 from .base import RandomData, SurrogateGenerator, IdentityGenerator
 from .identifier import IDSurrogates
 from .phone import DIAL_CODES, DIAL_CODES_BY_LENGTH, PhoneFaxSurrogates
-from .date import DateSurrogates, Date
+from .date import DateSurrogates, Date, DateFormatCache
 from .age import AgeSurrogates
 from .name import NameSurrogates, InitialsSurrogates
 from .email import EmailSurrogates
@@ -15,9 +16,23 @@ from .name import random_char_mapping
 
 
 class GeneratorFactory:
+    """Creates the surrogate generator for a tag.
 
-    def __init__(self, random_data):
+    Parameters
+    ----------
+    random_data : RandomData
+        The random operations provider shared by all generators.
+    date_format_cache : DateFormatCache
+        Cache of inferred date formats passed to `DateSurrogates`.
+    shared_caches : bool
+        If True, all generators of a tag share their lookup tables (see `SurrogateGenerator`), so
+        that an annotation is replaced with the same surrogate by every generator of this factory.
+        If False, each generator starts with empty lookup tables.
+    """
+
+    def __init__(self, random_data, date_format_cache=None, shared_caches=False):
         self.random_data = random_data
+        self.caches = defaultdict(dict) if shared_caches else None
 
         self.firstname_char_mapping = random_char_mapping(random_data)
         self.lastname_char_mapping = random_char_mapping(random_data)
@@ -26,20 +41,29 @@ class GeneratorFactory:
             'Name': partial(NameSurrogates,
                             random_data=random_data,
                             firstname_char_mapping=self.firstname_char_mapping,
-                            lastname_char_mapping=self.lastname_char_mapping),
+                            lastname_char_mapping=self.lastname_char_mapping,
+                            cache=self._cache('Name')),
             'Initials': partial(InitialsSurrogates,
                                 char_mapping=self.firstname_char_mapping),
-            'Address': partial(LocationSurrogates, random_data=random_data),
-            'Age': partial(AgeSurrogates, random_data=random_data),
-            'Date': partial(DateSurrogates, random_data=random_data),
-            'Phone_fax': partial(PhoneFaxSurrogates, random_data=random_data),
-            'Email': partial(EmailSurrogates, random_data=random_data),
-            'URL_IP': partial(URLSurrogates, random_data=random_data),
-            'SSN': partial(IDSurrogates, random_data=random_data),
-            'ID': partial(IDSurrogates, random_data=random_data),
+            'Address': partial(LocationSurrogates, random_data=random_data,
+                               cache=self._cache('Address')),
+            'Age': partial(AgeSurrogates, random_data=random_data, cache=self._cache('Age')),
+            'Date': partial(DateSurrogates, random_data=random_data,
+                            format_cache=date_format_cache),
+            'Phone_fax': partial(PhoneFaxSurrogates, random_data=random_data,
+                                 cache=self._cache('Phone_fax')),
+            'Email': partial(EmailSurrogates, random_data=random_data, cache=self._cache('Email')),
+            'URL_IP': partial(URLSurrogates, random_data=random_data, cache=self._cache('URL_IP')),
+            'SSN': partial(IDSurrogates, random_data=random_data, cache=self._cache('SSN')),
+            'ID': partial(IDSurrogates, random_data=random_data, cache=self._cache('ID')),
             'Other': IdentityGenerator
         }
 
+    def _cache(self, tag):
+        if self.caches is None:
+            return None
+        return self.caches[tag]
+
     def generator_for_tag(self, tag):
         return self._factory.get(tag, None)
 
@@ -36,13 +36,33 @@ class RandomData:
 
 
 class SurrogateGenerator(ABC):
-
-    def __init__(self, annotations, random_data=None):
+    """Base class of surrogate generators.
+
+    Parameters
+    ----------
+    annotations : List[str]
+        The annotation texts to replace.
+    random_data : RandomData
+        The random operations provider.
+    cache : dict
+        Lookup tables of generated surrogates. By default, each call of `replace_all` starts with
+        empty tables. Pass the same dict to the generators of several documents to replace equal
+        annotations with equal surrogates across documents.
+    """
+
+    def __init__(self, annotations, random_data=None, cache=None):
         self.annotations = annotations
 
         if not random_data:
             random_data = RandomData()
         self.random_data = random_data
+        self.cache = cache
+
+    def lookup_table(self, name):
+        """The lookup table `name` of `cache`, or a new table if there is no cache."""
+        if self.cache is None:
+            return {}
+        return self.cache.setdefault(name, {})
 
     @abstractmethod
     def replace_all(self):
@@ -52,7 +72,7 @@ class SurrogateGenerator(ABC):
 class ExactMatchGenerator(SurrogateGenerator, ABC):
 
     def replace_all(self):
-        cache = {}
+        cache = self.lookup_table('annotations')
         replaced = []
 
         for ann in self.annotations:
@@ -1,13 +1,15 @@
-import datetime
-import locale
+import json
 import re
-from datetime import datetime
+from collections import OrderedDict
 
-import pydateinfer as dateinfer
 from dateutil.relativedelta import relativedelta
 from loguru import logger
 
 from .base import SurrogateGenerator
+from .date_locale import date_shape, format_date, infer_date_format, parse_date
+
+DATE_LOCALES = ('nl_NL.UTF-8', 'en_US.UTF-8', 'de_DE.UTF-8')
+DATE_FORMAT_CACHE_SIZE = 100000
 
 # A date format can consist of all possible formatting directives and punctuation
 DATE_FORMAT = re.compile(
@@ -29,8 +31,7 @@ class Date:
         self.date_string = date_string
         self.format = date_format
         self.locale = date_locale
-        locale.setlocale(locale.LC_ALL, self.locale)
-        self.datetime = datetime.strptime(date_string, self.format)
+        self.datetime = parse_date(date_string, self.format, self.locale)
 
         if not self.day_anchored():
             self.datetime = self.datetime.replace(day=15)
@@ -92,15 +93,98 @@ class NullDate(Date):
         return (300, 300)
 
 
-def infer_format(date_string, locales=('nl_NL.UTF-8', 'en_US.UTF-8', 'de_DE.UTF-8')):
+def _infer_format_locale(date_string, locales):
+    # The format and locale of the first locale that fully parses `date_string`, None otherwise.
     for locale_name in locales:
-        locale.setlocale(locale.LC_ALL, locale_name)
-        date_format = dateinfer.infer([date_string])
+        date_format = infer_date_format(date_string, locale_name)
 
         if fully_parsed(date_format):
-            return Date(date_string, date_format, locale_name)
-
-    raise ValueError('Could parse date "{}" with given locales "{}"'.format(date_string, locales))
+            return date_format, locale_name
+
+    return None
+
+
+def infer_format(date_string, locales=DATE_LOCALES):
+    format_locale = _infer_format_locale(date_string, locales)
+    if format_locale is None:
+        raise ValueError('Could parse date "{}" with given locales "{}"'.format(date_string,
+                                                                                locales))
+    return Date(date_string, *format_locale)
+
+
+class DateFormatCache:
+    """Least-recently-used cache of inferred date formats.
+
+    The inferred format only depends on the shape of a date string (see `date_locale.date_shape`),
+    and corpora contain few distinct shapes. The cache maps each shape to the format and locale that
+    `infer_format` infers for it, or to None if no locale parses it. It can be shared by all
+    documents of a dataset and saved to (or loaded from) a JSON file:
+
+    ```py
+    cache = DateFormatCache.load('date-formats.json')
+    date = cache.infer_format('3 maart 2019')
+    cache.save('date-formats.json')
+    ```
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of shapes to keep.
+    locales : Tuple[str]
+        Locales to try in order (see `infer_format`).
+    """
+
+    def __init__(self, max_size=DATE_FORMAT_CACHE_SIZE, locales=DATE_LOCALES):
+        if max_size < 1:
+            raise ValueError('max_size has to be positive, got {}'.format(max_size))
+
+        self.max_size = max_size
+        self.locales = tuple(locales)
+        self.hits = 0
+        self.misses = 0
+        self._formats = OrderedDict()
+
+    def __len__(self):
+        return len(self._formats)
+
+    def _put(self, shape, format_locale):
+        self._formats[shape] = format_locale
+        if len(self._formats) > self.max_size:
+            self._formats.popitem(last=False)
+
+    def infer_format(self, date_string) -> Date:
+        """Like `infer_format(date_string, self.locales)`, but inferring each shape only once."""
+        shape = date_shape(date_string)
+
+        if shape in self._formats:
+            self.hits += 1
+            self._formats.move_to_end(shape)
+            format_locale = self._formats[shape]
+        else:
+            self.misses += 1
+            format_locale = _infer_format_locale(date_string, self.locales)
+            self._put(shape, format_locale)
+
+        if format_locale is None:
+            raise ValueError('Could parse date "{}" with given locales "{}"'.format(
+                date_string, self.locales))
+        return Date(date_string, *format_locale)
+
+    def save(self, path):
+        entries = [[list(shape), format_locale] for shape, format_locale in self._formats.items()]
+        with open(path, 'w') as file:
+            json.dump({'locales': list(self.locales), 'formats': entries}, file,
+                      ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, max_size=DATE_FORMAT_CACHE_SIZE):
+        with open(path) as file:
+            data = json.load(file)
+
+        cache = cls(max_size=max_size, locales=data['locales'])
+        for shape, format_locale in data['formats']:
+            cache._put(tuple(shape), tuple(format_locale) if format_locale else None)
+        return cache
 
 
 def max_date(dates):
@@ -117,8 +201,7 @@ def year_span(date_a, date_b):
 
 def shift_date(date, delta):
     new_datetime = date.datetime + delta
-    locale.setlocale(locale.LC_ALL, date.locale)
-    date_string = new_datetime.strftime(date.format)
+    date_string = format_date(new_datetime, date.format, date.locale)
     shifted_date = Date(date_string, date_format=date.format, date_locale=date.locale)
     return shifted_date
 
@@ -151,10 +234,11 @@ def minimum_season_offsets(dates):
 
 class DateSurrogates(SurrogateGenerator):
 
-    def __init__(self, annotations, year_shift_base=65, year_shift_fuzz=20, random_data=None):
+    def __init__(self, annotations, year_shift_base=65, year_shift_fuzz=20, random_data=None,
+                 format_cache=None):
         super().__init__(annotations=annotations, random_data=random_data)
 
-        self.dates = self._parse_dates(self.annotations)
+        self.dates = self._parse_dates(self.annotations, format_cache)
         self.year_shift = year_shift_base + self.random_data.randint(
             -year_shift_fuzz, year_shift_fuzz)
 
@@ -166,13 +250,14 @@ class DateSurrogates(SurrogateGenerator):
         self.day_shift = -day_shift if max_idx == 0 else day_shift
 
     @staticmethod
-    def _parse_dates(dates):
+    def _parse_dates(dates, format_cache=None):
         parsed = []
         dates_failed = []
+        infer = format_cache.infer_format if format_cache is not None else infer_format
 
         for date in dates:
             try:
-                parsed.append(infer_format(date))
+                parsed.append(infer(date))
             except (ValueError, re.error, NotImplementedError):
                 # NotImplementedError is raised because of a bug in pydateinfer.
                 # WeekdayLong does not implement the abstract `is_numerical` method.
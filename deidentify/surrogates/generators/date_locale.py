@@ -0,0 +1,309 @@
+"""Locale-independent parsing, formatting and inference of date formats.
+
+`datetime.strptime`, `datetime.strftime` and `pydateinfer` read month and weekday names from the
+process-wide C locale, which has to be switched with `locale.setlocale` for every date. This is
+slow, not thread-safe and requires the locales to be installed on the system. Instead, this module
+uses precomputed name tables of the supported locales (as defined by glibc) and implements the
+directives of `strptime` that occur in inferred date formats.
+
+Example:
+
+>>> dt = parse_date('5 maart 2019', '%d %B %Y', 'nl_NL.UTF-8')
+>>> format_date(dt, '%A %d %B %Y', 'de_DE.UTF-8')
+'Dienstag 05 März 2019'
+"""
+import re
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from pydateinfer import date_elements
+from pydateinfer.infer import DATE_ELEMENTS, RULES, _tokenize_by_character_class
+
+# Month names are in calendar order. Weekday names start at Monday (like `calendar.day_name`).
+DateLocale = namedtuple('DateLocale', ['months', 'months_abbr', 'weekdays', 'weekdays_abbr',
+                                       'am_pm'])
+
+DATE_LOCALES = {
+    'nl_NL.UTF-8': DateLocale(
+        months=('januari', 'februari', 'maart', 'april', 'mei', 'juni', 'juli', 'augustus',
+                'september', 'oktober', 'november', 'december'),
+        months_abbr=('jan', 'feb', 'mrt', 'apr', 'mei', 'jun', 'jul', 'aug', 'sep', 'okt', 'nov',
+                     'dec'),
+        weekdays=('maandag', 'dinsdag', 'woensdag', 'donderdag', 'vrijdag', 'zaterdag', 'zondag'),
+        weekdays_abbr=('ma', 'di', 'wo', 'do', 'vr', 'za', 'zo'),
+        am_pm=('', '')
+    ),
+    'en_US.UTF-8': DateLocale(
+        months=('January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+                'September', 'October', 'November', 'December'),
+        months_abbr=('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov',
+                     'Dec'),
+        weekdays=('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'),
+        weekdays_abbr=('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'),
+        am_pm=('AM', 'PM')
+    ),
+    'de_DE.UTF-8': DateLocale(
+        months=('Januar', 'Februar', 'März', 'April', 'Mai', 'Juni', 'Juli', 'August',
+                'September', 'Oktober', 'November', 'Dezember'),
+        months_abbr=('Jan', 'Feb', 'Mär', 'Apr', 'Mai', 'Jun', 'Jul', 'Aug', 'Sep', 'Okt', 'Nov',
+                     'Dez'),
+        weekdays=('Montag', 'Dienstag', 'Mittwoch', 'Donnerstag', 'Freitag', 'Samstag',
+                  'Sonntag'),
+        weekdays_abbr=('Mo', 'Di', 'Mi', 'Do', 'Fr', 'Sa', 'So'),
+        am_pm=('', '')
+    ),
+}
+
+# Patterns of the numeric directives, identical to those of `_strptime.TimeRE`.
+_NUMERIC_PATTERNS = {
+    'd': r'(?P<d>3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])',
+    'f': r'(?P<f>[0-9]{1,6})',
+    'H': r'(?P<H>2[0-3]|[0-1]\d|\d)',
+    'I': r'(?P<I>1[0-2]|0[1-9]|[1-9])',
+    'm': r'(?P<m>1[0-2]|0[1-9]|[1-9])',
+    'M': r'(?P<M>[0-5]\d|\d)',
+    'S': r'(?P<S>6[0-1]|[0-5]\d|\d)',
+    'w': r'(?P<w>[0-6])',
+    'y': r'(?P<y>\d\d)',
+    'Y': r'(?P<Y>\d\d\d\d)',
+    'z': r'(?P<z>[+-]\d\d:?[0-5]\d(:?[0-5]\d(\.\d{1,6})?)?|(?-i:Z))',
+}
+
+_FORMAT_TOKEN = re.compile(r'%.?|\s+|[^%\s]+', re.DOTALL)
+
+
+def get_date_locale(date_locale: str) -> DateLocale:
+    try:
+        return DATE_LOCALES[date_locale]
+    except KeyError:
+        raise ValueError('Unsupported date locale "{}". Choose one of {}'.format(
+            date_locale, list(DATE_LOCALES))) from None
+
+
+def _names_pattern(names, directive):
+    # Longest names first, so that a name is not matched by one of its prefixes.
+    names = sorted((name.lower() for name in names if name), key=len, reverse=True)
+    if not names:
+        return ''
+    return '(?P<{}>{})'.format(directive, '|'.join(re.escape(name) for name in names))
+
+
+def _timezone_names():
+    names = {'utc', 'gmt', time.tzname[0].lower()}
+    if time.daylight:
+        names.add(time.tzname[1].lower())
+    return names
+
+
+@lru_cache(maxsize=1024)
+def _format_regex(date_format, date_locale):
+    names = get_date_locale(date_locale)
+    patterns = dict(_NUMERIC_PATTERNS)
+    patterns.update({
+        'a': _names_pattern(names.weekdays_abbr, 'a'),
+        'A': _names_pattern(names.weekdays, 'A'),
+        'b': _names_pattern(names.months_abbr, 'b'),
+        'B': _names_pattern(names.months, 'B'),
+        'p': _names_pattern(names.am_pm, 'p'),
+        'Z': _names_pattern(_timezone_names(), 'Z'),
+        '%': '%',
+    })
+
+    regex = []
+    for token in _FORMAT_TOKEN.findall(date_format):
+        if token[0] == '%':
+            if len(token) == 1:
+                raise ValueError('stray % in format "{}"'.format(date_format))
+            if token[1] not in patterns:
+                raise ValueError('"{}" is an unsupported directive in format "{}"'.format(
+                    token[1], date_format))
+            regex.append(patterns[token[1]])
+        elif token.isspace():
+            regex.append(r'\s+')
+        else:
+            regex.append(re.escape(token))
+
+    # Like `strptime`, raises re.error if a directive is used twice.
+    return re.compile(''.join(regex), re.IGNORECASE)
+
+
+def _utc_offset(z):
+    if z == 'Z':
+        return timedelta(0)
+
+    if z[3] == ':':
+        z = z[:3] + z[4:]
+        if len(z) > 5:
+            if z[5] != ':':
+                raise ValueError('Inconsistent use of : in {}'.format(z))
+            z = z[:5] + z[6:]
+    hours, minutes, seconds = int(z[1:3]), int(z[3:5]), int(z[5:7] or 0)
+    fraction = z[8:]
+    offset = timedelta(hours=hours, minutes=minutes, seconds=seconds,
+                       microseconds=int(fraction + '0' * (6 - len(fraction))))
+    return -offset if z.startswith('-') else offset
+
+
+def parse_date(date_string: str, date_format: str, date_locale: str = 'en_US.UTF-8') -> datetime:
+    """Parse `date_string` like `datetime.strptime` would if `date_locale` was the C locale.
+
+    Supports the directives %a, %A, %b, %B, %d, %f, %H, %I, %m, %M, %p, %S, %w, %y, %Y, %z, %Z and
+    %%. Raises ValueError if the string does not match the format.
+    """
+    found = _format_regex(date_format, date_locale).match(date_string)
+    if not found:
+        raise ValueError('time data {!r} does not match format {!r}'.format(
+            date_string, date_format))
+    if len(date_string) != found.end():
+        raise ValueError('unconverted data remains: {}'.format(date_string[found.end():]))
+
+    names = get_date_locale(date_locale)
+    year, month, day = 1900, 1, 1
+    hour = minute = second = fraction = 0
+    offset, tzname = None, None
+
+    for directive, value in found.groupdict().items():
+        if directive == 'y':
+            year = int(value)
+            year += 2000 if year <= 68 else 1900
+        elif directive == 'Y':
+            year = int(value)
+        elif directive == 'm':
+            month = int(value)
+        elif directive in ('B', 'b'):
+            month_names = names.months if directive == 'B' else names.months_abbr
+            month = [name.lower() for name in month_names].index(value.lower()) + 1
+        elif directive == 'd':
+            day = int(value)
+        elif directive == 'H':
+            hour = int(value)
+        elif directive == 'I':
+            hour = int(value)
+            am_pm = (found.groupdict().get('p') or '').lower()
+            if am_pm in ('', names.am_pm[0].lower()):
+                if hour == 12:
+                    hour = 0
+            elif am_pm == names.am_pm[1].lower():
+                if hour != 12:
+                    hour += 12
+        elif directive == 'M':
+            minute = int(value)
+        elif directive == 'S':
+            second = int(value)
+        elif directive == 'f':
+            fraction = int(value + '0' * (6 - len(value)))
+        elif directive == 'z':
+            offset = _utc_offset(value)
+        elif directive == 'Z':
+            tzname = value
+        # The weekday (%a, %A, %w) does not determine the date without a week number.
+
+    tzinfo = None
+    if offset is not None:
+        tzinfo = timezone(offset, tzname) if tzname else timezone(offset)
+
+    return datetime(year, month, day, hour, minute, second, fraction, tzinfo=tzinfo)
+
+
+def format_date(date_time: datetime, date_format: str, date_locale: str = 'en_US.UTF-8') -> str:
+    """Format `date_time` like `datetime.strftime` would if `date_locale` was the C locale."""
+    names = get_date_locale(date_locale)
+    weekday, month = date_time.weekday(), date_time.month - 1
+    localized = {
+        '%a': names.weekdays_abbr[weekday],
+        '%A': names.weekdays[weekday],
+        '%b': names.months_abbr[month],
+        '%B': names.months[month],
+        '%p': names.am_pm[date_time.hour >= 12],
+    }
+
+    # Only single numeric directives are passed to strftime, so that names and literal text are
+    # never encoded with the encoding of the C locale.
+    parts = []
+    for token in _FORMAT_TOKEN.findall(date_format):
+        if token in localized:
+            parts.append(localized[token])
+        elif token[0] == '%':
+            parts.append(date_time.strftime(token))
+        else:
+            parts.append(token)
+    return ''.join(parts)
+
+
+class _LocalizedElement:
+    # Matches tokens against the names of a `DateLocale` instead of those of the C locale.
+
+    def __init__(self, names):
+        self.names = frozenset(names)
+
+    def is_match(self, token):
+        return token in self.names
+
+
+class _MonthTextLong(_LocalizedElement, date_elements.MonthTextLong):
+    pass
+
+
+class _MonthTextShort(_LocalizedElement, date_elements.MonthTextShort):
+    pass
+
+
+class _WeekdayLong(_LocalizedElement, date_elements.WeekdayLong):
+    pass
+
+
+class _WeekdayShort(_LocalizedElement, date_elements.WeekdayShort):
+    pass
+
+
+@lru_cache(maxsize=None)
+def _date_elements(date_locale):
+    names = get_date_locale(date_locale)
+    localized = {
+        '%b': _MonthTextShort(names.months_abbr),
+        '%B': _MonthTextLong(names.months),
+        '%a': _WeekdayShort(names.weekdays_abbr),
+        '%A': _WeekdayLong(names.weekdays),
+    }
+    return tuple(localized.get(element.directive, element) for element in DATE_ELEMENTS)
+
+
+@lru_cache(maxsize=4096)
+def _numeric_directive(token):
+    # Numbers are tagged independent of the locale. Returns the literal token if nothing matches.
+    for element in DATE_ELEMENTS:
+        if element.is_match(token):
+            return element.directive
+    return date_elements.Filler(token).directive
+
+
+def date_shape(date_string: str) -> tuple:
+    """Everything of `date_string` that `infer_date_format` depends on.
+
+    Words, punctuation and whitespace are kept as is. Numbers are replaced by the directive they are
+    tagged with (e.g., '12' and '03' both become '%m'), so '12-03-2019' and '03-12-2018' have the
+    same shape and thus the same inferred format.
+    """
+    return tuple(_numeric_directive(token) if token.isdigit() else token
+                 for token in _tokenize_by_character_class(date_string))
+
+
+def infer_date_format(date_string: str, date_locale: str = 'en_US.UTF-8') -> str:
+    """The format that `pydateinfer.infer([date_string])` returns if `date_locale` is the C locale.
+
+    The result may contain unparsed text (see `date.fully_parsed`).
+    """
+    elements = _date_elements(date_locale)
+
+    # With a single example, a token is tagged with the most restrictive element that matches it.
+    date_classes = []
+    for token in _tokenize_by_character_class(date_string):
+        match = next((element for element in elements if element.is_match(token)), None)
+        date_classes.append(match if match is not None else date_elements.Filler(token))
+
+    for rule in RULES:
+        date_classes = rule.execute(date_classes)
+
+    return ''.join(date_class.directive for date_class in date_classes)
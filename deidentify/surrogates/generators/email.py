@@ -9,8 +9,8 @@ class EmailSurrogates(ExactMatchGenerator):
     replaced with iba.qbkbaase@uync.com
     """
 
-    def __init__(self, annotations, random_data=None):
-        super(EmailSurrogates, self).__init__(annotations, random_data)
+    def __init__(self, annotations, random_data=None, cache=None):
+        super(EmailSurrogates, self).__init__(annotations, random_data, cache=cache)
 
         self.id_surrogates = IDSurrogates(annotations=[], random_data=random_data)
 
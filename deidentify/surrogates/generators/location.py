@@ -2,8 +2,6 @@ import re
 from collections import namedtuple
 from os.path import dirname, join
 
-import pandas as pd
-
 from .base import SurrogateGenerator
 from .identifier import IDSurrogates
 
@@ -24,25 +22,70 @@ Location = namedtuple('Location', ['raw', 'country', 'zip_code', 'place', 'stree
 class LocationDatabase:
 
     def __init__(self, countries=None, locations=None):
+        """Countries, places, zip codes and streetnames to sample location surrogates from.
+
+        The resources are read on first access, so creating a `LocationDatabase` is cheap.
+        """
+        self._countries = countries
+        self._locations = locations
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+
+        import pandas as pd
+
         def unique(seq):
             return sorted(list(set(seq)))
 
-        if countries:
-            countries = pd.DataFrame(countries, columns=['id', 'value'])
+        if self._countries:
+            countries = pd.DataFrame(self._countries, columns=['id', 'value'])
         else:
             countries = pd.read_csv(join(RESOURCES_PATH, 'country.csv'))
-        self.countries = unique(countries['value'])
-        self.countries_normalized = unique(country.lower() for country in self.countries)
+        self._country_values = unique(countries['value'])
+        self._countries_normalized = unique(country.lower() for country in self._country_values)
 
-        if locations:
-            locations = pd.DataFrame(locations, columns=['postcode', 'plaats', 'straat'])
+        if self._locations:
+            locations = pd.DataFrame(self._locations, columns=['postcode', 'plaats', 'straat'])
         else:
             locations = pd.read_csv(join(RESOURCES_PATH, 'postcodes-zones.csv'))
 
-        self.locations = locations
-        self.places = unique(locations['plaats'])
-        self.zip_codes = unique(locations['postcode'])
-        self.streetnames = unique(locations['straat'])
+        self._location_table = locations
+        self._places = unique(locations['plaats'])
+        self._zip_codes = unique(locations['postcode'])
+        self._streetnames = unique(locations['straat'])
+        self._loaded = True
+
+    @property
+    def countries(self):
+        self._load()
+        return self._country_values
+
+    @property
+    def countries_normalized(self):
+        self._load()
+        return self._countries_normalized
+
+    @property
+    def locations(self):
+        self._load()
+        return self._location_table
+
+    @property
+    def places(self):
+        self._load()
+        return self._places
+
+    @property
+    def zip_codes(self):
+        self._load()
+        return self._zip_codes
+
+    @property
+    def streetnames(self):
+        self._load()
+        return self._streetnames
 
 
 _LOCATION_DATABASE = LocationDatabase()
@@ -111,8 +154,9 @@ def parse_location(location_string, location_databse=_LOCATION_DATABASE):
 
 class LocationSurrogates(SurrogateGenerator):
 
-    def __init__(self, annotations, random_data=None, location_database=_LOCATION_DATABASE):
-        super(LocationSurrogates, self).__init__(annotations, random_data)
+    def __init__(self, annotations, random_data=None, location_database=_LOCATION_DATABASE,
+                 cache=None):
+        super(LocationSurrogates, self).__init__(annotations, random_data, cache=cache)
         self.location_database = location_database
         self.id_surrogates = IDSurrogates(annotations=[], random_data=random_data)
 
@@ -145,10 +189,10 @@ class LocationSurrogates(SurrogateGenerator):
     def replace_all(self):
         replaced = []
 
-        zip_cache = {}
-        place_cache = {}
-        street_cache = {}
-        house_number_cache = {}
+        zip_cache = self.lookup_table('zip_codes')
+        place_cache = self.lookup_table('places')
+        street_cache = self.lookup_table('streets')
+        house_number_cache = self.lookup_table('house_numbers')
 
         for annotation in self.annotations:
             new_location = annotation
@@ -23,18 +23,16 @@ References:
 """
 import re
 import string
-from collections import defaultdict
-from os.path import dirname, join
+from collections import namedtuple
+from functools import lru_cache
 
 import nameparser.config
-import pandas as pd
 from loguru import logger
 from nameparser import HumanName
-from unidecode import unidecode
 
 from .base import ExactMatchGenerator, SurrogateGenerator
-
-RESOURCES_PATH = join(dirname(__file__), 'resources')
+from .name_index import (NAME_INDEX_FILE, build_name_index, load_name_indices,
+                         normalize_index_key)
 
 # Add common Dutch titles for Mr. and Mrs.
 nameparser.config.CONSTANTS.titles.add('mw', 'dhr', 'mevr', 'mr')
@@ -47,6 +45,86 @@ nameparser.config.CONSTANTS.prefixes.add(*PREPOSITIONS)
 PREPOSITIONS_REGEX = re.compile(r'((?:{})\s)*'.format('|'.join(PREPOSITIONS)))
 INITIALS_REGEX = re.compile(r'([A-Z]?\.?)+')
 
+NAME_PARTS = ('first', 'middle', 'last')
+
+ParsedName = namedtuple('ParsedName', ['name', 'spans'])
+
+
+def _is_word_char(char):
+    # Same as the regex class \w for str patterns.
+    return char.isalnum() or char == '_'
+
+
+def find_name_part(part, whole, claimed=()):
+    """Find all (start, end) offsets of `part` in `whole`.
+
+    A match has to start on a word boundary and end at the end of `whole`, on a word boundary or
+    before a non-word character. Initials may end on ".", so matching on word boundaries only is
+    insufficient. Candidates that overlap one of the `claimed` (start, end) spans are skipped.
+    """
+    spans = []
+    start = whole.find(part)
+    while start != -1:
+        end = start + len(part)
+        starts_word = (_is_word_char(whole[start]) if start == 0
+                       else _is_word_char(whole[start - 1]) != _is_word_char(whole[start]))
+        ends_word = (end == len(whole) or not _is_word_char(whole[end])
+                     or not _is_word_char(whole[end - 1]))
+        overlaps = any(start < other_end and end > other_start
+                       for other_start, other_end in claimed)
+        if starts_word and ends_word and not overlaps:
+            spans.append((start, end))
+            # A non-word character after the match is consumed by it.
+            if end < len(whole) and not _is_word_char(whole[end]):
+                end += 1
+            start = whole.find(part, end)
+        else:
+            start = whole.find(part, start + 1)
+    return spans
+
+
+def replace_spans(whole, replacements):
+    """Replace non-overlapping (start, end, replacement) spans of `whole`."""
+    parts = []
+    last_end = 0
+    for start, end, replacement in sorted(replacements):
+        parts.append(whole[last_end:start])
+        parts.append(replacement)
+        last_end = end
+    parts.append(whole[last_end:])
+    return ''.join(parts)
+
+
+@lru_cache(maxsize=2 ** 17)
+def parse_name(annotation):
+    """Parse a name with `nameparser` and locate its first, middle and last name.
+
+    Results are cached per annotation string, so the returned `HumanName` must not be modified.
+
+    Returns
+    -------
+    ParsedName
+        The `HumanName` and a dict with the (start, end) offsets of each name part in
+        `annotation`. A part claims all of its occurrences that do not overlap the occurrences of
+        a previous part. A part that equals a previous part (e.g., "Jan Jan") shares its offsets.
+        The offsets of a part are empty if it could not be located.
+    """
+    name = HumanName(annotation)
+    spans = {}
+    spans_by_part = {}
+    claimed = []
+    for part_name in NAME_PARTS:
+        part = getattr(name, part_name)
+        if not part:
+            continue
+        if part in spans_by_part:
+            spans[part_name] = spans_by_part[part]
+            continue
+        spans[part_name] = find_name_part(part, annotation, claimed=claimed)
+        spans_by_part[part] = spans[part_name]
+        claimed.extend(spans[part_name])
+    return ParsedName(name=name, spans=spans)
+
 
 def random_char_mapping(random_data):
     """Generate a random mapping between for the characters of the lowercase ASCII alphabet.
@@ -66,22 +144,10 @@ def random_char_mapping(random_data):
     return dict(zip(alphabet, shuffled))
 
 
-def _load_firstnames(filename):
-    return pd.read_csv(filename, names=['name'])['name'].values
-
-
-def _inverted_name_index(names, index_getter=lambda x: x[0]):
-    index = defaultdict(list)
-    for name in names:
-        key = index_getter(name)
-        key = NameDatabase.normalize_index_key(key)
-        index[key].append(name)
-    return index
-
-
 class NameDatabase:
 
-    def __init__(self, firstnames_male=None, firstnames_female=None, lastnames=None):
+    def __init__(self, firstnames_male=None, firstnames_female=None, lastnames=None,
+                 index_file=NAME_INDEX_FILE):
         """Provides access to the 10,000 most common Dutch firstnames/lastnames fetched from the
         Meertens Instituut (see: http://www.naamkunde.net).
 
@@ -99,6 +165,9 @@ class NameDatabase:
 
         Lastnames are stored as (prefix, lastname) tuples. Example: ('de', 'Groot').
 
+        The indices are built (or loaded from the prebuilt `index_file`) on first access, so
+        creating a `NameDatabase` is cheap. See `deidentify.surrogates.generators.name_index`.
+
         Parameters
         ----------
         firstnames_male : iterable of type `str`
@@ -107,26 +176,45 @@ class NameDatabase:
             A list of female firstnames.
         lastnames : iterable of (str, str) tuples
             A list of lastname tuples in form of (prefix: str, lastname: str). Example: `('de', 'Groot')`.
+        index_file : str
+            Prebuilt index of the Meertens name lists. Used for all name lists that are not given.
         """
-        if not firstnames_male:
-            firstnames_male = _load_firstnames(join(RESOURCES_PATH, 'firstnames_male.txt'))
-        self.__male_normalized = set(name.lower() for name in firstnames_male)
-        self.male_index = _inverted_name_index(firstnames_male)
-
-        if not firstnames_female:
-            firstnames_female = _load_firstnames(join(RESOURCES_PATH, 'firstnames_female.txt'))
-        self.__female_normalized = set(name.lower() for name in firstnames_female)
-        self.female_index = _inverted_name_index(firstnames_female)
-
-        if not lastnames:
-            df_lastnames = pd.read_csv(join(RESOURCES_PATH, 'lastnames.csv'))
-            df_lastnames.prefix.fillna('', inplace=True)
-            lastnames = df_lastnames.apply(lambda row: (row['prefix'], row['name']), axis=1)
-
-        # Given (prefix, lastname) tuple select first character of lastname and use as index
-        def lastname_index_getter(prefix_lastname_tuple):
-            return prefix_lastname_tuple[1][0]
-        self.lastname_index = _inverted_name_index(lastnames, index_getter=lastname_index_getter)
+        self._name_lists = {
+            'male': firstnames_male,
+            'female': firstnames_female,
+            'lastname': lastnames
+        }
+        self.index_file = index_file
+        self._indices = None
+        self._male_normalized = None
+
+    def _load(self):
+        if self._indices is not None:
+            return self._indices
+
+        given = {name: names for name, names in self._name_lists.items() if names}
+        indices = {}
+        if len(given) < len(self._name_lists):
+            indices = load_name_indices(self.index_file)
+        for name, names in given.items():
+            indices[name] = build_name_index(name, names)
+
+        self._male_normalized = set(name.lower() for names in indices['male'].values()
+                                    for name in names)
+        self._indices = indices
+        return indices
+
+    @property
+    def male_index(self):
+        return self._load()['male']
+
+    @property
+    def female_index(self):
+        return self._load()['female']
+
+    @property
+    def lastname_index(self):
+        return self._load()['lastname']
 
     def gender_index_for_name(self, firstname):
         """Make a best-guess at the gender of the given firstname and returns the appropriate index
@@ -137,16 +225,20 @@ class NameDatabase:
 
         Returns
         -------
-        dict(str: [str])
+        NameIndex
             The name index correspoding to the gender of `firstname`.
         """
-        if firstname.lower() in self.__male_normalized:
-            return self.male_index
-        return self.female_index
+        indices = self._load()
+        if firstname.lower() in self._male_normalized:
+            return indices['male']
+        return indices['female']
 
     @staticmethod
     def normalize_index_key(key):
-        return unidecode(key).lower()
+        return normalize_index_key(key)
+
+
+_NAME_DATABASE = NameDatabase()
 
 
 class InitialsSurrogates(ExactMatchGenerator):
@@ -171,8 +263,9 @@ class InitialsSurrogates(ExactMatchGenerator):
 class NameSurrogates(SurrogateGenerator):
 
     def __init__(self, annotations, random_data, firstname_char_mapping, lastname_char_mapping,
-                 name_database=NameDatabase()):
-        super(NameSurrogates, self).__init__(annotations=annotations, random_data=random_data)
+                 name_database=_NAME_DATABASE, cache=None):
+        super(NameSurrogates, self).__init__(annotations=annotations, random_data=random_data,
+                                             cache=cache)
 
         self.firstname_char_mapping = firstname_char_mapping
         self.lastname_char_mapping = lastname_char_mapping
@@ -182,7 +275,7 @@ class NameSurrogates(SurrogateGenerator):
 
     @staticmethod
     def normalize_name(annotation):
-        return HumanName(annotation)
+        return parse_name(annotation).name
 
     @staticmethod
     def remove_prepositions(lastname):
@@ -200,7 +293,7 @@ class NameSurrogates(SurrogateGenerator):
 
         Parameters
         ----------
-        index : dict(str: [str])
+        index : NameIndex
             The name index to retrieve a random name from. The first letter of the values equals
             the index key.
         index_key : str
@@ -264,14 +357,12 @@ class NameSurrogates(SurrogateGenerator):
 
     @staticmethod
     def strict_replace(part, replacement, whole):
-        # initials may end on ., so matching on a word boundary \b is insufficient.
-        # If we match on \W, we need to re-insert this in the substitute.
-        fmt = r'\b(?:{})(\W|\b)'.format(re.escape(part))
-        return re.sub(fmt, replacement + r'\1', whole)
+        return replace_spans(whole, [(start, end, replacement)
+                                     for start, end in find_name_part(part, whole)])
 
     def _replace_name(self, annotation, firstname_mapping, lastname_mapping):
-        new_name = annotation
-        name = self.normalize_name(annotation)
+        name, spans = parse_name(annotation)
+        replacements = {}
 
         if name.first:
             if self.is_initials(name.first):
@@ -281,7 +372,7 @@ class NameSurrogates(SurrogateGenerator):
                                                     name.first,
                                                     self.surrogate_firstname)
                 replacement = self.restore_case(name.first[0], replacement)
-            new_name = self.strict_replace(part=name.first, replacement=replacement, whole=new_name)
+            replacements['first'] = replacement
 
         if name.middle:
             replacement = ''
@@ -297,8 +388,7 @@ class NameSurrogates(SurrogateGenerator):
                     replacement += self.restore_case(part[0], part_replacement)
                 if i < len(parts) - 1:
                     replacement += ' '
-            new_name = self.strict_replace(part=name.middle, replacement=replacement,
-                                           whole=new_name)
+            replacements['middle'] = replacement
 
         if name.last:
             original_lastname = self.remove_prepositions(name.last)
@@ -311,23 +401,42 @@ class NameSurrogates(SurrogateGenerator):
                 replacement = prefix + ' ' + lastname
             else:
                 replacement = lastname
-            new_name = self.strict_replace(part=name.last, replacement=replacement, whole=new_name)
-
+            replacements['last'] = replacement
+
+        # A part that can't be located would leak into the surrogate unchanged.
+        assert all(spans[part_name] for part_name in replacements)
+        # Parts with shared offsets are replaced by the surrogate of the first of them.
+        span_replacements = {}
+        for part_name, replacement in replacements.items():
+            for span in spans[part_name]:
+                span_replacements.setdefault(span, replacement)
+
+        new_name = replace_spans(annotation, [
+            (start, end, replacement) for (start, end), replacement in span_replacements.items()
+        ])
         assert new_name != annotation
         return new_name
 
     def replace_all(self):
-        firstname_mapping = {}
-        lastname_mapping = {}
+        firstname_mapping = self.lookup_table('firstnames')
+        lastname_mapping = self.lookup_table('lastnames')
+        # Surrogates of a full name only depend on the surrogates of its parts, so repeated
+        # mentions of a name are replaced by a lookup.
+        name_mapping = self.lookup_table('names')
 
         replaced = []
         for annotation in self.annotations:
+            if annotation in name_mapping:
+                replaced.append(name_mapping[annotation])
+                continue
+
             # TODO: Add an annotation object that encapsules automatic replacement errors
             new_name = None
             try:
                 new_name = self._replace_name(annotation, firstname_mapping, lastname_mapping)
             except (AssertionError, KeyError):
                 logger.opt(exception=False).debug('Could not process name {}'.format(annotation))
+            name_mapping[annotation] = new_name
             replaced.append(new_name)
 
         return replaced
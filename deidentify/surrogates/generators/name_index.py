@@ -0,0 +1,187 @@
+"""Prebuilt index of the firstname/lastname resources used by `NameSurrogates`.
+
+Names are grouped by the normalized first letter of the name (see `normalize_index_key`) and stored
+in flat arrays. The names of one index key are a contiguous range of these arrays, so looking up
+all names for a letter and sampling one of them are both O(1).
+
+The index of the Meertens name lists is stored in `resources/names.npz`. It is loaded on first use
+and rebuilt after downloading the name lists (see `resources/download_names.sh`) with:
+
+```sh
+python deidentify/surrogates/generators/name_index.py
+```
+"""
+import csv
+from collections.abc import Mapping, Sequence
+from os.path import dirname, isfile, join
+
+import numpy as np
+from loguru import logger
+from unidecode import unidecode
+
+RESOURCES_PATH = join(dirname(__file__), 'resources')
+NAME_INDEX_FILE = join(RESOURCES_PATH, 'names.npz')
+INDEX_NAMES = ('male', 'female', 'lastname')
+
+
+def normalize_index_key(key):
+    return unidecode(key).lower()
+
+
+class NameBucket(Sequence):
+    """Read-only view on the names of a `NameIndex` that start with the same letter.
+
+    Items are strings if the index has a single column, and tuples of strings otherwise (e.g.,
+    `(prefix, lastname)`).
+    """
+
+    def __init__(self, columns, start, stop):
+        self._columns = columns
+        self._range = range(start, stop)
+
+    def __len__(self):
+        return len(self._range)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+
+        row = self._range[i]
+        if len(self._columns) == 1:
+            return str(self._columns[0][row])
+        return tuple(str(column[row]) for column in self._columns)
+
+    def __repr__(self):
+        return 'NameBucket({})'.format(list(self))
+
+
+class NameIndex(Mapping):
+    """Mapping from normalized first letter to the names starting with that letter.
+
+    Parameters
+    ----------
+    keys : np.ndarray of type `str`
+        The sorted index keys.
+    offsets : np.ndarray of type `int`
+        Names of `keys[i]` are at positions `offsets[i]:offsets[i + 1]` of each column.
+    columns : list of np.ndarray of type `str`
+        The name columns. One column for firstnames, two columns (prefix, lastname) for lastnames.
+    """
+
+    def __init__(self, keys, offsets, columns):
+        self._keys = keys
+        self._offsets = offsets
+        self._columns = columns
+        self._buckets = {
+            str(key): NameBucket(columns, int(offsets[i]), int(offsets[i + 1]))
+            for i, key in enumerate(keys)
+        }
+
+    @classmethod
+    def from_names(cls, names, index_getter=lambda x: x[0]):
+        """Build an index from a list of names.
+
+        Parameters
+        ----------
+        names : iterable of type `str` or tuple of `str`
+            The names. All tuples have to be of the same length.
+        index_getter : callable
+            Returns the character to index a name by.
+        """
+        names = list(names)
+        index_keys = [normalize_index_key(index_getter(name)) for name in names]
+        names = [name if isinstance(name, tuple) else (name,) for name in names]
+        order = sorted(range(len(names)), key=index_keys.__getitem__)
+
+        keys, counts = np.unique(np.array([index_keys[i] for i in order], dtype=str),
+                                 return_counts=True)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        n_columns = len(names[0]) if names else 1
+        columns = [np.array([names[i][column] for i in order], dtype=str)
+                   for column in range(n_columns)]
+        return cls(keys, offsets, columns)
+
+    def to_arrays(self, prefix):
+        arrays = {
+            '{}_keys'.format(prefix): self._keys,
+            '{}_offsets'.format(prefix): self._offsets,
+        }
+        for i, column in enumerate(self._columns):
+            arrays['{}_{}'.format(prefix, i)] = column
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        columns = []
+        while '{}_{}'.format(prefix, len(columns)) in arrays:
+            columns.append(arrays['{}_{}'.format(prefix, len(columns))])
+        return cls(arrays['{}_keys'.format(prefix)], arrays['{}_offsets'.format(prefix)], columns)
+
+    def __getitem__(self, key):
+        return self._buckets[key]
+
+    def __iter__(self):
+        return iter(self._buckets)
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def __repr__(self):
+        return 'NameIndex(n_keys={}, n_names={})'.format(len(self), int(self._offsets[-1]))
+
+
+def lastname_index_getter(prefix_lastname_tuple):
+    # Given (prefix, lastname) tuple select first character of lastname and use as index
+    return prefix_lastname_tuple[1][0]
+
+
+def build_name_index(index_name, names):
+    if index_name == 'lastname':
+        return NameIndex.from_names(names, index_getter=lastname_index_getter)
+    return NameIndex.from_names(names)
+
+
+def build_name_indices(firstnames_male, firstnames_female, lastnames):
+    name_lists = dict(zip(INDEX_NAMES, (firstnames_male, firstnames_female, lastnames)))
+    return {name: build_name_index(name, names) for name, names in name_lists.items()}
+
+
+def _read_firstnames(filename):
+    with open(filename, newline='', encoding='utf-8') as file:
+        return [row[0] for row in csv.reader(file) if row and row[0]]
+
+
+def _read_lastnames(filename):
+    with open(filename, newline='', encoding='utf-8') as file:
+        return [(row['prefix'], row['name']) for row in csv.DictReader(file) if row['name']]
+
+
+def read_name_lists(path=RESOURCES_PATH):
+    """Read the Meertens firstname/lastname lists that were fetched with `download_names.sh`."""
+    return (_read_firstnames(join(path, 'firstnames_male.txt')),
+            _read_firstnames(join(path, 'firstnames_female.txt')),
+            _read_lastnames(join(path, 'lastnames.csv')))
+
+
+def save_name_indices(indices, path):
+    arrays = {}
+    for name in INDEX_NAMES:
+        arrays.update(indices[name].to_arrays(name))
+    with open(path, 'wb') as file:
+        np.savez(file, **arrays)
+
+
+def load_name_indices(path=NAME_INDEX_FILE):
+    """Load the name indices from `path`, or build them from the name lists if it doesn't exist."""
+    if not isfile(path):
+        logger.info('Name index {} not found. Building it from the name lists.'.format(path))
+        return build_name_indices(*read_name_lists())
+
+    with np.load(path, allow_pickle=False) as npz:
+        arrays = {key: npz[key] for key in npz.files}
+    return {name: NameIndex.from_arrays(arrays, name) for name in INDEX_NAMES}
+
+
+if __name__ == '__main__':
+    save_name_indices(build_name_indices(*read_name_lists()), NAME_INDEX_FILE)
+    logger.info('Wrote name index to {}'.format(NAME_INDEX_FILE))
@@ -15,3 +15,6 @@ echo 'Fetch and process lastnames'
 curl http://www.naamkunde.net/wp-content/uploads/oudedocumenten/fn10k_versie1.zip -o "$DIR"/lastnames.zip
 unzip -o "$DIR"/lastnames.zip -d "$DIR"/tmp_lastnames
 python lastnames.py "$DIR"/tmp_lastnames/fn_10kw.xml
+
+echo 'Build name index'
+python "$DIR"/../name_index.py
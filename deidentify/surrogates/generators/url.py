@@ -8,8 +8,8 @@ URL_ELEMENTS_REGEX = re.compile(r'(https?|www\.|\.(?:{}))'.format('|'.join(TLDS)
 
 class URLSurrogates(ExactMatchGenerator):
 
-    def __init__(self, annotations, random_data=None):
-        super(URLSurrogates, self).__init__(annotations, random_data)
+    def __init__(self, annotations, random_data=None, cache=None):
+        super(URLSurrogates, self).__init__(annotations, random_data, cache=cache)
         self.id_surrogates = IDSurrogates(annotations=[], random_data=random_data)
 
     def replace_one(self, annotation):
@@ -1,4 +1,6 @@
 from .deduce_tagger import DeduceTagger
 from .crf_tagger import CRFTagger
 from .flair_tagger import FlairTagger
+from .parallel_tagger import ParallelTagger
+from .prediction_cache import PredictionCache
 from .base import TextTagger
@@ -1,12 +1,14 @@
 from abc import ABC, abstractmethod
+from itertools import islice
 from os.path import isfile
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List
 
 from loguru import logger
 
 import deidentify
 from deidentify.base import Document
+from deidentify.profiling import NULL_PROFILER, Profiler
 from deidentify.util import download_model
 import tarfile
 
@@ -67,12 +69,80 @@ def cached_model_file(model: str) -> Path:
     return model_path
 
 
+def batches(iterable: Iterable, batch_size: int) -> Iterator[List]:
+    """Split an iterable into consecutive lists of at most `batch_size` items.
+
+    The iterable is consumed lazily, so only one batch is materialized at a time.
+
+    Examples
+    --------
+    >>> list(batches(range(5), batch_size=2))
+    [[0, 1], [2, 3], [4]]
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size has to be positive, got {}'.format(batch_size))
+
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
 class TextTagger(ABC):
 
+    # Disabled by default. See `enable_profiling`.
+    profiler = NULL_PROFILER
+
+    def enable_profiling(self, cprofile: bool = False) -> Profiler:
+        """Record per-stage timings and document/sentence/token counts of subsequent `annotate`
+        calls.
+
+        Parameters
+        ----------
+        cprofile : bool
+            Additionally capture all stages with `cProfile`.
+
+        Returns
+        -------
+        Profiler
+            The profiler that accumulates the measurements. Use `profiler.stats` or `profiler.log()`
+            to inspect them.
+        """
+        self.profiler = Profiler(cprofile=cprofile)
+        return self.profiler
+
+    def disable_profiling(self):
+        self.profiler = NULL_PROFILER
+
     @abstractmethod
     def annotate(self, documents: List[Document]) -> List[Document]:
         pass
 
+    def annotate_stream(self, documents: Iterable[Document],
+                        batch_size: int = 128) -> Iterator[Document]:
+        """Annotate a stream of documents with bounded memory.
+
+        Documents are consumed in micro-batches of `batch_size` and passed to `annotate`. Only one
+        micro-batch (and its parsed spaCy documents) is held in memory at a time, which makes it
+        possible to process exports that do not fit into memory.
+
+        Parameters
+        ----------
+        documents : Iterable[Document]
+            The documents to annotate. May be a generator.
+        batch_size : int
+            Number of documents that are tokenized and tagged together.
+
+        Returns
+        -------
+        Iterator[Document]
+            The annotated documents in input order.
+        """
+        for batch in batches(documents, batch_size):
+            yield from self.annotate(batch)
+
     @property
     @abstractmethod
     def tags(self) -> List[str]:
@@ -7,15 +7,18 @@ from deidentify.base import Document
 from deidentify.methods import tagging_utils
 from deidentify.methods.crf import crf_labeler, crf_util
 from deidentify.taggers.base import TextTagger, lookup_model
+from deidentify.taggers.prediction_cache import PredictionCache, cached_predict, file_digest
 from deidentify.tokenizer import Tokenizer
 
 
 class CRFTagger(TextTagger):
 
-    def __init__(self, model, tokenizer: Tokenizer, verbose=False):
+    def __init__(self, model, tokenizer: Tokenizer, verbose=False,
+                 prediction_cache: PredictionCache = None):
         self.tokenizer = tokenizer
-        self.feature_extractor, self.meta_sentence_filter = crf_util.FEATURE_EXTRACTOR['liu_2015']
+        self.feature_extractor, _ = crf_util.FEATURE_EXTRACTOR['liu_2015']
         self.verbose = verbose
+        self.prediction_cache = prediction_cache
 
         model_file = lookup_model(model)
         logger.info('Load sklearn-crfsuite model from {}'.format(model_file))
@@ -23,18 +26,47 @@ class CRFTagger(TextTagger):
             self.tagger = pickle.load(clf_file)
         logger.info('Finish loading crf model.')
 
+        if prediction_cache is not None:
+            self.model_digest = file_digest(model_file)
+
     def annotate(self, documents: List[Document]) -> List[Document]:
         sents, parsed_docs = tagging_utils.standoff_to_sents(
             docs=documents,
             tokenizer=self.tokenizer,
-            verbose=self.verbose
+            verbose=self.verbose,
+            profiler=self.profiler
         )
 
-        X_features, _ = crf_labeler.sents_to_features_and_labels(sents, self.feature_extractor)
-        y_pred = self.tagger.predict(X_features, verbose=self.verbose)
-        annotated_docs = tagging_utils.sents_to_standoff(y_pred, parsed_docs)
+        if self.prediction_cache is None:
+            y_pred = self._predict(sents)
+        else:
+            # Features depend on the token text, POS tag and NER tag.
+            keys = [
+                PredictionCache.make_key(self.model_digest, list(zip(
+                    sent.column('text'), sent.column('pos_tag'), sent.column('ner_tag'))))
+                for sent in sents
+            ]
+            y_pred = cached_predict(self.prediction_cache, keys, sents, self._predict)
+
+        annotated_docs = tagging_utils.sents_to_standoff(y_pred, parsed_docs,
+                                                         profiler=self.profiler)
         return annotated_docs
 
+    def _predict(self, sents):
+        # Only models trained with a sentence filter (SentenceFilterCRF) ignore meta sentences.
+        ignore_sentence = None
+        if getattr(self.tagger, 'ignore_sentence', None):
+            ignore_sentence = crf_util.meta_sentence_filter_tokens
+
+        return crf_labeler.predict_sents(
+            self.tagger,
+            sents,
+            feature_extractor=self.feature_extractor,
+            ignore_sentence=ignore_sentence,
+            verbose=self.verbose,
+            profiler=self.profiler
+        )
+
     @property
     def tags(self):
         bio_tag_names = self.tagger.classes_
@@ -1,3 +1,4 @@
+import multiprocessing
 from typing import List
 
 from deidentify.base import Document
@@ -6,14 +7,52 @@ from deidentify.taggers.base import TextTagger
 
 
 class DeduceTagger(TextTagger):
+    """Rule-based tagger using Deduce.
 
-    def __init__(self, verbose=False):
+    Parameters
+    ----------
+    verbose : bool
+        Show a progress bar over documents.
+    n_jobs : int
+        Number of worker processes that annotate the documents. If larger than 1, the pool is
+        started on the first call to `annotate` and kept alive until `close` is called. The tagger
+        can also be used as a context manager.
+    """
+
+    def __init__(self, verbose=False, n_jobs=1):
         self.verbose = verbose
+        self.n_jobs = n_jobs
+        self._pool = None
+
+    def _get_pool(self):
+        if self.n_jobs > 1 and self._pool is None:
+            self._pool = multiprocessing.Pool(processes=self.n_jobs)
+        return self._pool
 
     def annotate(self, documents: List[Document]) -> List[Document]:
-        docs_predicted = run_deduce.predict(documents, verbose=self.verbose)
+        with self.profiler.stage('inference'):
+            docs_predicted = run_deduce.predict(documents, verbose=self.verbose,
+                                                pool=self._get_pool())
+        self.profiler.count('documents', len(documents))
         return docs_predicted
 
+    def close(self):
+        """Shut down the worker processes."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        if self._pool is not None:
+            self._pool.terminate()
+
     @property
     def tags(self):
         return list(set(run_deduce.DEDUCE_ONS_TAG_MAPPING.values()))
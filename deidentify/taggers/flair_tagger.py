@@ -2,37 +2,92 @@ from typing import List
 
 from flair.models import SequenceTagger
 from loguru import logger
+from tqdm import tqdm
 
 from deidentify.base import Document
 from deidentify.methods.bilstmcrf import flair_utils
 from deidentify.taggers.base import TextTagger, lookup_model
+from deidentify.taggers.prediction_cache import PredictionCache, cached_predict, file_digest
 from deidentify.tokenizer import Tokenizer
 
 
 class FlairTagger(TextTagger):
+    """Tagger based on a flair `SequenceTagger`.
 
-    def __init__(self, model, tokenizer: Tokenizer, mini_batch_size=256, verbose=False):
+    Before prediction, sentences are grouped into batches of similar length so that a single long
+    sentence does not inflate the padding of a whole mini-batch.
+
+    Parameters
+    ----------
+    model : str
+        Model name or path to a model file.
+    tokenizer : Tokenizer
+        The tokenizer used to parse documents.
+    mini_batch_size : int, optional
+        Maximum number of sentences per batch.
+    max_tokens_per_batch : int, optional
+        Maximum number of padded tokens per batch (number of sentences times the length of the
+        longest sentence). Can be combined with `mini_batch_size` or replace it (set it to `None`).
+    verbose : bool
+        Show progress bars.
+    prediction_cache : PredictionCache, optional
+        If given, sentences that were tagged before by the same model are not tagged again.
+    """
+
+    def __init__(self, model, tokenizer: Tokenizer, mini_batch_size=256, max_tokens_per_batch=None,
+                 verbose=False, prediction_cache: PredictionCache = None):
         self.tokenizer = tokenizer
         self.mini_batch_size = mini_batch_size
+        self.max_tokens_per_batch = max_tokens_per_batch
         self.verbose = verbose
+        self.prediction_cache = prediction_cache
 
         model_file = lookup_model(model)
         logger.info('Load flair model from {}'.format(model_file))
         self.tagger = SequenceTagger.load(model_file)
         logger.info('Finish loading flair model.')
 
+        if prediction_cache is not None:
+            self.model_digest = file_digest(model_file)
+
     def annotate(self, documents: List[Document]) -> List[Document]:
         flair_sents, parsed_docs = flair_utils.standoff_to_flair_sents(
             docs=documents,
             tokenizer=self.tokenizer,
-            verbose=self.verbose
+            verbose=self.verbose,
+            profiler=self.profiler
         )
 
-        self.tagger.predict(flair_sents, mini_batch_size=self.mini_batch_size, verbose=self.verbose)
+        if self.prediction_cache is None:
+            self._predict(flair_sents)
+        else:
+            keys = [
+                PredictionCache.make_key(self.model_digest, [token.text for token in sent])
+                for sent in flair_sents
+            ]
+            sentence_tags = cached_predict(self.prediction_cache, keys, flair_sents, self._predict)
+            for sent, tags in zip(flair_sents, sentence_tags):
+                for token, tag in zip(sent, tags):
+                    token.add_tag(tag_type='ner', tag_value=tag)
 
-        annotated_docs = flair_utils.flair_sents_to_standoff(flair_sents, parsed_docs)
+        annotated_docs = flair_utils.flair_sents_to_standoff(flair_sents, parsed_docs,
+                                                             profiler=self.profiler)
         return annotated_docs
 
+    def _predict(self, flair_sents):
+        batches = flair_utils.length_bucketed_batches(
+            flair_sents,
+            mini_batch_size=self.mini_batch_size,
+            max_tokens_per_batch=self.max_tokens_per_batch
+        )
+
+        with self.profiler.stage('inference'):
+            for batch in tqdm(batches, disable=not self.verbose, desc='Tag batches'):
+                # Tags are added to the sentence objects in place. No reordering is necessary.
+                self.tagger.predict(batch, mini_batch_size=len(batch))
+
+        return [[token.get_tag('ner').value for token in sent] for sent in flair_sents]
+
     @property
     def tags(self):
         bio_tag_names = self.tagger.tag_dictionary.get_items()
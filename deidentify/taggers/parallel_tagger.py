@@ -0,0 +1,109 @@
+import multiprocessing
+from typing import List, Optional, Type
+
+from loguru import logger
+from tqdm import tqdm
+
+from deidentify.base import Document
+from deidentify.taggers.base import TextTagger, batches
+
+# Tagger instance of a worker process. It is constructed once by `_init_worker` and reused for all
+# chunks that the worker receives.
+_WORKER_TAGGER = None
+
+
+def _init_worker(tagger_cls, tagger_kwargs):
+    global _WORKER_TAGGER  # pylint: disable=global-statement
+    _WORKER_TAGGER = tagger_cls(**tagger_kwargs)
+
+
+def _annotate_chunk(documents: List[Document]) -> List[Document]:
+    return _WORKER_TAGGER.annotate(documents)
+
+
+def _worker_tags() -> List[str]:
+    return _WORKER_TAGGER.tags
+
+
+class ParallelTagger(TextTagger):
+    """Shard documents across a pool of worker processes that each hold their own tagger.
+
+    Every worker constructs `tagger_cls(**tagger_kwargs)` exactly once when the pool starts, so the
+    model and the spaCy pipeline are loaded once per process rather than once per chunk. Documents
+    are sent to the workers in chunks of `chunk_size` and the results are reassembled in input
+    order.
+
+    The pool is started lazily on the first call to `annotate` and kept alive until `close` is
+    called. The tagger can also be used as a context manager:
+
+    ```py
+    with ParallelTagger(CRFTagger, n_workers=8, model=model, tokenizer=tokenizer) as tagger:
+        annotated_docs = tagger.annotate(documents)
+    ```
+
+    Parameters
+    ----------
+    tagger_cls : Type[TextTagger]
+        The tagger class that is instantiated in each worker (e.g., `CRFTagger` or `DeduceTagger`).
+    n_workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    chunk_size : int
+        Number of documents that are sent to a worker at once.
+    verbose : bool
+        Show a progress bar over chunks.
+    **tagger_kwargs
+        Keyword arguments passed to `tagger_cls`. They have to be picklable.
+    """
+
+    def __init__(self, tagger_cls: Type[TextTagger], n_workers: Optional[int] = None,
+                 chunk_size: int = 32, verbose: bool = False, **tagger_kwargs):
+        if chunk_size < 1:
+            raise ValueError('chunk_size has to be positive, got {}'.format(chunk_size))
+
+        self.tagger_cls = tagger_cls
+        self.tagger_kwargs = tagger_kwargs
+        self.n_workers = n_workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.verbose = verbose
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            logger.info('Start {} workers for {}'.format(self.n_workers, self.tagger_cls.__name__))
+            self._pool = multiprocessing.Pool(
+                processes=self.n_workers,
+                initializer=_init_worker,
+                initargs=(self.tagger_cls, self.tagger_kwargs)
+            )
+        return self._pool
+
+    def annotate(self, documents: List[Document]) -> List[Document]:
+        pool = self._get_pool()
+        chunks = pool.imap(_annotate_chunk, batches(documents, self.chunk_size))
+
+        n_chunks = -(-len(documents) // self.chunk_size)
+        annotated_docs = []
+        for chunk in tqdm(chunks, total=n_chunks, disable=not self.verbose, desc='Tag chunks'):
+            annotated_docs.extend(chunk)
+        return annotated_docs
+
+    @property
+    def tags(self) -> List[str]:
+        return self._get_pool().apply(_worker_tags)
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        if self._pool is not None:
+            self._pool.terminate()
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence
+
+from loguru import logger
+
+
+def file_digest(path) -> str:
+    """SHA-256 digest of a file. Used to tie cached predictions to the exact model file."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class PredictionCache:
+    """Content-addressed cache of predicted tag sequences.
+
+    Entries are keyed by a model digest and the token sequence of a sentence, so exact-duplicate
+    sentences (e.g., templated headers or metadata lines) only have to be tagged once per model.
+    The cache is bounded in memory with a least-recently-used policy and can optionally be persisted
+    to a sqlite database. On a memory miss, the database is consulted before inference is run.
+
+    Pass an instance to the `prediction_cache` argument of `CRFTagger` or `FlairTagger`.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of entries held in memory.
+    path : str, optional
+        Path to a sqlite database. If given, all entries are also written to and read from disk.
+    """
+
+    def __init__(self, max_size: int = 100000, path: Optional[str] = None):
+        if max_size < 1:
+            raise ValueError('max_size has to be positive, got {}'.format(max_size))
+
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._connection = None
+
+    @staticmethod
+    def make_key(model_digest: str, tokens: Sequence) -> str:
+        """Build the cache key of a sentence. `tokens` has to be JSON serializable."""
+        payload = json.dumps([model_digest, tokens], ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _db(self):
+        if self.path is None:
+            return None
+
+        if self._connection is None:
+            logger.info('Open prediction cache database {}'.format(self.path))
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, tags TEXT NOT NULL)'
+            )
+        return self._connection
+
+    def _remember(self, key: str, tags: List[str]):
+        self._entries[key] = tags
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Return the cached tags for `key`, or `None` if the key is unknown."""
+        tags = self._entries.get(key)
+        if tags is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return tags
+
+        db = self._db()
+        if db is not None:
+            row = db.execute('SELECT tags FROM predictions WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                tags = json.loads(row[0])
+                self._remember(key, tags)
+                self.hits += 1
+                return tags
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, tags: List[str]):
+        """Store tags under `key`. Writes to disk become durable on `flush`."""
+        tags = list(tags)
+        self._remember(key, tags)
+
+        db = self._db()
+        if db is not None:
+            db.execute('INSERT OR REPLACE INTO predictions (key, tags) VALUES (?, ?)',
+                       (key, json.dumps(tags)))
+
+    def flush(self):
+        """Commit pending writes to the sqlite database."""
+        if self._connection is not None:
+            self._connection.commit()
+
+    def close(self):
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # sqlite connections can't be pickled (e.g., when the cache is passed to worker processes).
+        # Each process re-opens the database lazily.
+        self.flush()
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        return state
+
+    def __repr__(self):
+        return 'PredictionCache(size={}, max_size={}, path={}, hits={}, misses={})'.format(
+            len(self), self.max_size, self.path, self.hits, self.misses)
+
+
+def cached_predict(cache: PredictionCache,
+                   keys: List[str],
+                   items: List,
+                   predict: Callable[[List], List[List[str]]]) -> List[List[str]]:
+    """Predict tag sequences for `items`, running `predict` only on cache misses.
+
+    Items with the same key are predicted once. New predictions are added to the cache.
+
+    Parameters
+    ----------
+    cache : PredictionCache
+        The cache to consult.
+    keys : List[str]
+        Cache key of each item (see `PredictionCache.make_key`).
+    items : List
+        The items (e.g., sentences) to tag.
+    predict : Callable[[List], List[List[str]]]
+        Tags a list of items and returns one tag sequence per item.
+
+    Returns
+    -------
+    List[List[str]]
+        Tag sequence for each item in input order.
+    """
+    predictions = [cache.get(key) for key in keys]
+
+    missing = OrderedDict()
+    for i, (key, tags) in enumerate(zip(keys, predictions)):
+        if tags is None and key not in missing:
+            missing[key] = i
+
+    predicted = {}
+    if missing:
+        predicted = dict(zip(missing.keys(), predict([items[i] for i in missing.values()])))
+        for key, tags in predicted.items():
+            cache.put(key, tags)
+        cache.flush()
+
+    return [tags if tags is not None else predicted[key] for key, tags in zip(keys, predictions)]
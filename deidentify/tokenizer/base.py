@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Iterable
+from typing import Iterable, Iterator
 
 import spacy
 from loguru import logger
@@ -23,6 +23,30 @@ class Tokenizer(ABC):
     def parse_text(self, text: str) -> spacy.tokens.doc.Doc:
         pass
 
+    def parse_texts(self, texts: Iterable[str], batch_size: int = 128,
+                    n_process: int = 1) -> Iterator[spacy.tokens.doc.Doc]:
+        """Parse a stream of texts. The docs are yielded in the same order as the texts.
+
+        This default implementation calls `parse_text` for each text. Subclasses that are backed by
+        a spaCy pipeline override it to use the batched `nlp.pipe`.
+
+        Parameters
+        ----------
+        texts : Iterable[str]
+            The texts to tokenize.
+        batch_size : int
+            Number of texts to buffer per batch.
+        n_process : int
+            Number of processes to use for parsing (only supported by spaCy-backed tokenizers).
+
+        Returns
+        -------
+        Iterator[spacy.tokens.doc.Doc]
+            Parsed spacy documents.
+        """
+        for text in texts:
+            yield self.parse_text(text)
+
 
 class TokenizerFactory():
     """Construct tokenizer instance per corpus. Currently, only the 'ons' corpus uses a custom
@@ -1,3 +1,5 @@
+from typing import Iterable, Iterator
+
 import spacy
 
 from deidentify.tokenizer import Tokenizer
@@ -9,3 +11,7 @@ class TokenizerFR(Tokenizer):
 
     def parse_text(self, text: str) -> spacy.tokens.doc.Doc:
         return NLP(text)
+
+    def parse_texts(self, texts: Iterable[str], batch_size: int = 128,
+                    n_process: int = 1) -> Iterator[spacy.tokens.doc.Doc]:
+        return NLP.pipe(texts, batch_size=batch_size, n_process=n_process)
@@ -5,6 +5,7 @@ Custom tokenization routines for the 'ons' corpus. Special care is taken to meta
 They will be properly handled during the tokenization and sentence segmentation stage.
 """
 import re
+from typing import Iterable, Iterator
 
 import spacy
 from spacy.matcher import Matcher
@@ -86,6 +87,47 @@ infix_regex = spacy.util.compile_infix_regex(infixes)
 NLP.tokenizer.infix_finditer = infix_regex.finditer
 
 
+METADATA_MATCHER = Matcher(NLP.vocab)
+METADATA_MATCHER.add("METADATA", [[
+    {"ORTH": "="}, {"ORTH": "="}, {"ORTH": "="},
+    {"ORTH": {"IN": ['Answer', 'Report']}}, {'ORTH': ':'},
+    {'IS_DIGIT': True, 'OP': '+'},
+    {"ORTH": "="}, {"ORTH": "="}, {"ORTH": "="},
+    {"ORTH": "\n"}
+]])
+
+
+def _merge_metadata_tokens(doc):
+    """Pipeline component that merges the tokens of each metadata span
+    (e.g., "=== Report: 1234 ===\n") into one token.
+
+    Most documents do not contain any metadata. For those, the matcher and the retokenizer are
+    skipped entirely.
+    """
+    if not META_REGEX.search(doc.text):
+        return doc
+
+    matches = METADATA_MATCHER(doc)
+    if not matches:
+        return doc
+
+    with doc.retokenize() as retokenizer:
+        for _, start, end in matches:
+            attrs = {"LEMMA": str(doc[start:end])}
+            retokenizer.merge(doc[start:end], attrs=attrs)
+
+    return doc
+
+
+try:
+    NLP.add_pipe(_merge_metadata_tokens, name='merge-metadata', last=True)
+except ValueError:
+    # spacy>=3
+    from spacy.language import Language
+    Language.component('merge-metadata')(_merge_metadata_tokens) # pylint: disable=E1101
+    NLP.add_pipe('merge-metadata', last=True)
+
+
 class TokenizerOns(Tokenizer):
 
     def parse_text(self, text: str) -> spacy.tokens.doc.Doc:
@@ -107,22 +149,9 @@ class TokenizerOns(Tokenizer):
         doc : spacy.tokens.doc.Doc
             Parsed spacy document.
         """
-        matcher = Matcher(NLP.vocab)
-        pattern = [
-            {"ORTH": "="}, {"ORTH": "="}, {"ORTH": "="},
-            {"ORTH": {"IN": ['Answer', 'Report']}}, {'ORTH': ':'},
-            {'IS_DIGIT': True, 'OP': '+'},
-            {"ORTH": "="}, {"ORTH": "="}, {"ORTH": "="},
-            {"ORTH": "\n"}
-        ]
-        matcher.add("METADATA", [pattern])
-
-        doc = NLP(text, disable=self.disable)
-        matches = matcher(doc)
-
-        with doc.retokenize() as retokenizer:
-            for _, start, end in matches:
-                attrs = {"LEMMA": str(doc[start:end])}
-                retokenizer.merge(doc[start:end], attrs=attrs)
+        return NLP(text, disable=self.disable)
 
-        return doc
+    def parse_texts(self, texts: Iterable[str], batch_size: int = 128,
+                    n_process: int = 1) -> Iterator[spacy.tokens.doc.Doc]:
+        """Batched version of `parse_text` using `nlp.pipe`. Docs are yielded in input order."""
+        return NLP.pipe(texts, batch_size=batch_size, n_process=n_process, disable=self.disable)
@@ -1,109 +1,335 @@
+"""Offline efficiency benchmark of the de-identification pipeline.
+
+The benchmark runs on synthetic Dutch clinical notes that are generated from the surrogate resources
+(names, places and streets), so it requires neither network access nor real patient data. For each
+tagger, the pipeline stages (tokenization, featurization, inference, standoff conversion) are timed
+separately using the profiling hooks of the taggers (see `deidentify.profiling`). Masking and
+surrogate generation are timed on the gold annotations of the notes.
+
+Reported per tagger:
+    - time per stage
+    - end-to-end throughput (docs/s, tokens/s)
+    - per-document latency percentiles (p50/p90/p99)
+    - peak resident set size of the process after the tagger was benchmarked
+
+All results are written to `<benchmark_name>.json` for regression tracking.
+
+Usage:
+    python -m scripts.benchmark benchmark_cpu --n_docs 500 --phi_density 0.3 \
+        --crf_model model_crf_ons_tuned-v0.2.0 --flair_model model_bilstmcrf_ons_fast-v0.2.0
+
+Models are looked up in the local model cache (or taken from a path) and are never downloaded when
+they are not given explicitly.
+"""
 import argparse
+import json
+import platform
+import resource
+import string
+import sys
 from timeit import default_timer as timer
-from typing import List
+from typing import Callable, Dict, List
 
 import numpy as np
-import pandas as pd
-import torch
-from flair.datasets import CONLL_03_DUTCH
 from loguru import logger
 from tqdm import tqdm
 
-from deidentify.base import Document
-from deidentify.taggers import CRFTagger, DeduceTagger, FlairTagger, TextTagger
+import deidentify
+from deidentify.base import Annotation, Document
+from deidentify.profiling import Profiler
+from deidentify.surrogates.generators.location import LocationDatabase
+from deidentify.surrogates.generators.name import NameDatabase
+from deidentify.taggers import CRFTagger, DeduceTagger, TextTagger
 from deidentify.tokenizer import TokenizerFactory
+from deidentify.util import mask_annotations, surrogate_annotations
 
-N_REPETITIONS = 5
-N_SENTS = 5000
+FILLER_SENTENCES = [
+    'Cliënt heeft vannacht goed geslapen.',
+    'Mevrouw had vanochtend weinig trek in het ontbijt.',
+    'Wondverzorging volgens protocol uitgevoerd, de wond ziet er rustig uit.',
+    'Medicatie is om 08:00 uur gegeven en ingenomen.',
+    'Bloeddruk gemeten, geen bijzonderheden.',
+    'Dhr. was onrustig tijdens de avonddienst en liep veel op de gang.',
+    'Afspraak gemaakt met de fysiotherapeut voor volgende week.',
+    'Familie is telefonisch op de hoogte gebracht.',
+    'Cliënt geeft aan pijn te hebben in de linkerknie (zie ook vorige rapportage).',
+    'Zorgplan besproken in het multidisciplinair overleg, doelen blijven ongewijzigd.',
+    'Mw. heeft vandaag deelgenomen aan de dagbesteding en maakte een tevreden indruk.',
+    'Advies: voldoende drinken en blijven bewegen.',
+]
 
+PHI_TEMPLATES = [
+    'Gesprek gehad met {Name} over de dagbesteding.',
+    'Dochter {Name} heeft gebeld ({Phone_fax}).',
+    'Cliënt is op {Date} opgenomen in het {Hospital}.',
+    'Mevrouw is {Age} oud en woont in {Address}.',
+    'Verslag is verstuurd naar {Email}.',
+    'Cliëntnummer {ID} doorgegeven aan de huisarts.',
+    'Dhr. {Name} gaat op {Date} verhuizen naar {Address}.',
+    'Overleg met {Name} en {Name} gepland op {Date}.',
+]
 
-def load_data():
-    corpus = CONLL_03_DUTCH()
-    sentences = corpus.train[:N_SENTS]
-    tokens = sum(len(sent) for sent in sentences)
-    docs = [Document(name='', text=sent.to_plain_string(), annotations=[]) for sent in sentences]
-    return docs, tokens
+HOSPITALS = ['UMCU', 'Radboudumc', 'Isala', 'Gelre ziekenhuis', 'Maasstad Ziekenhuis']
+MONTHS = ['januari', 'februari', 'maart', 'april', 'mei', 'juni', 'juli', 'augustus', 'september',
+          'oktober', 'november', 'december']
 
 
-def benchmark_tagger(tagger: TextTagger, docs: List[Document], num_tokens: int):
-    durations = []
+class SyntheticNoteGenerator:
+    """Generate Dutch clinical notes with gold PHI annotations.
+
+    Each note consists of a number of sentences (Poisson distributed around `sentences_per_doc`).
+    With probability `phi_density`, a sentence is drawn from templates that contain PHI, otherwise a
+    PHI-free filler sentence is used. Names and locations are sampled from the surrogate resources.
+
+    Parameters
+    ----------
+    sentences_per_doc : int
+        Average number of sentences per note.
+    phi_density : float
+        Probability that a sentence contains PHI.
+    metadata_probability : float
+        Probability that a note starts with an `=== Report: N ===` metadata line.
+    seed : int
+        Random seed.
+    """
+
+    def __init__(self, sentences_per_doc=15, phi_density=0.3, metadata_probability=0.5, seed=42):
+        self.sentences_per_doc = sentences_per_doc
+        self.phi_density = phi_density
+        self.metadata_probability = metadata_probability
+        self.rng = np.random.RandomState(seed)
+
+        name_database = NameDatabase()
+        self.firstnames = [name for index in (name_database.male_index, name_database.female_index)
+                           for names in index.values() for name in names]
+        self.lastnames = [' '.join(part for part in name if part)
+                          for names in name_database.lastname_index.values() for name in names]
+
+        location_database = LocationDatabase()
+        self.places = [place for place in location_database.places if isinstance(place, str)]
+        self.streets = [street for street in location_database.streetnames
+                        if isinstance(street, str)]
+
+        self.phi_generators: Dict[str, Callable[[], str]] = {
+            'Name': self._name,
+            'Date': self._date,
+            'Age': lambda: '{} jaar'.format(self.rng.randint(18, 100)),
+            'Phone_fax': lambda: '06-{:08d}'.format(self.rng.randint(0, 10 ** 8)),
+            'Email': self._email,
+            'ID': lambda: str(self.rng.randint(10 ** 6, 10 ** 7)),
+            'Hospital': lambda: self._choice(HOSPITALS),
+            'Address': self._address,
+        }
+
+    def _choice(self, values):
+        return values[self.rng.randint(len(values))]
+
+    def _name(self):
+        return '{} {}'.format(self._choice(self.firstnames), self._choice(self.lastnames))
+
+    def _email(self):
+        return '{}.{}@example.com'.format(self._choice(self.firstnames).lower(),
+                                          self.rng.randint(100))
+
+    def _date(self):
+        day, month = self.rng.randint(1, 29), self.rng.randint(1, 13)
+        year = self.rng.randint(1950, 2021)
+        if self.rng.rand() < 0.5:
+            return '{} {} {}'.format(day, MONTHS[month - 1], year)
+        return '{:02d}-{:02d}-{}'.format(day, month, year)
+
+    def _address(self):
+        return '{} {}, {}'.format(self._choice(self.streets), self.rng.randint(1, 200),
+                                  self._choice(self.places))
+
+    def _sentence(self, text, annotations, template):
+        for literal, field, _, _ in string.Formatter().parse(template):
+            text += literal
+            if field is None:
+                continue
+            value = self.phi_generators[field]()
+            annotations.append(Annotation(text=value, start=len(text), end=len(text) + len(value),
+                                          tag=field, ann_id='T{}'.format(len(annotations))))
+            text += value
+        return text
+
+    def note(self, name: str) -> Document:
+        text = ''
+        annotations = []
+
+        if self.rng.rand() < self.metadata_probability:
+            text += '=== Report: {} ===\n'.format(self.rng.randint(10 ** 4, 10 ** 6))
+
+        n_sentences = max(1, self.rng.poisson(self.sentences_per_doc))
+        for i in range(n_sentences):
+            if i > 0:
+                text += '\n' if self.rng.rand() < 0.2 else ' '
+
+            if self.rng.rand() < self.phi_density:
+                text = self._sentence(text, annotations, self._choice(PHI_TEMPLATES))
+            else:
+                text += self._choice(FILLER_SENTENCES)
+
+        return Document(name=name, text=text, annotations=annotations)
+
+    def notes(self, n_docs: int) -> List[Document]:
+        return [self.note(name='doc_{:05d}'.format(i)) for i in range(n_docs)]
+
 
-    for _ in tqdm(range(0, N_REPETITIONS), desc='Repetitions'):
+def stage_summary(profiler: Profiler, n_docs: int, repetitions: int):
+    return {
+        stage.name: {
+            'mean_s': stage.total_seconds / repetitions,
+            'ms_per_doc': 1000 * stage.total_seconds / repetitions / n_docs,
+            'calls_per_repetition': stage.calls / repetitions,
+        }
+        for stage in profiler.stats.stages
+    }
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return rss / 1024 ** 2 if sys.platform == 'darwin' else rss / 1024
+
+
+def benchmark_tagger(tagger: TextTagger, docs: List[Document], num_tokens: int,
+                     repetitions: int, latency_docs: int):
+    # Stage timings are recorded in separate runs so that the end-to-end measurements below are not
+    # affected by the instrumentation.
+    profiler = tagger.enable_profiling()
+    for _ in tqdm(range(repetitions), desc='Stages'):
+        tagger.annotate(docs)
+    tagger.disable_profiling()
+
+    durations = []
+    for _ in tqdm(range(repetitions), desc='End-to-end'):
         start = timer()
         tagger.annotate(docs)
-        end = timer()
-        durations.append(end - start)
+        durations.append(timer() - start)
 
-        if isinstance(tagger, FlairTagger) and torch.cuda.is_available():
-            torch.cuda.empty_cache()
+    latencies = []
+    for doc in tqdm(docs[:latency_docs], desc='Latency'):
+        start = timer()
+        tagger.annotate([doc])
+        latencies.append(1000 * (timer() - start))
 
+    mean_duration = float(np.mean(durations))
     return {
-        'mean': np.mean(durations),
-        'std': np.std(durations),
-        'tokens/s': num_tokens / np.mean(durations),
-        'docs/s': len(docs) / np.mean(durations),
-        'num_docs': len(docs),
-        'num_tokens': num_tokens
+        'stages': stage_summary(profiler, n_docs=len(docs), repetitions=repetitions),
+        'end_to_end': {
+            'mean_s': mean_duration,
+            'std_s': float(np.std(durations)),
+            'docs/s': len(docs) / mean_duration,
+            'tokens/s': num_tokens / mean_duration,
+        },
+        'latency_ms': {
+            'n_docs': len(latencies),
+            'p50': float(np.percentile(latencies, 50)),
+            'p90': float(np.percentile(latencies, 90)),
+            'p99': float(np.percentile(latencies, 99)),
+        },
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def benchmark_postprocessing(docs: List[Document], repetitions: int):
+    profiler = Profiler()
+    for _ in tqdm(range(repetitions), desc='Masking/surrogates'):
+        with profiler.stage('masking'):
+            for doc in docs:
+                mask_annotations(doc)
+
+        with profiler.stage('surrogate_generation'):
+            list(surrogate_annotations(docs, errors='coerce'))
+
+    return {
+        'stages': stage_summary(profiler, n_docs=len(docs), repetitions=repetitions),
+        'peak_rss_mb': peak_rss_mb()
     }
 
 
 def main(args):
-    logger.info('Load data...')
-    documents, num_tokens = load_data()
-
-    logger.info('Initialize taggers...')
-    tokenizer_crf = TokenizerFactory().tokenizer(corpus='ons', disable=())
-    tokenizer_bilstm = TokenizerFactory().tokenizer(corpus='ons', disable=("tagger", "ner"))
-
-    taggers = [
-        ('DEDUCE', DeduceTagger(verbose=True)),
-        ('CRF', CRFTagger(
-            model='model_crf_ons_tuned-v0.1.0',
-            tokenizer=tokenizer_crf,
-            verbose=True
-        )),
-        ('BiLSTM-CRF (large)', FlairTagger(
-            model='model_bilstmcrf_ons_large-v0.1.0',
-            tokenizer=tokenizer_bilstm,
-            mini_batch_size=args.bilstmcrf_large_batch_size,
-            verbose=True
-        )),
-        ('BiLSTM-CRF (fast)', FlairTagger(
-            model='model_bilstmcrf_ons_fast-v0.1.0',
+    logger.info('Generate {} synthetic notes...'.format(args.n_docs))
+    generator = SyntheticNoteGenerator(
+        sentences_per_doc=args.sentences_per_doc,
+        phi_density=args.phi_density,
+        seed=args.seed
+    )
+    docs = generator.notes(args.n_docs)
+
+    tokenizer = TokenizerFactory().tokenizer(corpus='ons', disable=())
+    num_tokens = sum(len(parsed) for parsed in tokenizer.parse_texts(doc.text for doc in docs))
+
+    taggers = [('DEDUCE', DeduceTagger())]
+    if args.crf_model:
+        taggers.append(('CRF', CRFTagger(model=args.crf_model, tokenizer=tokenizer)))
+    if args.flair_model:
+        from deidentify.taggers import FlairTagger
+        tokenizer_bilstm = TokenizerFactory().tokenizer(corpus='ons', disable=('tagger', 'ner'))
+        flair_tagger = FlairTagger(
+            model=args.flair_model,
             tokenizer=tokenizer_bilstm,
-            mini_batch_size=args.bilstmcrf_fast_batch_size,
-            verbose=True
-        ))
-    ]
+            mini_batch_size=args.flair_batch_size,
+            max_tokens_per_batch=args.flair_max_tokens_per_batch
+        )
+        taggers.append(('BiLSTM-CRF', flair_tagger))
 
-    benchmark_results = []
-    tagger_names = []
+    results = {}
     for tagger_name, tagger in taggers:
-        logger.info(f'Benchmark inference for tagger: {tagger_name}')
-        scores = benchmark_tagger(tagger, documents, num_tokens)
-        benchmark_results.append(scores)
-        tagger_names.append(tagger_name)
+        logger.info('Benchmark tagger: {}'.format(tagger_name))
+        results[tagger_name] = benchmark_tagger(tagger, docs, num_tokens,
+                                                repetitions=args.repetitions,
+                                                latency_docs=args.latency_docs)
+
+    logger.info('Benchmark masking and surrogate generation')
+    results['postprocessing'] = benchmark_postprocessing(docs, repetitions=args.repetitions)
+
+    report = {
+        'benchmark_name': args.benchmark_name,
+        'config': vars(args),
+        'environment': {
+            'deidentify': deidentify.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+        },
+        'data': {
+            'num_docs': len(docs),
+            'num_tokens': num_tokens,
+            'num_chars': sum(len(doc.text) for doc in docs),
+            'num_annotations': sum(len(doc.annotations) for doc in docs),
+        },
+        'results': results,
+    }
 
-    df = pd.DataFrame(data=benchmark_results, index=tagger_names)
-    df.to_csv(f'{args.benchmark_name}.csv')
-    logger.info('\n{}', df)
+    out_file = '{}.json'.format(args.benchmark_name)
+    with open(out_file, 'w') as file:
+        json.dump(report, file, indent=2)
+    logger.info('Wrote benchmark results to {}'.format(out_file))
+    logger.info('\n{}', json.dumps(results, indent=2))
 
 
 def arg_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument("benchmark_name", type=str, help="Name of the benchmark.")
-    parser.add_argument(
-        "--bilstmcrf_large_batch_size",
-        type=int,
-        help="Batch size to use with the large model.",
-        default=256
-    )
-    parser.add_argument(
-        "--bilstmcrf_fast_batch_size",
-        type=int,
-        help="Batch size to use with the fast model.",
-        default=256
-    )
+    parser.add_argument("--n_docs", type=int, default=500, help="Number of synthetic notes.")
+    parser.add_argument("--sentences_per_doc", type=int, default=15,
+                        help="Average number of sentences per note.")
+    parser.add_argument("--phi_density", type=float, default=0.3,
+                        help="Probability that a sentence contains PHI.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the note generator.")
+    parser.add_argument("--repetitions", type=int, default=3, help="Repetitions per measurement.")
+    parser.add_argument("--latency_docs", type=int, default=100,
+                        help="Number of documents that are tagged one by one to measure latency.")
+    parser.add_argument("--crf_model", type=str, default=None,
+                        help="CRF model name or path. The CRF is skipped if not given.")
+    parser.add_argument("--flair_model", type=str, default=None,
+                        help="BiLSTM-CRF model name or path. Skipped if not given.")
+    parser.add_argument("--flair_batch_size", type=int, default=256,
+                        help="Mini-batch size of the BiLSTM-CRF.")
+    parser.add_argument("--flair_max_tokens_per_batch", type=int, default=None,
+                        help="Padded token budget per BiLSTM-CRF batch.")
     return parser.parse_args()
 
 
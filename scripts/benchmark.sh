@@ -2,20 +2,24 @@
 
 set -e
 
+MODELS="--crf_model model_crf_ons_tuned-v0.2.0 --flair_model model_bilstmcrf_ons_fast-v0.2.0"
+
 export CUDA_VISIBLE_DEVICES=0
 # Smaller batch size so that sequences with Flair embeddings fit in GPU memory.
-python -m scripts.benchmark benchmark_gpu \
-    --bilstmcrf_large_batch_size 64 \
-    --bilstmcrf_fast_batch_size 64
+python -m scripts.benchmark benchmark_gpu $MODELS --flair_batch_size 64
 
 export CUDA_VISIBLE_DEVICES=""
 export MKL_NUM_THREADS=32
-python -m scripts.benchmark benchmark_cpu_32_threads
+python -m scripts.benchmark benchmark_cpu_32_threads $MODELS
 
 export CUDA_VISIBLE_DEVICES=""
 export MKL_NUM_THREADS=16
-python -m scripts.benchmark benchmark_cpu_16_threads
+python -m scripts.benchmark benchmark_cpu_16_threads $MODELS
 
 export CUDA_VISIBLE_DEVICES=""
 export MKL_NUM_THREADS=8
-python -m scripts.benchmark benchmark_cpu_8_threads
+python -m scripts.benchmark benchmark_cpu_8_threads $MODELS
+
+# Sensitivity to document length and PHI density
+python -m scripts.benchmark benchmark_cpu_long_notes $MODELS --sentences_per_doc 60
+python -m scripts.benchmark benchmark_cpu_dense_phi $MODELS --phi_density 0.8
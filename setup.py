@@ -40,7 +40,8 @@ setuptools.setup(
         '': ['LICENSE'],
         'deidentify': [
             'surrogates/generators/resources/*.csv',
-            'surrogates/generators/resources/*.txt'
+            'surrogates/generators/resources/*.txt',
+            'surrogates/generators/resources/*.npz'
         ]
     },
     license="MIT License",
@@ -1,3 +1,4 @@
+from deidentify.base import Document
 from deidentify.dataset import corpus_loader
 
 
@@ -11,3 +12,54 @@ def test_corpus_loader_dummy_corpus():
 
     assert len(corpus.train[0].text) >= 500
     assert len(corpus.train[0].annotations) == 16
+
+
+def test_corpus_loader_lazy():
+    loader = corpus_loader.CorpusLoader()
+    eager = loader.load_corpus(corpus_loader.DUMMY_CORPUS)
+    corpus = loader.load_corpus(corpus_loader.DUMMY_CORPUS, lazy=True, cache_size=1)
+
+    assert isinstance(corpus.train, corpus_loader.LazyDocuments)
+    assert len(corpus.train) == 1
+    assert corpus.train.names == [eager.train[0].name]
+
+    doc = corpus.train[0]
+    assert doc.text == eager.train[0].text
+    assert doc.annotations == eager.train[0].annotations
+    # Served from the cache
+    assert corpus.train[0] is doc
+
+    all_docs = corpus.train + corpus.dev + corpus.test
+    assert isinstance(all_docs, corpus_loader.LazyDocuments)
+    assert [d.name for d in all_docs] == [d.name for d in eager.train + eager.dev + eager.test]
+    assert len(all_docs[1:]) == 2
+
+    mixed = eager.train + corpus.dev
+    assert [d.name for d in mixed] == [d.name for d in eager.train + eager.dev]
+
+
+def test_lazy_documents_cache():
+    class CountingRef:
+        def __init__(self, name):
+            self.name = name
+            self.loads = 0
+
+        def load(self):
+            self.loads += 1
+            return Document(name=self.name, text='')
+
+    refs = [CountingRef('a'), CountingRef('b'), CountingRef('c')]
+    docs = corpus_loader.LazyDocuments(refs, cache_size=2)
+    list(docs)
+    list(docs)
+    # LRU cache of size 2 is exceeded in each pass
+    assert [ref.loads for ref in refs] == [2, 2, 2]
+
+    docs[2]
+    docs[1]
+    assert [ref.loads for ref in refs] == [2, 2, 2]
+
+    uncached = corpus_loader.LazyDocuments(refs)
+    uncached[0]
+    uncached[0]
+    assert refs[0].loads == 4
@@ -0,0 +1,98 @@
+from os.path import join
+
+import pytest
+
+from deidentify.base import Annotation, Document
+from deidentify.dataset import corpus_loader, packed
+from deidentify.evaluation import evaluate_run
+
+
+def _assert_same_documents(actual, expected):
+    assert [doc.name for doc in actual] == [doc.name for doc in expected]
+    for doc_actual, doc_expected in zip(actual, expected):
+        assert doc_actual.text == doc_expected.text
+        assert doc_actual.annotations == doc_expected.annotations
+
+
+def test_packed_roundtrip(tmpdir):
+    docs = [
+        Document(name='a', text='Patiënt Jan Jansen\r\n', annotations=[
+            Annotation(text='Jan Jansen', start=8, end=18, tag='Name', doc_id='a', ann_id='T1')
+        ]),
+        Document(name='b', text='', annotations=[]),
+    ]
+
+    path = join(str(tmpdir), 'docs.pack')
+    packed.write_packed_documents(path, docs)
+    assert packed.is_packed(path)
+    assert not packed.is_packed(str(tmpdir))
+
+    packed_corpus = packed.PackedCorpus(path)
+    assert len(packed_corpus) == 2
+    assert packed_corpus.names() == ['a', 'b']
+    assert packed_corpus.text('a') == docs[0].text
+    assert packed_corpus.document('a').annotations[0].ann_id == 'T1'
+    _assert_same_documents(packed_corpus.documents(), docs)
+    _assert_same_documents(packed_corpus.documents(lazy=True), docs)
+
+    with pytest.raises(KeyError):
+        packed_corpus.document('c')
+
+
+def test_packed_writer_rejects_duplicates(tmpdir):
+    with packed.PackedWriter(join(str(tmpdir), 'docs.pack')) as writer:
+        writer.add(Document(name='a', text='', annotations=[]), split='train')
+        writer.add(Document(name='a', text='', annotations=[]), split='test')
+        with pytest.raises(ValueError):
+            writer.add(Document(name='a', text='', annotations=[]), split='train')
+
+
+def test_brat_corpus_conversion(tmpdir):
+    path = join(str(tmpdir), 'dummy.pack')
+    packed.brat_to_packed(corpus_loader.DUMMY_CORPUS, path)
+
+    expected = corpus_loader.CorpusLoader().load_corpus(corpus_loader.DUMMY_CORPUS)
+    corpus = corpus_loader.CorpusLoader().load_corpus(path)
+    assert corpus.name == 'dummy'
+    _assert_same_documents(corpus.train, expected.train)
+    _assert_same_documents(corpus.dev, expected.dev)
+    _assert_same_documents(corpus.test, expected.test)
+
+    unpacked_path = join(str(tmpdir), 'unpacked')
+    packed.packed_to_brat(path, unpacked_path)
+    unpacked = corpus_loader.CorpusLoader().load_corpus(unpacked_path)
+    _assert_same_documents(unpacked.train, expected.train)
+    _assert_same_documents(unpacked.test, expected.test)
+
+
+def test_evaluate_run_packed_documents(tmpdir):
+    gold = corpus_loader.CorpusLoader().load_corpus(corpus_loader.DUMMY_CORPUS).train
+    predicted = [Document(name=doc.name, text=doc.text, annotations=doc.annotations[:2])
+                 for doc in gold]
+
+    gold_path = join(str(tmpdir), 'gold.pack')
+    pred_path = join(str(tmpdir), 'pred.pack')
+    packed.write_packed_documents(gold_path, gold)
+    packed.write_packed_documents(pred_path, predicted)
+
+    _assert_same_documents(evaluate_run.get_documents(gold_path, pred_path), predicted)
+    _assert_same_documents(evaluate_run.get_documents(gold_path, gold_path, lazy=True), gold)
+
+
+def test_evaluate_run_packed_splits(tmpdir):
+    gold_path = join(str(tmpdir), 'dummy.pack')
+    packed.brat_to_packed(corpus_loader.DUMMY_CORPUS, gold_path)
+    gold = corpus_loader.CorpusLoader().load_corpus(corpus_loader.DUMMY_CORPUS).test
+
+    pred_path = join(str(tmpdir), 'pred.pack')
+    packed.write_packed_documents(pred_path, gold)
+
+    _assert_same_documents(evaluate_run.get_documents(gold_path, pred_path, split='test'), gold)
+    _assert_same_documents(evaluate_run.get_documents(gold_path, gold_path, split='test'), gold)
+
+    with pytest.raises(ValueError, match='Select one of them'):
+        evaluate_run.get_documents(gold_path, pred_path)
+
+    with pytest.raises(ValueError,
+                       match='Missing texts: example-2. Missing annotations: example-1'):
+        evaluate_run.get_documents(gold_path, pred_path, split='train')
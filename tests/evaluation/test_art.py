@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from deidentify.base import Annotation, Document
+from deidentify.evaluation import significance_testing
+from deidentify.evaluation.art import ApproximateRandomizationTest
+from deidentify.evaluation.evaluator import Evaluator
+
+
+def _documents(n_docs, annotated):
+    return [
+        Document(name='doc_{}'.format(i), text='', annotations=[
+            Annotation('', 0, 2, 'PER'), Annotation('', 4, 6, 'LOC')
+        ][:annotated + i % 2])
+        for i in range(n_docs)
+    ]
+
+
+def test_count_metrics():
+    gold = _documents(5, annotated=1)
+    predicted = [
+        Document(name=doc.name, text='', annotations=[Annotation('', 0, 3, 'PER')])
+        if i == 0 else doc
+        for i, doc in enumerate(_documents(5, annotated=0))
+    ]
+
+    counts = significance_testing.entity_counts(gold, predicted)
+    assert counts.tolist() == [[0, 1, 1], [1, 0, 1], [0, 0, 1], [1, 0, 1], [0, 0, 1]]
+
+    scores = Evaluator(gold, predicted).entity_level()
+    assert significance_testing.micro_f1(gold, predicted) == scores.f_score()
+    assert significance_testing.micro_precision(gold, predicted) == scores.precision()
+    assert significance_testing.micro_recall(gold, predicted) == scores.recall()
+
+
+@pytest.mark.parametrize('vectorized', [True, False])
+def test_approximate_randomization_test(vectorized):
+    np.random.seed(42)
+    gold = _documents(20, annotated=1)
+    empty = _documents(20, annotated=0)
+
+    metric = significance_testing.micro_f1
+    if not vectorized:
+        metric = lambda gold, predicted: significance_testing.micro_f1(gold, predicted)
+
+    art = ApproximateRandomizationTest(gold, gold, empty, metric, trials=200)
+    assert art.vectorized == vectorized
+    assert art.run() < 0.01
+
+    art = ApproximateRandomizationTest(gold, gold, gold, metric, trials=200)
+    assert art.run() == 1
+
+
+def test_vectorized_test_requires_count_metric():
+    with pytest.raises(ValueError):
+        ApproximateRandomizationTest([], [], [], max, vectorized=True)
@@ -1,5 +1,7 @@
+import pytest
+
 from deidentify.base import Annotation, Document
-from deidentify.evaluation.evaluator import ENTITY_TAG, Evaluator
+from deidentify.evaluation.evaluator import ENTITY_TAG, Evaluator, clear_token_cache
 
 
 def test_entity_level():
@@ -84,3 +86,108 @@ def test_token_level_blind():
     assert scores.precision(ENTITY_TAG) == 1
     assert scores.recall(ENTITY_TAG) == 0.6667
     assert scores.f_score(ENTITY_TAG) == 0.8
+
+
+def test_token_boundaries_are_cached(monkeypatch):
+    clear_token_cache()
+    evaluator = Evaluator(gold=(), predicted=())
+
+    parsed = []
+    parse_texts = evaluator.tokenizer.parse_texts
+
+    def counting_parse_texts(texts, **kwargs):
+        texts = list(texts)
+        parsed.extend(texts)
+        return parse_texts(texts, **kwargs)
+
+    monkeypatch.setattr(evaluator.tokenizer, 'parse_texts', counting_parse_texts)
+
+    docs = [
+        Document(name='doc_a', text='A B C D.', annotations=[Annotation('B C', 2, 5, 'PER')]),
+        Document(name='doc_b', text='A B C D.', annotations=[]),
+        Document(name='doc_c', text='E F', annotations=[Annotation('F', 2, 3, 'ORG')]),
+    ]
+    assert evaluator.documents_token_annotations(docs) == [
+        ['O', 'PER', 'PER', 'O'], ['O', 'O', 'O', 'O'], ['O', 'ORG']]
+    assert parsed == ['A B C D.', 'E F']
+
+    # A new evaluator re-uses the boundaries
+    evaluator = Evaluator(gold=docs, predicted=docs)
+    evaluator.token_level()
+    evaluator.token_level_blind()
+    assert parsed == ['A B C D.', 'E F']
+
+
+def test_token_annotations_misaligned_and_overlapping():
+    evaluator = Evaluator(gold=(), predicted=())
+    doc = Document(name='doc_a', text='A BC D.', annotations=[Annotation('C', 3, 4, 'PER')])
+    with pytest.warns(UserWarning):
+        assert evaluator.token_annotations(doc) == ['O', 'O', 'O']
+
+    doc = Document(name='doc_a', text='A B C D.', annotations=[
+        Annotation('B C', 2, 5, 'PER'), Annotation('C', 4, 5, 'PER')])
+    with pytest.raises(ValueError):
+        evaluator.token_annotations(doc)
+
+
+def test_add_document():
+    text = 'A B C D.'
+    gold = [
+        Document(name='doc_a', text=text, annotations=[Annotation('B C', 2, 5, 'PER')]),
+        Document(name='doc_b', text=text, annotations=[Annotation('A', 0, 1, 'ORG'),
+                                                       Annotation('B', 2, 3, 'PER')])
+    ]
+    predicted = [
+        Document(name='doc_a', text=text, annotations=[Annotation('B', 2, 3, 'PER'),
+                                                       Annotation('C', 4, 5, 'PER')]),
+        Document(name='doc_b', text=text, annotations=[Annotation('A', 0, 1, 'ORG'),
+                                                       Annotation('B', 2, 3, 'ORG')])
+    ]
+
+    expected = Evaluator(gold, predicted)
+    streaming = Evaluator(gold=[], predicted=[])
+    for gold_doc, pred_doc in zip(gold, predicted):
+        streaming.add_document(gold_doc, pred_doc)
+
+    assert streaming.tags == expected.tags == ['ORG', 'PER']
+    for method in ('entity_level', 'token_level', 'token_level_blind'):
+        assert str(getattr(streaming, method)()) == str(getattr(expected, method)())
+
+
+def test_token_level_without_entities():
+    docs = [Document(name='doc_a', text='A B C D.', annotations=[])]
+    evaluator = Evaluator(docs, docs)
+
+    assert evaluator.tags == []
+    scores = evaluator.token_level_blind()
+    assert scores.get_tn(ENTITY_TAG) == 4
+    assert scores.get_tp(ENTITY_TAG) == 0
+
+
+def test_token_level_counts_documents_in_batches(monkeypatch):
+    class Documents:
+        def __init__(self, docs):
+            self.docs = docs
+            self.n_loaded = 0
+
+        def __iter__(self):
+            for doc in self.docs:
+                self.n_loaded += 1
+                yield doc
+
+    docs = [Document(name=str(i), text='A B.', annotations=[]) for i in range(300)]
+    gold, predicted = Documents(docs), Documents(docs)
+    evaluator = Evaluator(gold, predicted)
+    gold.n_loaded = 0
+
+    loaded = []
+    count_tokens = evaluator._count_tokens
+
+    def recording_count_tokens(gold_batch, pred_batch):
+        loaded.append(gold.n_loaded)
+        count_tokens(gold_batch, pred_batch)
+
+    monkeypatch.setattr(evaluator, '_count_tokens', recording_count_tokens)
+    evaluator.token_level()
+    # Lazy corpora are not materialized: each batch is counted as soon as it is loaded.
+    assert loaded == [128, 256, 300]
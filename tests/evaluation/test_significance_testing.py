@@ -0,0 +1,51 @@
+import csv
+from os.path import join
+
+from deidentify.base import Annotation
+from deidentify.dataset import brat
+from deidentify.evaluation import significance_testing
+
+
+def _read_rows(path):
+    with open(path) as file:
+        rows = list(csv.reader(file))
+    return rows[0], sorted(rows[1:])
+
+
+def test_significance_report(tmpdir, monkeypatch):
+    text = 'Jan Jansen en Piet Pietersen'
+    jan = Annotation('Jan Jansen', 0, 10, 'Name', ann_id='T1')
+    piet = Annotation('Piet Pietersen', 14, 28, 'Name', ann_id='T2')
+
+    runs = {'gold': [jan, piet], 'run_a': [jan, piet], 'run_b': [jan], 'run_c': []}
+    for run_id, annotations in runs.items():
+        run_path = str(tmpdir.mkdir(run_id))
+        for i in range(10):
+            brat.write_brat_document(run_path, 'doc_{}'.format(i), text, annotations)
+
+    monkeypatch.setattr(significance_testing.SignificanceReport, '_corpus_path',
+                        lambda self: str(tmpdir.join('gold')))
+    monkeypatch.setattr(significance_testing.SignificanceReport, '_predictions_path',
+                        lambda self, run_id: str(tmpdir.join(run_id)))
+
+    results = []
+    for n_jobs in (1, 2):
+        out_dir = str(tmpdir.join('out_{}'.format(n_jobs)))
+        report = significance_testing.SignificanceReport(
+            title='test', corpus='dummy', part='test',
+            runs=[{'run_a': 'run_a', 'run_b': 'run_b'}, {'run_a': 'run_a', 'run_b': 'run_c'}],
+            metrics=[significance_testing.micro_f1, significance_testing.micro_recall],
+            trials=100, n_jobs=n_jobs, out_dir=out_dir)
+        report.make_report()
+        results.append(_read_rows(join(out_dir, 'significance.csv')))
+
+    header, rows = results[0]
+    assert header == ['run_a', 'run_b', 'metric', 'p_value']
+    assert [row[:3] for row in rows] == [
+        ['run_a', 'run_b', 'micro_f1'],
+        ['run_a', 'run_b', 'micro_recall'],
+        ['run_a', 'run_c', 'micro_f1'],
+        ['run_a', 'run_c', 'micro_recall'],
+    ]
+    assert all(float(row[3]) < 0.05 for row in rows)
+    assert results[0] == results[1]
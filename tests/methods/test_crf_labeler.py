@@ -2,8 +2,14 @@ from deidentify.methods.crf.crf_labeler import (SentenceFilterCRF, Token,
                                                 collapse_word_shape,
                                                 has_unmatched_bracket,
                                                 list_window,
-                                                liu_feature_extractor, ngrams,
+                                                liu_feature_extractor,
+                                                liu_sent_features, ngrams,
+                                                predict_sents, sent2features,
+                                                sents_to_features_and_labels,
                                                 word_shape)
+from deidentify.methods.crf.crf_util import (meta_sentence_filter_liu,
+                                             meta_sentence_filter_tokens)
+from deidentify.methods.tagging_utils import SentenceBatch
 
 
 def test_list_window():
@@ -126,6 +132,36 @@ def test_liu_feature_extractor():
     }
 
 
+def test_liu_sent_features():
+    sentence = [
+        Token(text='Mw.', pos_tag='PROPN', label='O', ner_tag=''),
+        Token(text='Jänssen', pos_tag='PROPN', label='O', ner_tag='PER'),
+        Token(text='(', pos_tag='PUNCT', label='O', ner_tag=None),
+        Token(text='\n\n', pos_tag='SPACE', label='O', ner_tag=''),
+        Token(text='a b', pos_tag='X', label='O', ner_tag=''),
+        Token(text='12-12', pos_tag='NUM', label='O', ner_tag=''),
+        Token(text='.', pos_tag='PUNCT', label='O', ner_tag=''),
+    ]
+
+    def per_token_extractor(sent, i):
+        return liu_feature_extractor(sent, i)
+
+    expected = sent2features(sentence, per_token_extractor)
+    actual = liu_sent_features(sentence)
+    assert [list(features.items()) for features in actual] \
+        == [list(features.items()) for features in expected]
+    assert sent2features(sentence, liu_feature_extractor) == expected
+    assert liu_sent_features([]) == []
+
+    batch = SentenceBatch()
+    batch.start_sentence(0)
+    batch.add_tokens(texts=[token.text for token in sentence],
+                     pos_tags=[token.pos_tag for token in sentence],
+                     labels=[token.label for token in sentence],
+                     ner_tags=[token.ner_tag for token in sentence])
+    assert liu_sent_features(batch[0]) == expected
+
+
 def test_crf_labeler_marginals():
     sent1_features = [{'feat1': True, 'feat2': False}] * 4  # sentence will be ignored (see below)
     sent1_labels = ['O', 'B-Name', 'O', 'O']
@@ -158,3 +194,22 @@ def test_crf_labeler_marginals():
     assert y_pred[0] == [ignored_marginals] * 4
     # Second sentence should have non-zero marginals for the other classes
     assert y_pred[1] != [ignored_marginals] * 3
+
+
+def test_predict_sents():
+    def token(text, label):
+        return Token(text=text, pos_tag='X', label=label, ner_tag='')
+
+    sents = [
+        [token('=== Report: 1 ===\n', 'O')],
+        [token('Jan', 'B-Name'), token('Jansen', 'I-Name'), token('komt', 'O')],
+        [token('Op', 'O'), token('10', 'B-Date'), token('mei', 'I-Date')],
+    ]
+    X, y = sents_to_features_and_labels(sents, liu_feature_extractor)
+    crf = SentenceFilterCRF(ignored_label='O', ignore_sentence=meta_sentence_filter_liu)
+    crf.fit(X, y)
+
+    y_pred = predict_sents(crf, sents, liu_feature_extractor,
+                           ignore_sentence=meta_sentence_filter_tokens)
+    assert y_pred == [list(labels) for labels in crf.predict(X)]
+    assert y_pred[0] == ['O']
@@ -1,4 +1,5 @@
 from deidentify.base import Annotation
+from deidentify.methods.deduce import deduce_labeler
 from deidentify.methods.deduce.deduce_labeler import DeduceAnnotator
 
 TEST_TEXT = u"Dit is stukje tekst met daarin de naam Jan Jansen. De patient J. Jansen (e: j.jnsen@email.com, t: 06-12345678) is 64 jaar oud en woonachtig in Utrecht. Hij werd op 10 oktober door arts Peter de Visser ontslagen van de kliniek van het UMCU."
@@ -48,3 +49,17 @@ def test_annotations():
         # Deduce annotates UMCU as umcu. During annotation, we attempt to recover the original text.
         Annotation('UMCU', 234, 238, 'INSTELLING')
     ]
+
+
+def test_lower_preserving_offsets():
+    assert deduce_labeler.lower_preserving_offsets('UMCU Utrecht') == 'umcu utrecht'
+    assert deduce_labeler.lower_preserving_offsets('İstanbul UMCU') == 'İstanbul umcu'
+
+
+def test_annotations_after_changed_length():
+    annotator = DeduceAnnotator(text='İstanbul, Jan Jansen en het UMCU. ' * 3)
+    offsets = [(ann.start, ann.end) for ann in annotator.annotations()]
+    texts = [annotator.text[start:end] for start, end in offsets]
+
+    assert offsets == sorted(offsets)
+    assert texts.count('UMCU') == 3
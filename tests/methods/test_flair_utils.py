@@ -122,12 +122,25 @@ def test_flair_sentence_with_whitespace_tokens():
     # the tokenized representation.
     assert [token.text for token in flair_sents[0]] == ['Mw', 'geniet', 'zichtbaar', '.', '<SPACE>']
 
-    spacy_doc = docs[0].spacy_doc
-    spacy_sents = list(spacy_doc.sents)
     assert len(flair_sents) == 2
-    assert len(spacy_sents) == 2
+    assert len(docs) == 2
+    assert list(docs.token_offsets) == [0, 5]
+    assert len(docs.docs[0].token_starts) == 13
 
     assert len(flair_sents[0]) == 5
-    assert len(spacy_sents[0]) == 5
     assert len(flair_sents[1]) == 8
-    assert len(spacy_sents[1]) == 8
+
+
+def test_length_bucketed_batches():
+    sents = [['a'] * n for n in [1, 10, 3, 2, 3, 1]]
+
+    batches = flair_utils.length_bucketed_batches(sents, mini_batch_size=2)
+    assert [[len(s) for s in batch] for batch in batches] == [[10, 3], [3, 2], [1, 1]]
+
+    batches = flair_utils.length_bucketed_batches(sents, mini_batch_size=None,
+                                                  max_tokens_per_batch=6)
+    assert [[len(s) for s in batch] for batch in batches] == [[10], [3, 3], [2, 1, 1]]
+
+    # Sentence objects are not copied
+    assert all(any(s is sent for sent in sents) for batch in batches for s in batch)
+    assert flair_utils.length_bucketed_batches([], mini_batch_size=2) == []
@@ -0,0 +1,26 @@
+import multiprocessing
+
+from deidentify.base import Annotation, Document
+from deidentify.methods.deduce import run_deduce
+
+
+def test_predict():
+    docs = [Document(name=str(i), text='Jan Jannsen vanuit het UMCU.', annotations=[])
+            for i in range(5)]
+
+    predicted = run_deduce.predict(docs)
+    assert [doc.name for doc in predicted] == [doc.name for doc in docs]
+    assert predicted[0].annotations == [
+        Annotation(text='Jan Jannsen', start=0, end=11, tag='Name', doc_id='', ann_id='T0'),
+        Annotation(text='UMCU', start=23, end=27, tag='Named_Location', doc_id='', ann_id='T1')
+    ]
+
+    predicted_parallel = run_deduce.predict(docs, n_jobs=2, chunk_size=2)
+    assert [doc.annotations for doc in predicted_parallel] == \
+        [doc.annotations for doc in predicted]
+
+    with multiprocessing.Pool(processes=2) as pool:
+        for _ in range(2):
+            predicted_pool = run_deduce.predict(docs, chunk_size=2, pool=pool)
+            assert [doc.annotations for doc in predicted_pool] == \
+                [doc.annotations for doc in predicted]
@@ -1,22 +1,130 @@
-from deidentify.methods.tagging_utils import (ParsedDoc, _bio_to_biluo,
-                                              _group_sentences,
-                                              fix_dangling_entities)
+import pytest
+
+from deidentify.base import Annotation, Document
+from deidentify.methods.tagging_utils import (ParsedDoc, SentenceBatch, SentenceDocs, Token,
+                                              _bio_to_biluo,
+                                              _bio_to_standoff, _group_sentences,
+                                              fix_dangling_entities,
+                                              sents_to_standoff, standoff_to_sents)
+from deidentify.tokenizer import TokenizerFactory
 
 
 def test_group_sentences():
     tags = [['O', 'O'], ['B', 'B'], ['B', 'I']]
-    docs = [
-        ParsedDoc(spacy_doc=None, name='doc_a', text=''),
-        ParsedDoc(spacy_doc=None, name='doc_a', text=''),
-        ParsedDoc(spacy_doc=None, name='doc_b', text='')]
+    docs = SentenceDocs(docs=[
+        ParsedDoc(name='doc_a', text='', token_starts=[], token_ends=[]),
+        ParsedDoc(name='doc_b', text='', token_starts=[], token_ends=[])
+    ], doc_indices=[0, 0, 1], token_offsets=[0, 2, 0])
 
     output = _group_sentences(tags, docs)
     assert output == [
-        (ParsedDoc(spacy_doc=None, name='doc_a', text=''), ['O', 'O', 'B', 'B']),
-        (ParsedDoc(spacy_doc=None, name='doc_b', text=''), ['B', 'I'])
+        (ParsedDoc(name='doc_a', text='', token_starts=[], token_ends=[]), ['O', 'O', 'B', 'B']),
+        (ParsedDoc(name='doc_b', text='', token_starts=[], token_ends=[]), ['B', 'I'])
     ]
 
 
+def test_group_sentences_identical_docs():
+    tags = [['O', 'O'], ['B', 'B'], ['B', 'I']]
+    doc = ParsedDoc(name='doc_a', text='', token_starts=[], token_ends=[])
+    docs = SentenceDocs(docs=[doc, doc, doc], doc_indices=[0, 1, 1], token_offsets=[0, 0, 2])
+
+    output = _group_sentences(tags, docs)
+    assert output == [
+        (doc, ['O', 'O']),
+        (doc, ['B', 'B', 'B', 'I']),
+        (doc, [])
+    ]
+
+
+def test_sentence_docs():
+    doc_a = ParsedDoc(name='doc_a', text='', token_starts=[], token_ends=[])
+    doc_b = ParsedDoc(name='doc_b', text='', token_starts=[], token_ends=[])
+    docs = SentenceDocs(docs=[doc_a, doc_b])
+    docs.append(doc_index=0, token_offset=0)
+    docs.append(doc_index=1, token_offset=0)
+    docs.append(doc_index=1, token_offset=5)
+
+    assert len(docs) == 3
+    assert list(docs) == [doc_a, doc_b, doc_b]
+    assert docs[-1] == doc_b
+    assert docs[:2] == [doc_a, doc_b]
+    assert list(docs.token_offsets) == [0, 0, 5]
+
+
+def test_sentence_batch():
+    batch = SentenceBatch()
+    batch.start_sentence(0)
+    batch.add_tokens(texts=['Jan', 'Jansen', '.'], pos_tags=['PROPN', 'PROPN', 'PUNCT'],
+                     labels=['B-Name', 'I-Name', 'O'], ner_tags=['PER', 'PER', ''])
+    batch.start_sentence(3)
+    batch.add_tokens(texts=['Hij', 'belt'], pos_tags=['PRON', 'VERB'],
+                     labels=['O', 'O'], ner_tags=['', ''])
+
+    assert len(batch) == 2
+    assert batch.n_tokens == 5
+    assert [len(sent) for sent in batch] == [3, 2]
+    # Tag values are interned
+    assert sorted(batch.strings) == sorted({'PROPN', 'PUNCT', 'PRON', 'VERB', 'B-Name', 'I-Name',
+                                            'O', 'PER', ''})
+
+    sent = batch[-1]
+    assert sent.column('text') == ['Hij', 'belt']
+    assert sent.column('label') == ['O', 'O']
+    assert sent[0] == Token(text='Hij', pos_tag='PRON', label='O', ner_tag='')
+    assert sent[-1] == Token(text='belt', pos_tag='VERB', label='O', ner_tag='')
+    assert list(batch[0]) == [
+        Token(text='Jan', pos_tag='PROPN', label='B-Name', ner_tag='PER'),
+        Token(text='Jansen', pos_tag='PROPN', label='I-Name', ner_tag='PER'),
+        Token(text='.', pos_tag='PUNCT', label='O', ner_tag=''),
+    ]
+
+
+def test_standoff_roundtrip_keeps_identical_docs():
+    text = 'Patient Jan Jansen is ontslagen.'
+    annotations = [Annotation(text='Jan Jansen', start=8, end=18, tag='Name', ann_id='T0')]
+    docs = [
+        Document(name='doc_a', text=text, annotations=annotations),
+        Document(name='doc_a', text=text, annotations=annotations),
+        Document(name='empty', text='', annotations=[])
+    ]
+
+    tokenizer = TokenizerFactory().tokenizer('ons')
+    sents, sents_docs = standoff_to_sents(docs, tokenizer)
+    assert len(sents) == len(sents_docs)
+    assert len(sents_docs.docs) == 3
+
+    tags = [[token.label for token in sent] for sent in sents]
+    annotated_docs = sents_to_standoff(tags, sents_docs)
+    assert [doc.name for doc in annotated_docs] == ['doc_a', 'doc_a', 'empty']
+    assert annotated_docs[0].annotations == annotations
+    assert annotated_docs[1].annotations == annotations
+    assert annotated_docs[2].annotations == []
+
+
+def test_bio_to_standoff():
+    text = 'Jan Jansen uit Utrecht , 10 mei Piet'
+    token_starts, token_ends = [], []
+    for token in text.split(' '):
+        start = text.index(token, token_ends[-1] if token_ends else 0)
+        token_starts.append(start)
+        token_ends.append(start + len(token))
+    doc = ParsedDoc(name='doc', text=text, token_starts=token_starts, token_ends=token_ends)
+
+    tags = ['B-Name', 'I-Name', 'O', 'I-Address', 'I-Date', 'B-Date', 'I-Date', 'B-Name']
+    assert _bio_to_standoff(tags, doc) == [
+        Annotation(text='Jan Jansen', start=0, end=10, tag='Name', ann_id='T0'),
+        Annotation(text='Utrecht', start=15, end=22, tag='Address', ann_id='T1'),
+        Annotation(text=',', start=23, end=24, tag='Date', ann_id='T2'),
+        Annotation(text='10 mei', start=25, end=31, tag='Date', ann_id='T3'),
+        Annotation(text='Piet', start=32, end=36, tag='Name', ann_id='T4'),
+    ]
+
+    assert _bio_to_standoff(['O'] * len(token_starts), doc) == []
+
+    with pytest.raises(ValueError):
+        _bio_to_standoff(['O'], doc)
+
+
 def test_bio_to_biluo():
     bio_tags = ['B-a', 'B-b', 'O', 'B-b', 'I-b', 'I-b', 'O', 'O', 'O', 'B-a', 'I-a']
     assert _bio_to_biluo(bio_tags) == [
@@ -1,6 +1,6 @@
 import pytest
 
-from deidentify.surrogates.generators import Date, DateSurrogates, RandomData
+from deidentify.surrogates.generators import Date, DateFormatCache, DateSurrogates, RandomData
 from deidentify.surrogates.generators.date import (adjust_long_date_span, fully_parsed,
                                         infer_format, max_date,
                                         minimum_season_offsets, year_span)
@@ -316,3 +316,52 @@ def test_switch_locale():
     locale.setlocale(locale.LC_ALL, 'en_US.UTF-8')
     assert dateinfer.infer(['12 January']) == '%d %B'
     assert dateinfer.infer(['12 januari']).split()[1] == 'januari'
+
+
+def test_date_format_cache(tmpdir):
+    cache = DateFormatCache(max_size=2)
+
+    date = cache.infer_format('3 maart 2019')
+    assert (date.format, date.locale) == ('%d %B %Y', 'nl_NL.UTF-8')
+    assert cache.infer_format('4 maart 2018') == infer_format('4 maart 2018')
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Numbers that are tagged differently have a different shape
+    assert cache.infer_format('13-03-2019').format == '%d-%m-%Y'
+    assert cache.infer_format('03-12-2019').format == '%d-%m-%Y'
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert len(cache) == 2
+
+    with pytest.raises(ValueError):
+        cache.infer_format('3 marc 2019')
+    with pytest.raises(ValueError):
+        cache.infer_format('4 marc 2019')
+    assert (cache.hits, cache.misses) == (2, 4)
+
+    path = str(tmpdir.join('date-formats.json'))
+    cache.save(path)
+    loaded = DateFormatCache.load(path)
+    assert len(loaded) == 2
+    assert loaded.infer_format('03-11-2020') == infer_format('03-11-2020')
+    with pytest.raises(ValueError):
+        loaded.infer_format('5 marc 2019')
+    assert (loaded.hits, loaded.misses) == (2, 0)
+
+
+def test_date_surrogate_generator_format_cache():
+    annotations = [
+        '01 januari 1915', '01-02', 'marc 2001', 'February 2001', '01-02-2010',
+    ]
+
+    cache = DateFormatCache()
+    for _ in range(2):
+        date_surrogates = DateSurrogates(annotations, random_data=RandomData(42),
+                                         format_cache=cache)
+        assert date_surrogates.replace_all() == [
+            '09 januari 2006',
+            '09-02',
+            None,
+            'February 2086',
+            '09-02-2095'
+        ]
+    assert cache.hits == len(annotations)
@@ -0,0 +1,55 @@
+import locale
+from datetime import datetime
+
+import pytest
+
+from deidentify.surrogates.generators import DateSurrogates, RandomData
+from deidentify.surrogates.generators.date_locale import (DATE_LOCALES, format_date,
+                                                          infer_date_format, parse_date)
+
+
+def test_parse_date():
+    assert parse_date('dinsdag 5 maart 2019 08:59', '%A %d %B %Y %H:%M', 'nl_NL.UTF-8') == \
+        datetime(2019, 3, 5, 8, 59)
+    assert parse_date('5 MÄRZ 19', '%d %B %y', 'de_DE.UTF-8') == datetime(2019, 3, 5)
+    assert parse_date('05  mrt', '%d %b', 'nl_NL.UTF-8') == datetime(1900, 3, 5)
+    assert parse_date('12:30 PM', '%I:%M %p', 'en_US.UTF-8') == datetime(1900, 1, 1, 12, 30)
+    assert parse_date('12:30 AM', '%I:%M %p', 'en_US.UTF-8') == datetime(1900, 1, 1, 0, 30)
+    assert parse_date('15-34+0100', '%H-%M%z').utcoffset().total_seconds() == 3600
+
+    with pytest.raises(ValueError):
+        parse_date('5 March 2019', '%d %B %Y', 'nl_NL.UTF-8')
+    with pytest.raises(ValueError):
+        parse_date('12:30 PM', '%I:%M %p', 'nl_NL.UTF-8')
+    with pytest.raises(ValueError):
+        parse_date('5 maart', '%d %B', 'fr_FR.UTF-8')
+
+
+@pytest.mark.parametrize('date_locale', list(DATE_LOCALES))
+def test_format_date_roundtrip(date_locale):
+    date_format = '%a %A %d %b %B %Y %H:%M %%'
+    for month in range(1, 13):
+        date = datetime(2019, month, month + 10, 12, 5)
+        date_string = format_date(date, date_format, date_locale)
+        assert parse_date(date_string, date_format, date_locale) == date
+
+    assert format_date(datetime(2019, 3, 5), '%A %d %B', date_locale).split()[0] == \
+        DATE_LOCALES[date_locale].weekdays[1]
+
+
+def test_infer_date_format():
+    assert infer_date_format('dinsdag 5 maart 2019', 'nl_NL.UTF-8') == '%A %d %B %Y'
+    assert infer_date_format('dinsdag 5 maart 2019', 'en_US.UTF-8') == 'dinsdag %m maart %Y'
+    assert infer_date_format('2 May 1980', 'en_US.UTF-8') == '%d %b %Y'
+    assert infer_date_format('2 Mai 1980', 'de_DE.UTF-8') == '%d %b %Y'
+    assert infer_date_format('22/05/13', 'nl_NL.UTF-8') == '%d/%m/%y'
+
+
+def test_date_surrogates_do_not_set_locale(monkeypatch):
+    def setlocale(*_):
+        raise AssertionError('locale.setlocale should not be called')
+
+    monkeypatch.setattr(locale, 'setlocale', setlocale)
+    date_surrogates = DateSurrogates(['01 januari 1915', 'Dienstag 5 März 2019'],
+                                     random_data=RandomData(42))
+    assert all(date_surrogates.replace_all())
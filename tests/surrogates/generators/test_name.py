@@ -4,7 +4,12 @@ import string
 from deidentify.surrogates.generators import (InitialsSurrogates,
                                               NameSurrogates, RandomData)
 from deidentify.surrogates.generators.name import (NameDatabase,
+                                                   find_name_part,
+                                                   parse_name,
                                                    random_char_mapping)
+from deidentify.surrogates.generators.name_index import (build_name_indices,
+                                                         load_name_indices,
+                                                         save_name_indices)
 
 
 def list_equal(a, b):
@@ -150,6 +155,30 @@ def test_strict_replace():
     sp = NameSurrogates.strict_replace
     assert sp(part='Jan', replacement='Peter', whole='van Janssen, Jan') == 'van Janssen, Peter'
     assert sp(part='Ludo)Enckels', replacement='Peter', whole='Ludo)Enckels') == 'Peter'
+    assert sp(part='Jan', replacement='Piet', whole='Jan-Jan Jansen') == 'Piet-Piet Jansen'
+
+
+def test_find_name_part():
+    assert find_name_part('Jan', 'Jan Janosh janssen') == [(0, 3)]
+    assert find_name_part('Jan', 'van Janssen, Jan') == [(13, 16)]
+    assert find_name_part('F.A.', 'Lucas F.A. de Groot') == [(6, 10)]
+    assert find_name_part('de', 'Lucas F.A. de Groot') == [(11, 13)]
+    assert find_name_part('Piet', 'Jan Jansen') == []
+    assert find_name_part('J.', 'Jansen, J.') == [(8, 10)]
+
+
+def test_parse_name():
+    parsed = parse_name('Dhr. Lucas F.A. de Groot, Ph.D.')
+    assert parsed.name.first == 'Lucas'
+    assert parsed.spans == {'first': [(5, 10)], 'middle': [(11, 15)], 'last': [(16, 24)]}
+    assert parse_name('Dhr. Lucas F.A. de Groot, Ph.D.') is parsed
+
+    # Occurrences that overlap a previous part are skipped, later ones are still found.
+    parsed = parse_name('Jan-Piet Piet Piet Jansen')
+    assert parsed.spans == {'first': [(0, 8)], 'middle': [(9, 18)], 'last': [(19, 25)]}
+
+    # Equal parts share their occurrences.
+    assert parse_name('Jan Jan').spans == {'first': [(0, 3), (4, 7)], 'last': [(0, 3), (4, 7)]}
 
 
 def test_surrogate_firstname():
@@ -219,7 +248,7 @@ def test_is_initials():
 
 def test_replace_all():
     male = ['Daniel', 'Markus', 'Thomas', 'Jan', 'Jurrien', 'Harm', 'Harmen', 'Damien', 'Dano']
-    female = ['Annemarie', 'Caroline', 'Clara']
+    female = ['Annemarie', 'Caroline', 'Clara', 'Dora', 'Daphne']
     lastnames = [('van', 'Leuween'), ('van der', 'Linden'), ('', 'Nieuwenhuis'), ('', 'Nguyen')]
 
     name_database = NameDatabase(firstnames_male=male,
@@ -229,13 +258,15 @@ def test_replace_all():
     firstname_char_mapping = {
         'a': 'c',
         'd': 'j',
+        'j': 'd',
         'm': 'h',
         't': 'd',
     }
 
     lastname_char_mapping = {
         'h': 'l',
-        'g': 'n'
+        'g': 'n',
+        'j': 'n'
     }
 
     # pylint: disable=C0326
@@ -248,7 +279,10 @@ def test_replace_all():
         ('D. de Groot',                      'J. Nguyen'),
         ('Daniel markus thomas de Groot',    'Jurrien harmen damien Nguyen'),
         ('Daniel MT de Groot',               'Jurrien HD Nguyen'),
-        ('Daniel M.T. de Groot',             'Jurrien H.D. Nguyen')
+        ('Daniel M.T. de Groot',             'Jurrien H.D. Nguyen'),
+        ('Jansen, J.',                       'Nguyen, D.'),
+        ('Jansen J.',                        'Daphne Nguyen'),
+        ('Jan Jan',                          'Damien Damien'),
     ]
     annotations = (given for given, _ in given_expected)
     expected = [expected for _, expected in given_expected]
@@ -262,6 +296,12 @@ def test_replace_all():
     surrogates = name_surrogates.replace_all()
     assert surrogates == expected
 
+    name_surrogates.annotations = ['Daniel MT de Groot', 'Daniel MT de Groot']
+    assert name_surrogates.replace_all() == ['Jurrien HD Nguyen', 'Jurrien HD Nguyen']
+
+    name_surrogates.annotations = ['Daniel Markus Markus de Groot']
+    assert name_surrogates.replace_all() == ['Jurrien Harmen Harmen Nguyen']
+
 
 def test_replace_all_with_substring():
     name_database = NameDatabase()
@@ -310,3 +350,33 @@ def test_initials_surrogates():
         'f.',
         'f.A.u.'
     ]
+
+
+def test_name_index_roundtrip(tmpdir):
+    name_database = _name_database()
+    indices = {'male': name_database.male_index, 'female': name_database.female_index,
+               'lastname': name_database.lastname_index}
+
+    index_file = str(tmpdir.join('names.npz'))
+    save_name_indices(indices, index_file)
+    loaded = load_name_indices(index_file)
+
+    for name, index in indices.items():
+        assert list(loaded[name].keys()) == list(index.keys())
+        for key, names in index.items():
+            assert list(loaded[name][key]) == list(names)
+
+    assert loaded['lastname']['l'][-1] == ('van der', 'Linden')
+    assert loaded['female']['s'][:2] == ['Şeyda', 'Şerife']
+
+
+def test_name_database_loads_lazily(tmpdir):
+    index_file = str(tmpdir.join('names.npz'))
+    save_name_indices(build_name_indices(['Jan'], ['Anne'], [('de', 'Groot')]), index_file)
+
+    name_database = NameDatabase(lastnames=[('', 'Lammers')], index_file=index_file)
+    assert name_database._indices is None
+
+    assert list(name_database.male_index['j']) == ['Jan']
+    assert name_database.gender_index_for_name('anne') == name_database.female_index
+    assert list(name_database.lastname_index) == ['l']
@@ -2,7 +2,9 @@ from os.path import dirname, join
 
 from deidentify.base import Annotation
 from deidentify.dataset.brat import load_brat_document
+from deidentify.surrogates import dataset_deidentifier
 from deidentify.surrogates.dataset_deidentifier import DatasetDeidentifier, Document
+from deidentify.surrogates.generators import GeneratorFactory
 
 
 def _load_documents():
@@ -67,3 +69,39 @@ def test_generate_surrogates_shuffle_choices():
     assert len(original_annotations) == 1 and len(surrogates) == 1
     assert original_annotations[0].text == 'MST'
     assert surrogates[0] == 'UMCU'
+
+
+def _id_documents():
+    docs = []
+    for text in ['Patient 123456 and 654321.', 'Patient 123456 and 987654.']:
+        annotations = [Annotation(text[8:14], 8, 14, 'ID'), Annotation(text[19:25], 19, 25, 'ID')]
+        docs.append(Document(annotations, text))
+    return docs
+
+
+def test_generate_surrogates_corpus_level():
+    docs = DatasetDeidentifier(corpus_level=True).generate_surrogates(_id_documents())
+    surrogates = [doc.surrogates('ID') for doc in docs]
+
+    assert surrogates[0][0] == surrogates[1][0]
+    assert surrogates[0][1] != surrogates[1][1]
+
+
+def test_generate_surrogates_per_document(monkeypatch):
+    factories = []
+
+    class RecordingFactory(GeneratorFactory):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            factories.append(self)
+
+    monkeypatch.setattr(dataset_deidentifier, 'GeneratorFactory', RecordingFactory)
+
+    DatasetDeidentifier().generate_surrogates(_id_documents())
+    assert len(factories) == 2
+    assert all(factory.caches is None for factory in factories)
+
+    factories.clear()
+    DatasetDeidentifier(corpus_level=True).generate_surrogates(_id_documents())
+    assert len(factories) == 1
+    assert factories[0].caches['ID']['annotations']
@@ -3,7 +3,8 @@ from unittest.mock import patch
 
 import pytest
 
-from deidentify.taggers.base import cached_model_file, lookup_model
+from deidentify.base import Document
+from deidentify.taggers.base import TextTagger, batches, cached_model_file, lookup_model
 
 
 def test_cached_model_file(tmpdir):
@@ -40,3 +41,39 @@ def test_cached_model_file_raises_error_on_missing_model(tmpdir):
 def test_lookup_model_with_invalid_name_raises_value_error():
     with pytest.raises(ValueError):
         lookup_model('invalid')
+
+
+class UppercaseTagger(TextTagger):
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def annotate(self, documents):
+        self.batch_sizes.append(len(documents))
+        return [Document(name=doc.name, text=doc.text.upper()) for doc in documents]
+
+    @property
+    def tags(self):
+        return []
+
+
+def test_batches():
+    assert list(batches(range(5), batch_size=2)) == [[0, 1], [2, 3], [4]]
+    assert list(batches([], batch_size=2)) == []
+
+    with pytest.raises(ValueError):
+        list(batches(range(5), batch_size=0))
+
+
+def test_annotate_stream():
+    tagger = UppercaseTagger()
+    documents = (Document(name=str(i), text='doc {}'.format(i)) for i in range(5))
+
+    annotated = tagger.annotate_stream(documents, batch_size=2)
+    # documents are consumed lazily
+    assert tagger.batch_sizes == []
+
+    annotated = list(annotated)
+    assert [doc.name for doc in annotated] == ['0', '1', '2', '3', '4']
+    assert [doc.text for doc in annotated] == ['DOC 0', 'DOC 1', 'DOC 2', 'DOC 3', 'DOC 4']
+    assert tagger.batch_sizes == [2, 2, 1]
@@ -1,5 +1,5 @@
 from deidentify.base import Annotation, Document
-from deidentify.taggers import CRFTagger
+from deidentify.taggers import CRFTagger, PredictionCache
 from deidentify.tokenizer import TokenizerFactory
 
 tokenizer = TokenizerFactory().tokenizer(corpus='ons')
@@ -19,6 +19,22 @@ def test_annotate():
     ]
 
 
+def test_annotate_with_prediction_cache(tmpdir):
+    cache = PredictionCache(path=str(tmpdir.join('cache.sqlite')))
+    cached_tagger = CRFTagger(model='model_crf_ons_tuned-v0.2.0', tokenizer=tokenizer,
+                              prediction_cache=cache)
+
+    text = 'Hij werd op 10 oktober door arts Peter de Visser ontslagen van de kliniek.'
+    docs = [Document(name=str(i), text=text, annotations=[]) for i in range(3)]
+
+    expected = tagger.annotate(docs)
+    assert cached_tagger.annotate(docs) == expected
+    assert len(cache) == 1  # the duplicate sentence was tagged once
+    misses = cache.misses
+    assert cached_tagger.annotate(docs) == expected
+    assert cache.misses == misses
+
+
 def test_tags():
     expected = [
         'SSN',
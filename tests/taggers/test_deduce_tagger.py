@@ -18,3 +18,32 @@ def test_tags():
 
     assert sorted(tagger.tags) == sorted(
         ['ID', 'URL_IP', 'Date', 'Phone_fax', 'Address', 'Name', 'Age', 'Named_Location'])
+
+
+def test_profiling():
+    tagger = DeduceTagger()
+    assert not tagger.profiler.enabled
+
+    profiler = tagger.enable_profiling()
+    doc = Document(name='', text='Jan Jannsen vanuit het UMCU.', annotations=[])
+    tagger.annotate([doc, doc])
+
+    assert [stage.name for stage in profiler.stats.stages] == ['inference']
+    assert profiler.stats.counts == {'documents': 2}
+
+    tagger.disable_profiling()
+    assert not tagger.profiler.enabled
+
+
+def test_annotate_with_worker_pool():
+    doc = Document(name='', text='Jan Jannsen vanuit het UMCU.', annotations=[])
+    expected = [doc.annotations for doc in DeduceTagger().annotate([doc] * 20)]
+
+    with DeduceTagger(n_jobs=2) as tagger:
+        assert [doc.annotations for doc in tagger.annotate([doc] * 20)] == expected
+        pool = tagger._pool
+        assert pool is not None
+        assert [doc.annotations for doc in tagger.annotate([doc] * 20)] == expected
+        assert tagger._pool is pool
+
+    assert tagger._pool is None
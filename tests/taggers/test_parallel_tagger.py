@@ -0,0 +1,38 @@
+from deidentify.base import Annotation, Document
+from deidentify.taggers.base import TextTagger
+from deidentify.taggers.parallel_tagger import ParallelTagger
+
+
+class FirstWordTagger(TextTagger):
+    """Tags the first word of each document. Defined at module level so that it can be pickled."""
+
+    def __init__(self, tag):
+        self.tag = tag
+
+    def annotate(self, documents):
+        annotated_docs = []
+        for doc in documents:
+            word = doc.text.split(' ')[0]
+            ann = Annotation(text=word, start=0, end=len(word), tag=self.tag, ann_id='T0')
+            annotated_docs.append(Document(name=doc.name, text=doc.text, annotations=[ann]))
+        return annotated_docs
+
+    @property
+    def tags(self):
+        return [self.tag]
+
+
+def test_annotate():
+    docs = [Document(name=str(i), text='word{} rest'.format(i)) for i in range(11)]
+
+    with ParallelTagger(FirstWordTagger, n_workers=2, chunk_size=3, tag='Name') as tagger:
+        annotated_docs = tagger.annotate(docs)
+        assert tagger.tags == ['Name']
+        assert tagger.annotate([]) == []
+
+    assert [doc.name for doc in annotated_docs] == [doc.name for doc in docs]
+    for doc in annotated_docs:
+        assert doc.annotations == [
+            Annotation(text='word' + doc.name, start=0, end=4 + len(doc.name), tag='Name',
+                       ann_id='T0')
+        ]
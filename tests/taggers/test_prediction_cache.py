@@ -0,0 +1,67 @@
+import pickle
+
+import pytest
+
+from deidentify.taggers.prediction_cache import PredictionCache, cached_predict, file_digest
+
+
+def test_make_key():
+    key = PredictionCache.make_key('model-a', ['Jan', 'Jansen'])
+    assert key == PredictionCache.make_key('model-a', ['Jan', 'Jansen'])
+    assert key != PredictionCache.make_key('model-b', ['Jan', 'Jansen'])
+    assert key != PredictionCache.make_key('model-a', ['Jan Jansen'])
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_size=2)
+    cache.put('a', ['O'])
+    cache.put('b', ['B-Name'])
+    assert cache.get('a') == ['O']  # 'a' is now most recently used
+
+    cache.put('c', ['O', 'O'])
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == ['O']
+    assert cache.get('c') == ['O', 'O']
+    assert (cache.hits, cache.misses) == (3, 1)
+
+    with pytest.raises(ValueError):
+        PredictionCache(max_size=0)
+
+
+def test_sqlite_persistence(tmpdir):
+    path = str(tmpdir.join('cache.sqlite'))
+
+    cache = PredictionCache(max_size=1, path=path)
+    cache.put('a', ['O'])
+    cache.put('b', ['B-Name'])
+    # 'a' was evicted from memory but is still on disk
+    assert cache.get('a') == ['O']
+    cache.close()
+
+    cache = pickle.loads(pickle.dumps(PredictionCache(path=path)))
+    assert cache.get('b') == ['B-Name']
+    cache.close()
+
+
+def test_cached_predict():
+    calls = []
+
+    def predict(items):
+        calls.append(list(items))
+        return [[item.upper()] for item in items]
+
+    cache = PredictionCache(max_size=1)
+    keys = ['a', 'b', 'a']
+    assert cached_predict(cache, keys, ['x', 'y', 'x'], predict) == [['X'], ['Y'], ['X']]
+    assert calls == [['x', 'y']]
+
+    assert cached_predict(cache, ['b'], ['y'], predict) == [['Y']]
+    assert len(calls) == 1
+
+
+def test_file_digest(tmpdir):
+    p = tmpdir.join('model.pickle')
+    p.write('abc')
+    assert file_digest(str(p)) \
+        == 'ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad'
@@ -0,0 +1,50 @@
+import pytest
+
+from deidentify.profiling import NULL_PROFILER, Profiler
+
+
+def test_profiler_records_stages_and_counts():
+    profiler = Profiler()
+
+    with profiler.stage('parse'):
+        pass
+    with profiler.stage('tag'):
+        with profiler.stage('parse'):
+            pass
+    profiler.count('documents', 3)
+    profiler.count('documents')
+
+    stats = profiler.stats
+    assert [(stage.name, stage.calls) for stage in stats.stages] == [('parse', 2), ('tag', 1)]
+    assert all(stage.total_seconds >= 0 for stage in stats.stages)
+    assert stats.counts == {'documents': 4}
+    assert 'parse' in profiler.summary()
+
+    profiler.reset()
+    assert profiler.stats.stages == []
+
+
+def test_timed_iter():
+    profiler = Profiler()
+    assert list(profiler.timed_iter('produce', iter([1, 2, 3]))) == [1, 2, 3]
+    # One call per item plus the final StopIteration
+    assert profiler.stats.stages[0].calls == 4
+
+
+def test_disabled_profiler_is_noop():
+    with NULL_PROFILER.stage('parse'):
+        pass
+    NULL_PROFILER.count('documents', 10)
+    assert list(NULL_PROFILER.timed_iter('produce', [1, 2])) == [1, 2]
+    assert NULL_PROFILER.stats.stages == []
+    assert NULL_PROFILER.stats.counts == {}
+
+
+def test_cprofile():
+    profiler = Profiler(cprofile=True)
+    with profiler.stage('sort'):
+        sorted(range(1000), reverse=True)
+    assert profiler.cprofile_stats().total_calls > 0
+
+    with pytest.raises(ValueError):
+        Profiler().cprofile_stats()
@@ -53,3 +53,26 @@ def test_infix_split_on_forward_slash_exclude_dates():
     doc = tokenizer.parse_text(text)
     tokens = [t.text for t in doc]
     assert tokens == ['13/01/2020']
+
+
+def test_parse_texts():
+    texts = [
+        '=== Answer: 1234 ===\nDit is een zin.\n=== Report: 1234 ===\nMw. heeft goed gegeten.',
+        '',
+        'GRZ(12-12-2020).',
+    ]
+    docs = list(tokenizer.parse_texts(texts, batch_size=2))
+
+    assert len(docs) == len(texts)
+    for text, doc in zip(texts, docs):
+        expected = tokenizer.parse_text(text)
+        assert [t.text for t in doc] == [t.text for t in expected]
+        assert [s.text for s in doc.sents] == [s.text for s in expected.sents]
+
+
+def test_metadata_merge_is_pipeline_component():
+    from deidentify.tokenizer.tokenizer_ons import NLP
+    assert NLP.pipe_names[-1] == 'merge-metadata'
+
+    text = 'Geen metadata == Report: 12 == hier.\n'
+    assert [t.text for t in tokenizer.parse_text(text)] == [t.text for t in NLP.make_doc(text)]